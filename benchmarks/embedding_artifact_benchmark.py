@@ -0,0 +1,85 @@
+"""
+Benchmarks the binary embedding artifact against the JSON embeddings file it replaces.
+
+Random unit vectors are written as the legacy JSON (compact and indented) and as float32,
+float16 and int8 artifacts. For each format it reports the size on disk, the time to open it
+and the time until every vector is usable as a float32 matrix (for memory-mapped artifacts
+this includes reading every page), plus the worst cosine similarity to the original vectors.
+Files are read from the page cache, so the numbers show parsing cost, not disk speed.
+
+Usage (from the project root):
+    python benchmarks/embedding_artifact_benchmark.py --chunks 2000 --dim 1024
+"""
+
+import sys
+import os
+
+# Dynamically add the project root (1 level up from this script) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+from data_preprocessing.embedding_artifact import EmbeddingArtifact, save_embeddings, artifact_paths, \
+    load_json_embeddings
+
+
+def best_of(fn, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def worst_cosine(decoded, vectors):
+    decoded = np.asarray(decoded, dtype=np.float32)
+    norms = np.linalg.norm(decoded, axis=1) * np.linalg.norm(vectors, axis=1)
+    return float(np.min(np.sum(decoded * vectors, axis=1) / norms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding artifact vs JSON: disk size and load time.")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk_{i:024x}" for i in range(args.chunks)]
+    texts = [f"chunk text {i}" for i in range(args.chunks)]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, indent in (("json (indented)", 2), ("json (compact)", None)):
+            path = os.path.join(tmp, f"embeddings-{indent}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                records = [{"object": "embedding", "index": i, "embedding": v.tolist()} for i, v in enumerate(vectors)]
+                json.dump(records, f, indent=indent, separators=None if indent else (",", ":"))
+            open_time, decoded = best_of(lambda: load_json_embeddings(path), args.repeat)
+            rows.append((name, os.path.getsize(path), open_time, open_time, worst_cosine(decoded, vectors)))
+
+        for dtype in ("float32", "float16", "int8"):
+            base = os.path.join(tmp, f"embeddings-{dtype}")
+            save_embeddings(base, ids, vectors, "benchmark", texts, dtype)
+            size = sum(os.path.getsize(p) for p in artifact_paths(base) if os.path.exists(p))
+            open_time, artifact = best_of(lambda: EmbeddingArtifact.load(base), args.repeat)
+            # Touch every row: the cost of actually using all vectors once
+            full_time, decoded = best_of(lambda: np.array(EmbeddingArtifact.load(base).vectors()), args.repeat)
+            rows.append((f"artifact {dtype}", size, open_time, full_time, worst_cosine(decoded, vectors)))
+
+    json_size = rows[0][1]
+    print(f"{args.chunks} chunks x {args.dim} dims (best of {args.repeat})")
+    print(f"{'format':<20}{'size MiB':>10}{'vs json':>9}{'open ms':>10}{'all rows ms':>13}{'min cosine':>12}")
+    for name, size, open_time, full_time, cos in rows:
+        print(f"{name:<20}{size / 2 ** 20:>10.2f}{size / json_size:>9.3f}{open_time * 1000:>10.2f}"
+              f"{full_time * 1000:>13.2f}{cos:>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
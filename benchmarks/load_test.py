@@ -0,0 +1,399 @@
+"""
+Load-tests the Rasa -> RAG path offline and compares runs.
+
+Everything runs locally against stand-ins for the external services:
+    - the mock Jina server (retrieval/mock_embedding_server.py) with a configurable latency,
+    - the mock OpenAI-compatible streaming LLM (generation/mock_llm_server.py),
+    - a real, temporary Chroma collection (plus its BM25 index) embedded by the mock Jina server.
+
+A replayable query corpus is built from the FAQ list (exact and paraphrased questions, which
+exercise the FAQ route), RAG-style template questions and optional JSONL request logs (one
+object per line with a "query", "message", "text" or "title" field). It can be saved with
+--save-corpus and replayed with --corpus.
+
+The harness drives ActionSmartRouter.run() (--target action), answer_query_async()
+(--target rag-async) or the synchronous answer_query() in worker threads (--target rag) with
+--concurrency requests in flight, and reports QPS, p50/p95/p99 of the end-to-end latency and
+of every traced stage (see generation/telemetry.py), routes, cache hits and RSS growth.
+
+Usage (from the project root):
+    python benchmarks/load_test.py --requests 500 --concurrency 16 --output runs/baseline.json
+    python benchmarks/load_test.py --requests 500 --concurrency 16 --compare runs/baseline.json
+
+With --compare, metrics that got worse by more than --tolerance are flagged and, with
+--fail-on-regression, the script exits with status 1.
+"""
+
+import sys
+import os
+
+# Dynamically add the project root (1 level up from this script) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+# Read by config at import time: no warm-up or metrics port for the imported action module
+os.environ.setdefault("WARM_UP_COMPONENTS", "false")
+os.environ.setdefault("METRICS_PORT", "0")
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import resource
+import tempfile
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+import chromadb
+import numpy as np
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+from data_preprocessing.chromadb_manager import sync_collection, build_records
+from generation import mock_llm_server
+from generation.llm import LLM, LLMScheduler
+from generation.llm_backends import MockBackend
+from generation.rag_core import answer_query, answer_query_async
+from generation.telemetry import trace_request, add_trace_listener, remove_trace_listener
+from rasa_layer.actions.actions import ActionSmartRouter
+from rasa_layer.component_pool import ComponentPool
+from rasa_layer.faq_data import faq_list
+from retrieval import mock_embedding_server
+from retrieval.chroma_vectorstore import ChromaRetriever
+from retrieval.embedding import EmbeddingModel
+from retrieval.embedding_backends import JinaBackend
+from retrieval.embedding_cache import EmbeddingCache
+from retrieval.lexical_index import LexicalIndex, lexical_index_path
+
+COLLECTION = "LOAD_TEST"
+PERCENTILES = (50, 95, 99)
+
+DEPARTMENTS = ("Computer Science", "Electronics", "Electrical", "Mechanical", "Civil", "Chemical")
+RAG_TEMPLATES = (
+    "What is the fee structure for M.Tech in {department}?",
+    "How many seats are available in {department}?",
+    "What is the eligibility for the {department} M.Tech programme?",
+    "Is a GATE score required for {department}?",
+    "What documents are needed for {department} admission?",
+    "When does the {department} M.Tech programme start?",
+    "What is the reservation policy for {department} seats?",
+)
+CHUNK_TEMPLATES = (
+    "The M.Tech programme in {department} has {seats} seats. Candidates with a valid GATE score are given preference.",
+    "The tuition fee for M.Tech {department} is Rs. {fee} per semester. Fees are paid online.",
+    "Eligibility for {department}: a B.Tech or B.E. degree with at least {marks}% marks in the relevant branch.",
+    "Reservation of seats in {department} follows the Government of Kerala norms for SC, ST and OBC candidates.",
+    "Candidates admitted to {department} must submit their mark lists, TC and community certificate at the time of admission.",
+)
+
+
+def log_queries(path: str) -> list:
+    """Questions from a JSONL log ("query", "message", "text" or "title" field per line)."""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for field in ("query", "message", "text", "title"):
+                if isinstance(record.get(field), str) and record[field].strip():
+                    queries.append(record[field].strip())
+                    break
+    return queries
+
+
+def build_corpus(size: int, log_paths=(), seed: int = 0, faq_share: float = 0.3) -> list:
+    """
+    Builds a deterministic query corpus.
+
+    Args:
+        size (int): Number of queries.
+        log_paths (List[str]): JSONL request logs whose questions are mixed in.
+        seed (int): Random seed.
+        faq_share (float): Share of queries taken from the FAQ list.
+
+    Returns:
+        List[Dict]: {"query", "kind"} items; kind is "faq", "faq_paraphrase", "rag" or "log".
+    """
+    rng = random.Random(seed)
+    faq_questions = [faq["question"] for faq in faq_list]
+    logged = [q for path in log_paths for q in log_queries(path)]
+    corpus = []
+    for _ in range(size):
+        if faq_questions and rng.random() < faq_share:
+            question = rng.choice(faq_questions)
+            if rng.random() < 0.5:
+                corpus.append({"query": question, "kind": "faq"})
+            else:
+                prefix = rng.choice(("Tell me about the", "What is the", "Can you explain the"))
+                corpus.append({"query": f"{prefix} {question.lower()}?", "kind": "faq_paraphrase"})
+        elif logged and rng.random() < 0.5:
+            corpus.append({"query": rng.choice(logged), "kind": "log"})
+        else:
+            template = rng.choice(RAG_TEMPLATES)
+            corpus.append({"query": template.format(department=rng.choice(DEPARTMENTS)), "kind": "rag"})
+    return corpus
+
+
+def load_chunks(path: str = None) -> list:
+    """Chunks from a ***-delimited chunk file, or a synthetic prospectus built from templates and FAQ answers."""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [c.strip() for c in f.read().split("***") if c.strip()]
+    rng = random.Random(1)
+    chunks = [template.format(department=department, seats=rng.randint(12, 40), fee=rng.randint(20, 60) * 1000,
+                              marks=rng.choice((50, 55, 60)))
+              for department in DEPARTMENTS for template in CHUNK_TEMPLATES]
+    for faq in faq_list:
+        chunks.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", faq["answer"]) if len(s.strip()) > 40)
+    return list(dict.fromkeys(chunks))
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(samples: list) -> dict:
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    if not len(ms):
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+    summary["mean"] = round(float(ms.mean()), 3)
+    summary["count"] = int(len(ms))
+    return summary
+
+
+class LoadTest:
+    """Stand-in services, a temporary Chroma collection and the components under test."""
+
+    def __init__(self, args):
+        self.args = args
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        args = self.args
+        embed_server, embed_url = mock_embedding_server.start_in_background(dim=args.dim, latency=args.embed_latency)
+        llm_server, llm_url = mock_llm_server.start_in_background(
+            first_token_delay=args.llm_ttft, token_delay=args.llm_token_delay, tokens=args.llm_tokens
+        )
+        for server in (embed_server, llm_server):
+            self.stack.callback(server.server_close)
+            self.stack.callback(server.shutdown)
+
+        chroma_dir = self.stack.enter_context(tempfile.TemporaryDirectory())
+        self.stack.enter_context(patch("retrieval.chroma_vectorstore.CHROMA_DIR", new=chroma_dir))
+        # No on-disk embedding cache unless requested; keep the working tree clean
+        self.stack.enter_context(patch("retrieval.embedding.EMBEDDING_CACHE_ENABLED", new=False))
+        self.stack.enter_context(patch("rasa_layer.smart_router.ANSWER_CACHE_ENABLED", new=args.answer_cache))
+
+        backend = JinaBackend(url=embed_url, api_key="load-test")
+        chunks = load_chunks(args.chunks_file)
+        collection = chromadb.PersistentClient(path=chroma_dir).get_or_create_collection(name=COLLECTION)
+        sync_collection(collection, chunks, backend.embed_documents)
+        LexicalIndex.build(build_records(chunks)).save(lexical_index_path(COLLECTION, chroma_dir))
+        self.chunk_count = len(chunks)
+
+        cache = EmbeddingCache(backend.cache_namespace, cache_dir=None) if args.embedding_cache else None
+        self.embedding_model = EmbeddingModel(backend=backend, cache=cache)
+        self.vectorstore = ChromaRetriever(collection_name=COLLECTION)
+        scheduler = LLMScheduler(requests_per_minute=args.llm_rpm, tokens_per_minute=args.llm_rpm * 4000,
+                                 max_queue=max(64, args.concurrency * 4))
+        self.llm = LLM(backend=MockBackend(base_url=llm_url, timeout=30), scheduler=scheduler)
+
+        self.pool = ComponentPool(chroma_dir=chroma_dir, embedding_factory=lambda: self.embedding_model,
+                                  vectorstore_factory=lambda: self.vectorstore, llm_factory=lambda: self.llm)
+        self.answer_cache = self.pool.get_answer_cache() if args.answer_cache else None
+        self.stack.enter_context(patch("rasa_layer.smart_router.component_pool", new=self.pool))
+        return self
+
+    def __exit__(self, *exc):
+        return self.stack.__exit__(*exc)
+
+    async def request(self, item: dict, sender_id: str):
+        query = item["query"]
+        if self.args.target == "action":
+            tracker = Tracker(sender_id=sender_id, slots={}, latest_message={"text": query}, events=[],
+                              paused=False, followup_action=None, active_loop={}, latest_action_name=None)
+            await ActionSmartRouter().run(CollectingDispatcher(), tracker, {})
+        elif self.args.target == "rag-async":
+            with trace_request(sender_id):
+                await answer_query_async(query, self.embedding_model, self.vectorstore, self.llm,
+                                         session_id=sender_id, cache=self.answer_cache)
+        else:
+            def run_sync():
+                with trace_request(sender_id):
+                    answer_query(query, self.embedding_model, self.vectorstore, self.llm,
+                                 session_id=sender_id, cache=self.answer_cache)
+            await asyncio.to_thread(run_sync)
+
+    async def run(self, corpus: list, warmup: list = ()) -> dict:
+        args = self.args
+        semaphore = asyncio.Semaphore(args.concurrency)
+        errors = 0
+
+        async def one(i, item):
+            nonlocal errors
+            async with semaphore:
+                try:
+                    await self.request(item, f"load-user-{i % args.sessions}")
+                except Exception:
+                    logging.getLogger(__name__).exception("Request failed.")
+                    errors += 1
+
+        # Warm-up (connections, HNSW load, FAQ index) is not measured
+        await asyncio.gather(*(one(i, item) for i, item in enumerate(warmup)))
+        errors = 0
+
+        traces, totals = [], []
+
+        def collect(trace):
+            traces.append(trace)
+            totals.append(trace.elapsed())
+
+        add_trace_listener(collect)
+        rss_start = rss_mb()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(i, item) for i, item in enumerate(corpus)))
+        finally:
+            duration = time.perf_counter() - started
+            remove_trace_listener(collect)
+        rss_end = rss_mb()
+
+        stages = {}
+        for trace in traces:
+            for stage, seconds in trace.spans.items():
+                stages.setdefault(stage, []).append(seconds)
+        routes, caches = {}, {}
+        for trace in traces:
+            routes[trace.attributes["route"]] = routes.get(trace.attributes["route"], 0) + 1
+            if "cache" in trace.attributes:
+                caches[trace.attributes["cache"]] = caches.get(trace.attributes["cache"], 0) + 1
+
+        return {
+            "config": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "compare", "save_corpus", "fail_on_regression")},
+            "chunks": self.chunk_count,
+            "requests": len(corpus),
+            "errors": errors + sum(1 for t in traces if t.attributes.get("outcome") == "error"),
+            "duration_s": round(duration, 3),
+            "qps": round(len(corpus) / duration, 2) if duration else 0.0,
+            "latency_ms": {"total": summarize(totals),
+                           **{stage: summarize(samples) for stage, samples in sorted(stages.items())}},
+            "routes": routes,
+            "cache_hits": caches,
+            "memory_mb": {"rss_start": round(rss_start, 1), "rss_end": round(rss_end, 1),
+                          "growth": round(rss_end - rss_start, 1)},
+        }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> list:
+    """
+    Compares two reports.
+
+    Returns:
+        List[Tuple[str, float, float, float, bool]]: (metric, baseline, current, relative
+            change, regressed) for QPS, every latency percentile and memory growth.
+    """
+    rows = []
+
+    def add(metric, old, new, higher_is_better=False, min_delta=0.0):
+        if old is None or new is None:
+            return
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        rows.append((metric, old, new, change, worse > tolerance and abs(new - old) > min_delta))
+
+    add("qps", baseline.get("qps"), current.get("qps"), higher_is_better=True)
+    for stage, summary in current.get("latency_ms", {}).items():
+        old_summary = baseline.get("latency_ms", {}).get(stage, {})
+        for p in PERCENTILES:
+            # Sub-millisecond jitter is noise, not a regression
+            add(f"{stage}.p{p}_ms", old_summary.get(f"p{p}"), summary.get(f"p{p}"), min_delta=1.0)
+    # Memory growth is compared in absolute MiB; a few MiB of noise is not a regression
+    old_growth = baseline.get("memory_mb", {}).get("growth")
+    new_growth = current.get("memory_mb", {}).get("growth")
+    if old_growth is not None and new_growth is not None:
+        rows.append(("memory.growth_mb", old_growth, new_growth, new_growth - old_growth,
+                     new_growth - old_growth > max(16.0, abs(old_growth) * tolerance)))
+    return rows
+
+
+def print_report(report: dict):
+    print(f"{report['requests']} requests | {report['errors']} errors | {report['duration_s']} s | "
+          f"{report['qps']} QPS | {report['chunks']} chunks")
+    print(f"{'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'count':>8}")
+    for stage, s in report["latency_ms"].items():
+        if s:
+            print(f"{stage:<14}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['p99']:>10.2f}{s['mean']:>10.2f}{s['count']:>8}")
+    print(f"routes: {report['routes']} | cache hits: {report['cache_hits']}")
+    memory = report["memory_mb"]
+    print(f"RSS: {memory['rss_start']} -> {memory['rss_end']} MiB ({memory['growth']:+} MiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", choices=("action", "rag-async", "rag"), default="action")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=50, help="Distinct sender ids.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="Replay a corpus saved with --save-corpus.")
+    parser.add_argument("--save-corpus", help="Write the generated corpus (JSONL).")
+    parser.add_argument("--log", action="append", default=[], help="JSONL request log to seed queries from.")
+    parser.add_argument("--chunks-file", help="***-delimited chunks; synthetic chunks by default.")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--llm-ttft", type=float, default=0.15)
+    parser.add_argument("--llm-token-delay", type=float, default=0.005)
+    parser.add_argument("--llm-tokens", type=int, default=48)
+    parser.add_argument("--llm-rpm", type=float, default=6000)
+    parser.add_argument("--answer-cache", action="store_true")
+    parser.add_argument("--embedding-cache", action="store_true")
+    parser.add_argument("--output", help="Write the report (JSON).")
+    parser.add_argument("--compare", help="Baseline report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    # Imported modules log every request at INFO; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            corpus = [json.loads(line) for line in f if line.strip()]
+    else:
+        corpus = build_corpus(args.requests, args.log, args.seed)
+    if args.save_corpus:
+        with open(args.save_corpus, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(item) + "\n" for item in corpus)
+
+    with LoadTest(args) as load_test:
+        warmup = build_corpus(args.warmup, args.log, args.seed + 1)
+        report = asyncio.run(load_test.run(corpus, warmup))
+    print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print(f"\n{'metric':<26}{'baseline':>12}{'current':>12}{'change':>10}")
+        for metric, old, new, change, regressed in rows:
+            shown = f"{change:+.1f}" if metric.startswith("memory") else f"{change:+.1%}"
+            print(f"{metric:<26}{old:>12.2f}{new:>12.2f}{shown:>10}{'  REGRESSION' if regressed else ''}")
+        if args.fail_on_regression and any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
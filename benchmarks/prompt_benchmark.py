@@ -0,0 +1,45 @@
+"""
+Microbenchmark: building the prompt with the cached PromptRegistry versus reading and
+compiling prompt_template.txt on every call (the previous build_prompt()).
+
+Usage (from the project root):
+    python benchmarks/prompt_benchmark.py --iterations 5000
+"""
+
+import sys
+import os
+
+# Dynamically add the project root (1 level up from this script) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import argparse
+import timeit
+from jinja2 import Template
+from generation.prompt_utils import build_prompt, TEMPLATE_DIR, DEFAULT_TEMPLATE_FILE
+
+CONTEXT = "The fee for M.Tech Technology Management is Rs. 8160/-. " * 40
+QUESTION = "What is the fee for M.Tech Technology Management?"
+
+
+def build_prompt_uncached(context, question):
+    with open(os.path.join(TEMPLATE_DIR, DEFAULT_TEMPLATE_FILE), "r") as file:
+        template_str = file.read()
+    return Template(template_str).render(context=context, question=question)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt construction microbenchmark.")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    assert build_prompt(CONTEXT, QUESTION) == build_prompt_uncached(CONTEXT, QUESTION)
+    uncached = timeit.timeit(lambda: build_prompt_uncached(CONTEXT, QUESTION), number=args.iterations)
+    cached = timeit.timeit(lambda: build_prompt(CONTEXT, QUESTION), number=args.iterations)
+
+    print(f"read + compile per call : {uncached / args.iterations * 1e6:8.1f} us")
+    print(f"PromptRegistry (cached) : {cached / args.iterations * 1e6:8.1f} us")
+    print(f"speed-up                : {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmarks MemmapRetriever against ChromaRetriever on a synthetic collection.
+
+A temporary Chroma collection with random unit vectors is built, exported to the memmap
+layout, and both retrievers answer the same queries. Reports per-query latency percentiles,
+batched search throughput and top-k agreement between the two.
+
+Usage (from the project root):
+    python benchmarks/retriever_benchmark.py --chunks 2000 --dim 1024 --queries 200
+"""
+
+import sys
+import os
+
+# Dynamically add the project root (1 level up from this script) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import argparse
+import tempfile
+import time
+from unittest.mock import patch
+import chromadb
+import numpy as np
+from data_preprocessing.chromadb_manager import sync_collection
+from retrieval.chroma_vectorstore import ChromaRetriever
+from retrieval.memmap_vectorstore import MemmapRetriever, export_from_chroma, vectors_path
+
+COLLECTION = "RETRIEVER_BENCHMARK"
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return f"mean {ms.mean():.3f} ms | p50 {np.percentile(ms, 50):.3f} | p95 {np.percentile(ms, 95):.3f} | p99 {np.percentile(ms, 99):.3f}"
+
+
+def time_queries(retrieve, queries, top_k):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(retrieve(query, top_k=top_k))
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = [f"Synthetic chunk {i}" for i in range(args.chunks)]
+    lookup = dict(zip(chunks, vectors.tolist()))
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).tolist()
+
+    with tempfile.TemporaryDirectory() as chroma_dir:
+        collection = chromadb.PersistentClient(path=chroma_dir).get_or_create_collection(name=COLLECTION)
+        sync_collection(collection, chunks, lambda texts: [lookup[t] for t in texts])
+        export_from_chroma(collection, vectors_path(COLLECTION, chroma_dir))
+
+        with patch("retrieval.chroma_vectorstore.CHROMA_DIR", new=chroma_dir):
+            chroma = ChromaRetriever(collection_name=COLLECTION)
+        memmap = MemmapRetriever(collection_name=COLLECTION, chroma_dir=chroma_dir)
+
+        # Warm both paths (HNSW load, page cache)
+        chroma.retrieve_scored(queries[0], top_k=args.top_k)
+        memmap.retrieve_scored(queries[0], top_k=args.top_k)
+
+        chroma_times, chroma_results = time_queries(chroma.retrieve_scored, queries, args.top_k)
+        memmap_times, memmap_results = time_queries(memmap.retrieve_scored, queries, args.top_k)
+
+        start = time.perf_counter()
+        memmap.search_batch(queries, top_k=args.top_k)
+        batch_seconds = time.perf_counter() - start
+
+    overlap = np.mean([
+        len({r["id"] for r in a} & {r["id"] for r in b}) / args.top_k
+        for a, b in zip(chroma_results, memmap_results)
+    ])
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+    print(f"ChromaRetriever : {percentiles(chroma_times)}")
+    print(f"MemmapRetriever : {percentiles(memmap_times)}")
+    print(f"Memmap batched  : {batch_seconds * 1000:.3f} ms total, {args.queries / batch_seconds:.0f} queries/s")
+    print(f"Speed-up (p50)  : {np.median(chroma_times) / np.median(memmap_times):.1f}x")
+    print(f"Top-k agreement : {overlap:.1%} (HNSW is approximate; memmap is exact)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,10 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 CHROMA_DIR = os.getenv("CHROMA_DIR", "./mtech_chroma_data")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "MTECH_PROSPECTUS")
+SOURCE_NAME = os.getenv("SOURCE_NAME", "MTech Prospectus 2024")
+COLLECTIONS = [name.strip() for name in os.getenv("COLLECTIONS", "").split(",") if name.strip()]
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", 0.05))
+ROUTER_MAX_FANOUT = int(os.getenv("ROUTER_MAX_FANOUT", 3))
 
 TOP_K = int(os.getenv("TOP_K", 5))  
 
@@ -27,4 +31,81 @@ JINA_API = os.getenv("JINA_API")
 
 EXTRACTED_TEXT = os.getenv("EXTRACTED_TEXT")
 CHUNKS = os.getenv("CHUNKS")
-EMBEDDINGS = os.getenv("EMBEDDINGS")
\ No newline at end of file
+EMBEDDINGS = os.getenv("EMBEDDINGS")
+
+WARM_UP_COMPONENTS = os.getenv("WARM_UP_COMPONENTS", "true").lower() == "true"
+
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", 6))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1024))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 1800))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", 5000))
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1000))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 21600))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 1000))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", 2048))
+
+STREAM_SERVER_HOST = os.getenv("STREAM_SERVER_HOST", "0.0.0.0")
+STREAM_SERVER_PORT = int(os.getenv("STREAM_SERVER_PORT", 5056))
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", 4))
+
+TOKENIZER_NAME = os.getenv("TOKENIZER_NAME", "meta-llama/Meta-Llama-3-8B-Instruct")
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "section")
+
+LOCAL_EMBEDDING_MODEL_DIR = os.getenv("LOCAL_EMBEDDING_MODEL_DIR", "./models/bge-small-en-v1.5")
+EMBEDDING_QUANTIZED = os.getenv("EMBEDDING_QUANTIZED", "true").lower() == "true"
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 4))
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", 512))
+
+METADATA_FILTERING_ENABLED = os.getenv("METADATA_FILTERING_ENABLED", "true").lower() == "true"
+FILTER_MIN_RESULTS = int(os.getenv("FILTER_MIN_RESULTS", 2))
+
+HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+RRF_K = int(os.getenv("RRF_K", 60))
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+CONTEXT_MAX_DISTANCE = float(os.getenv("CONTEXT_MAX_DISTANCE", 1.5))
+
+VECTORSTORE_BACKEND = os.getenv("VECTORSTORE_BACKEND", "chroma")
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL_DIR = os.getenv("RERANK_MODEL_DIR", "./models/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 3))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", 150))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", 256))
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", 4))
+RERANK_QUANTIZED = os.getenv("RERANK_QUANTIZED", "true").lower() == "true"
+
+FAQ_SEMANTIC_ENABLED = os.getenv("FAQ_SEMANTIC_ENABLED", "false").lower() == "true"
+FAQ_SEMANTIC_THRESHOLD = float(os.getenv("FAQ_SEMANTIC_THRESHOLD", 0.9))
+
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 30000))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", 256))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 64))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", 20))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 20))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+FALLBACK_CACHE_THRESHOLD = float(os.getenv("FALLBACK_CACHE_THRESHOLD", 0.85))
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 10))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:8000/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY")
+LLM_MOCK_URL = os.getenv("LLM_MOCK_URL", "http://127.0.0.1:8765/v1")
+LLM_SECONDARY_BACKEND = os.getenv("LLM_SECONDARY_BACKEND", "")
+LLM_SECONDARY_MODEL_NAME = os.getenv("LLM_SECONDARY_MODEL_NAME", LLM_MODEL_NAME)
+LLM_SECONDARY_TIMEOUT = float(os.getenv("LLM_SECONDARY_TIMEOUT", 10))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9102))
@@ -1,101 +1,251 @@
-from config import EMBEDDINGS, CHUNKS, CHROMA_DIR
+from config import EMBEDDINGS, CHUNKS, CHROMA_DIR, COLLECTION_NAME, SOURCE_NAME, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+import hashlib
 import json
+import os
 import chromadb
 import logging
+import numpy as np
+from data_preprocessing.embedding_artifact import EmbeddingArtifact, artifact_paths, save_embeddings, \
+    load_json_embeddings
+from retrieval.metadata_detectors import detect_department, detect_course, detect_section, detect_topic_type
 
 logger = logging.getLogger(__name__)
 
-def detect_department(text):
-    """Infer department name from chunk text."""
-    lower = text.lower()
-    if "computer science" in lower or "digital image computing" in lower:
-        return "Computer Science"
-    if "futures studies" in lower or "technology management" in lower:
-        return "Futures Studies"
-    if "optoelectronics" in lower or "electronics and communication" in lower:
-        return "Optoelectronics"
-    return "General"
-
-def detect_course(text):
-    """Infer specific course name from chunk text."""
-    lower = text.lower()
-    if "digital image computing" in lower:
-        return "M.Tech Computer Science with Specialization in Digital Image Computing"
-    if "technology management" in lower:
-        return "M.Tech Technology Management"
-    if "optoelectronics" in lower or "electronics and communication" in lower:
-        return "M.Tech Electronics and Communication (Optoelectronics and Optical Communication)"
-    return "General"
-
-def detect_section(text):
-    """Identify document section like eligibility, fees, etc."""
-    lower = text.lower()
-    keywords = {
-        "Eligibility": ["eligibility"],
-        "Fees": ["fee", "tuition"],
-        "Reservation": ["reservation"],
-        "Important Dates": ["important dates", "notification"],
-        "Application Process": ["application"],
-        "Admission Procedure": ["admission", "how to apply"],
-        "Entrance Exam": ["entrance"],
-        "Rank List": ["rank list"]
-    }
-    for label, keys in keywords.items():
-        if any(k in lower for k in keys):
-            return label
-    return "General"
-
-def detect_topic_type(text):
-    """Classify chunk as instruction vs department-specific."""
-    lower = text.lower()
-    if any(keyword in lower for keyword in [
-        "online application", "entrance", "admit card", "admission memo", "about the university",
-        "important information", "admision activities", "fee payment", "instructions", "apply online",
-        "upload", "hall ticket", "how to apply", "rank list", "reservation"
-    ]):
-        return "Instruction"
-    return "Department-Specific"
-
-try:
-    chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
-    collection = chroma_client.get_or_create_collection(name="MTECH_PROSPECTUS")
-
-    with open(CHUNKS, "r", encoding="utf-8") as f:
-        chunks = [c.strip() for c in f.read().split('***') if c.strip()]
-
-    with open(EMBEDDINGS, "r", encoding="utf-8") as f:
-        embeddings = [e["embedding"] for e in json.load(f)]
-
-    assert len(chunks) == len(embeddings), "Mismatch in chunk and embedding counts!"
-
-    records = []
-    for i, chunk in enumerate(chunks):
-        metadata = {
+MANIFEST_PATH = "chunk_manifest"
+WRITE_BATCH_SIZE = 500
+
+def chunk_id(text):
+    """Content-addressed id: identical chunk text always maps to the same id."""
+    return "chunk_" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def tag_chunk(chunk, index, source=SOURCE_NAME):
+    """
+    Builds the record of one chunk: content-addressed id, text and metadata.
+
+    Args:
+        chunk (str): Chunk text.
+        index (int): Position of the chunk in the document (after de-duplication).
+        source (str): Source document label stored in metadata.
+
+    Returns:
+        Dict: Record with "id", "text" and "metadata".
+    """
+    return {
+        "id": chunk_id(chunk),
+        "text": chunk,
+        "metadata": {
             "department": detect_department(chunk),
             "course": detect_course(chunk),
             "section": detect_section(chunk),
             "topic_type": detect_topic_type(chunk),
-            "source": "MTech Prospectus 2024",
-            "index": i
+            "source": source,
+            "index": index
         }
-        records.append({
-            "id": f"chunk_{i}",
-            "text": chunk,
-            "embedding": embeddings[i],
-            "metadata": metadata
-        })
-
-    collection.add(
-        documents=[r["text"] for r in records],
-        embeddings=[r["embedding"] for r in records],
-        metadatas=[r["metadata"] for r in records],
-        ids=[r["id"] for r in records]
-    )
-
-    with open("chromadb_metadata.json", "w", encoding="utf-8") as f:
-        json.dump([r["metadata"] for r in records], f, indent=2)
-
-    logger.info("Chunks added to ChromaDB with metadata.")
-
-except Exception as e:
-    logger.critical(f"ChromaDB operation failed: {e}")
+    }
+
+
+def build_records(chunks, source=SOURCE_NAME):
+    """
+    Tags chunks with metadata and content-addressed ids, dropping duplicate chunks.
+
+    Args:
+        chunks (List[str]): Chunk texts in document order.
+        source (str): Source document label stored in metadata.
+
+    Returns:
+        List[Dict]: Records with "id", "text" and "metadata".
+    """
+    records, seen = [], set()
+    for chunk in chunks:
+        cid = chunk_id(chunk)
+        if cid in seen:
+            continue
+        seen.add(cid)
+        records.append(tag_chunk(chunk, len(records), source))
+    return records
+
+
+def load_manifest(manifest_path, model_name=EMBEDDING_MODEL_NAME):
+    """
+    Loads the chunk id -> embedding manifest, ignoring it if it was built with another model.
+
+    The manifest is an embedding artifact (see embedding_artifact.py) whose vectors stay
+    memory-mapped; a legacy JSON manifest (<base>.json) is still read once, so migrating does
+    not re-embed the corpus.
+
+    Returns:
+        Dict[str, array-like]: Known embeddings by chunk id.
+    """
+    if not manifest_path:
+        return {}
+    matrix_path, sidecar_path, _ = artifact_paths(manifest_path)
+    legacy_path = matrix_path[:-len(".npy")] + ".json"
+    if os.path.exists(sidecar_path):
+        artifact = EmbeddingArtifact.load(sidecar_path)
+        stored_model, embeddings = artifact.model_name, artifact.as_dict()
+    elif os.path.exists(legacy_path):
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        stored_model, embeddings = manifest.get("model_name"), manifest.get("embeddings", {})
+    else:
+        return {}
+    if stored_model != model_name:
+        logger.warning("Manifest was built with a different embedding model. Re-embedding all chunks.")
+        return {}
+    return embeddings
+
+
+def save_manifest(manifest_path, embeddings, model_name=EMBEDDING_MODEL_NAME):
+    """Writes the chunk id -> embedding manifest atomically, as a float32 embedding artifact."""
+    ids = list(embeddings)
+    vectors = [embeddings[cid] for cid in ids]
+    save_embeddings(manifest_path, ids, vectors if ids else np.zeros((0, 0), dtype=np.float32), model_name)
+
+
+def sync_collection(collection, chunks, embed_fn, manifest_path=None, source=SOURCE_NAME,
+                    model_name=EMBEDDING_MODEL_NAME):
+    """
+    Brings a Chroma collection in line with the given chunks, touching only what changed.
+
+    New chunks are embedded (unless the manifest already has their vector) and upserted,
+    chunks whose metadata changed (e.g. their position) get a metadata-only update, and
+    chunks no longer present are deleted.
+
+    Args:
+        collection: Chroma collection.
+        chunks (List[str]): Current chunk texts in document order.
+        embed_fn (Callable[[List[str]], List[List[float]]]): Embeds a list of texts.
+        manifest_path (str): Optional manifest of known embeddings by chunk id.
+        source (str): Source document label stored in metadata.
+        model_name (str): Embedding model name recorded in the manifest.
+
+    Returns:
+        Dict[str, int]: Counts of "added", "updated", "deleted", "unchanged" and "embedded".
+    """
+    records = build_records(chunks, source)
+    manifest = load_manifest(manifest_path, model_name)
+
+    to_embed = [r for r in records if r["id"] not in manifest]
+    if to_embed:
+        logger.info(f"Embedding {len(to_embed)} new chunks...")
+        vectors = embed_fn([r["text"] for r in to_embed])
+        assert len(vectors) == len(to_embed), "Mismatch in chunk and embedding counts!"
+        for record, vector in zip(to_embed, vectors):
+            manifest[record["id"]] = vector
+
+    existing = collection.get(include=["metadatas"])
+    existing_meta = dict(zip(existing["ids"], existing["metadatas"]))
+    wanted = {r["id"] for r in records}
+
+    # Re-embedded chunks (e.g. after switching embedding backend) are rewritten even if already stored
+    embedded_ids = {r["id"] for r in to_embed}
+    new = [r for r in records if r["id"] not in existing_meta or r["id"] in embedded_ids]
+    changed = [r for r in records if r["id"] in existing_meta and r["id"] not in embedded_ids
+               and existing_meta[r["id"]] != r["metadata"]]
+    removed = [cid for cid in existing_meta if cid not in wanted]
+
+    for i in range(0, len(new), WRITE_BATCH_SIZE):
+        batch = new[i:i + WRITE_BATCH_SIZE]
+        collection.upsert(
+            ids=[r["id"] for r in batch],
+            documents=[r["text"] for r in batch],
+            embeddings=[manifest[r["id"]] for r in batch],
+            metadatas=[r["metadata"] for r in batch]
+        )
+    for i in range(0, len(changed), WRITE_BATCH_SIZE):
+        batch = changed[i:i + WRITE_BATCH_SIZE]
+        collection.update(ids=[r["id"] for r in batch], metadatas=[r["metadata"] for r in batch])
+    for i in range(0, len(removed), WRITE_BATCH_SIZE):
+        collection.delete(ids=removed[i:i + WRITE_BATCH_SIZE])
+
+    if manifest_path:
+        save_manifest(manifest_path, {r["id"]: manifest[r["id"]] for r in records}, model_name)
+
+    stats = {
+        "added": len(new),
+        "updated": len(changed),
+        "deleted": len(removed),
+        "unchanged": len(records) - len(new) - len(changed),
+        "embedded": len(to_embed)
+    }
+    logger.info(f"Collection sync complete: {stats}")
+    return stats
+
+
+def seed_manifest_from_embeddings(manifest_path, chunks, embeddings_path, model_name=EMBEDDING_MODEL_NAME):
+    """
+    Seeds the manifest from the embedding generator's output (an embedding artifact, or a
+    legacy positional embeddings.json) so a fresh manifest does not re-embed the corpus.
+    """
+    if not embeddings_path or load_manifest(manifest_path, model_name):
+        return
+    sidecar_path = artifact_paths(embeddings_path)[1]
+    if os.path.exists(sidecar_path):
+        artifact = EmbeddingArtifact.load(sidecar_path)
+        if artifact.model_name != model_name or not artifact.matches(chunks):
+            logger.warning("Embedding artifact does not match the chunks or model; not seeding the manifest.")
+            return
+        embeddings = artifact.vectors()
+    elif embeddings_path.endswith(".json") and os.path.exists(embeddings_path):
+        embeddings = load_json_embeddings(embeddings_path)
+        if len(embeddings) != len(chunks):
+            logger.warning("Legacy embeddings do not match the chunks; not seeding the manifest.")
+            return
+    else:
+        return
+    save_manifest(manifest_path, {chunk_id(c): e for c, e in zip(chunks, embeddings)}, model_name)
+    logger.info(f"Seeded manifest from '{embeddings_path}'.")
+
+
+if __name__ == "__main__":
+    try:
+        from data_preprocessing.embedding_generator import generate_embeddings
+
+        chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
+        collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
+
+        with open(CHUNKS, "r", encoding="utf-8") as f:
+            chunks = [c.strip() for c in f.read().split('***') if c.strip()]
+
+        if EMBEDDING_BACKEND == "jina":
+            seed_manifest_from_embeddings(MANIFEST_PATH, chunks, EMBEDDINGS)
+            embed_fn = lambda texts: [e["embedding"] for e in generate_embeddings(texts)]
+            model_name = EMBEDDING_MODEL_NAME
+        else:
+            # Local backends: the collection must hold vectors from the model that serves queries
+            from retrieval.embedding_backends import create_backend
+            backend = create_backend(EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME)
+            embed_fn = backend.embed_documents
+            model_name = backend.cache_namespace
+
+        sync_collection(
+            collection,
+            chunks,
+            embed_fn=embed_fn,
+            manifest_path=MANIFEST_PATH,
+            model_name=model_name
+        )
+
+        records = build_records(chunks)
+        with open("chromadb_metadata.json", "w", encoding="utf-8") as f:
+            json.dump([r["metadata"] for r in records], f, indent=2)
+
+        # BM25 index for hybrid retrieval, stored next to the collection
+        from retrieval.lexical_index import LexicalIndex, lexical_index_path
+        LexicalIndex.build(records).save(lexical_index_path(COLLECTION_NAME))
+
+        # Flat float32 matrix for the memmap retriever (VECTORSTORE_BACKEND=memmap)
+        from retrieval.memmap_vectorstore import export_from_chroma, vectors_path
+        export_from_chroma(collection, vectors_path(COLLECTION_NAME))
+
+        # Centroid and source for routing queries across collections
+        from retrieval.collection_router import CollectionRegistry
+        registry = CollectionRegistry.load()
+        registry.register(COLLECTION_NAME, collection, source=SOURCE_NAME, model_name=model_name)
+        registry.save()
+
+        logger.info("Chunks synced to ChromaDB with metadata.")
+
+    except Exception as e:
+        logger.critical(f"ChromaDB operation failed: {e}")
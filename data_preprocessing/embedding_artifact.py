@@ -0,0 +1,257 @@
+"""
+This module provides a compact, versioned on-disk format for chunk embeddings, replacing
+JSON arrays of float lists (about 10x the size of the raw floats and slow to parse).
+
+An artifact is a pair of files sharing a base path:
+
+    <base>.npy          (count, dim) matrix in NumPy's .npy format: float32, float16 or int8
+    <base>.meta.json    format version, model name, dtype, dim, count, chunk ids, text hashes
+                        and, for int8, the path of the per-row scales (<base>.scales.npy)
+
+The matrix is opened with numpy.load(mmap_mode="r"), so loading only maps the file: rows are
+paged in on first access and the page cache is shared between processes. float32 artifacts
+are served zero-copy; float16 and int8 rows are converted to float32 only when read through
+EmbeddingArtifact.vectors() / get().
+
+int8 uses symmetric per-row quantization (scale = max |x| / 127), which keeps the cosine
+similarity to the float32 vector above 0.999 for typical embeddings at a quarter of the size.
+
+Usage (convert a legacy embeddings.json):
+    python -m data_preprocessing.embedding_artifact embeddings.json embeddings --chunks Chunks.txt --dtype float16
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+from config import EMBEDDING_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DTYPES = ("float32", "float16", "int8")
+
+
+def artifact_paths(path: str) -> tuple:
+    """
+    Returns the (matrix, sidecar, scales) paths of an artifact. `path` may be the base path or
+    either file of the artifact.
+    """
+    for suffix in (".meta.json", ".npy", ".json"):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            break
+    return f"{path}.npy", f"{path}.meta.json", f"{path}.scales.npy"
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a chunk text; stored per row so consumers can check vectors match their chunks."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def quantize(matrix: np.ndarray, dtype: str = "float32") -> tuple:
+    """
+    Converts a float matrix to the stored dtype.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: Stored matrix and, for int8, per-row float32 scales.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if len(matrix) else np.zeros(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        return np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8), scales
+    raise ValueError(f"Unsupported embedding dtype '{dtype}'. Choose from {DTYPES}.")
+
+
+def _save_npy(path: str, array: np.ndarray):
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+def save_embeddings(path: str, ids: list, embeddings, model_name: str = EMBEDDING_MODEL_NAME, texts: list = None,
+                    dtype: str = "float32") -> str:
+    """
+    Writes an embedding artifact atomically (matrix first, sidecar last).
+
+    Args:
+        path (str): Base path (or the .npy / .meta.json path).
+        ids (List[str]): Chunk id of every row.
+        embeddings (array-like): (count, dim) vectors in row order.
+        model_name (str): Embedding model that produced the vectors.
+        texts (List[str]): Chunk texts, hashed into the sidecar (optional).
+        dtype (str): "float32", "float16" or "int8".
+
+    Returns:
+        str: Path of the sidecar.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(ids), -1)
+    if len(ids) != len(matrix):
+        raise ValueError(f"Got {len(ids)} ids for {len(matrix)} embeddings.")
+    if texts is not None and len(texts) != len(ids):
+        raise ValueError(f"Got {len(texts)} texts for {len(ids)} ids.")
+
+    matrix_path, sidecar_path, scales_path = artifact_paths(path)
+    os.makedirs(os.path.dirname(matrix_path) or ".", exist_ok=True)
+    stored, scales = quantize(matrix, dtype)
+    _save_npy(matrix_path, stored)
+    if scales is not None:
+        _save_npy(scales_path, scales)
+
+    sidecar = {
+        "format_version": FORMAT_VERSION,
+        "model_name": model_name,
+        "dtype": dtype,
+        "dim": int(matrix.shape[1]),
+        "count": len(ids),
+        "ids": list(ids),
+        "hashes": [text_hash(t) for t in texts] if texts is not None else None,
+    }
+    with open(sidecar_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, separators=(",", ":"))
+    os.replace(sidecar_path + ".tmp", sidecar_path)
+    logger.info(f"Saved {len(ids)} {dtype} embeddings of dimension {sidecar['dim']} to '{matrix_path}'.")
+    return sidecar_path
+
+
+class EmbeddingArtifact:
+    """
+    A loaded embedding artifact; the matrix stays memory-mapped.
+
+    Attributes:
+        ids (List[str]): Chunk id per row.
+        hashes (Optional[List[str]]): SHA-256 of each chunk text, if recorded.
+        model_name (str): Embedding model.
+        dtype (str): Stored dtype.
+        matrix (np.ndarray): Stored (count, dim) matrix, memory-mapped.
+
+    Methods:
+        load(path, mmap) -> EmbeddingArtifact
+        vectors(rows) -> np.ndarray
+        get(chunk_id) -> Optional[np.ndarray]
+        as_dict() -> Dict[str, np.ndarray]
+        matches(texts) -> bool
+    """
+
+    def __init__(self, ids, matrix, model_name, dtype="float32", hashes=None, scales=None):
+        self.ids = ids
+        self.matrix = matrix
+        self.model_name = model_name
+        self.dtype = dtype
+        self.hashes = hashes
+        self.scales = scales
+        self._rows = None
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "EmbeddingArtifact":
+        """
+        Opens an artifact.
+
+        Args:
+            path (str): Base path (or the .npy / .meta.json path).
+            mmap (bool): Memory-map the matrix (default) instead of reading it into memory.
+
+        Raises:
+            FileNotFoundError: The artifact does not exist.
+            ValueError: Unsupported format version or inconsistent files.
+        """
+        matrix_path, sidecar_path, scales_path = artifact_paths(path)
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        version = sidecar.get("format_version")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding artifact version {version} in '{sidecar_path}'.")
+
+        mode = "r" if mmap else None
+        matrix = np.load(matrix_path, mmap_mode=mode) if sidecar["count"] else np.zeros((0, sidecar["dim"]), np.float32)
+        if matrix.shape != (sidecar["count"], sidecar["dim"]) or matrix.dtype != np.dtype(sidecar["dtype"]):
+            raise ValueError(f"Embedding artifact '{matrix_path}' does not match its sidecar.")
+        scales = np.load(scales_path, mmap_mode=mode) if sidecar["dtype"] == "int8" and sidecar["count"] else None
+        return cls(sidecar["ids"], matrix, sidecar["model_name"], sidecar["dtype"], sidecar.get("hashes"), scales)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def vectors(self, rows=None) -> np.ndarray:
+        """
+        float32 vectors of the given rows (all rows by default). For float32 artifacts this is
+        a view of the memory map, not a copy.
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if self.dtype == "float32":
+            return matrix
+        if self.dtype == "int8":
+            scales = self.scales if rows is None else self.scales[rows]
+            return matrix.astype(np.float32) * np.asarray(scales)[..., None]
+        return matrix.astype(np.float32)
+
+    def row_of(self, chunk_id: str):
+        if self._rows is None:
+            self._rows = {cid: row for row, cid in enumerate(self.ids)}
+        return self._rows.get(chunk_id)
+
+    def get(self, chunk_id: str):
+        """float32 vector of a chunk id, or None."""
+        row = self.row_of(chunk_id)
+        return None if row is None else self.vectors(row)
+
+    def as_dict(self) -> dict:
+        """Chunk id -> float32 vector (rows of the memory map for float32 artifacts)."""
+        return {cid: self.vectors(row) for row, cid in enumerate(self.ids)}
+
+    def matches(self, texts: list) -> bool:
+        """Whether the artifact holds exactly these chunk texts, in this order."""
+        if self.hashes is None or len(texts) != len(self.hashes):
+            return False
+        return all(text_hash(t) == h for t, h in zip(texts, self.hashes))
+
+
+def load_json_embeddings(path: str) -> np.ndarray:
+    """Reads a legacy embeddings.json ([{"index", "embedding", ...}, ...]) as a float32 matrix."""
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    records.sort(key=lambda e: e.get("index", 0))
+    return np.asarray([e["embedding"] for e in records], dtype=np.float32)
+
+
+def convert_json(json_path: str, path: str, chunks: list, model_name: str = EMBEDDING_MODEL_NAME,
+                 dtype: str = "float32") -> str:
+    """Converts a legacy embeddings.json for the given chunks into an artifact."""
+    from data_preprocessing.chromadb_manager import chunk_id
+
+    matrix = load_json_embeddings(json_path)
+    if len(matrix) != len(chunks):
+        raise ValueError(f"'{json_path}' has {len(matrix)} embeddings for {len(chunks)} chunks.")
+    return save_embeddings(path, [chunk_id(c) for c in chunks], matrix, model_name, chunks, dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a legacy embeddings.json into a binary embedding artifact.")
+    parser.add_argument("json_path")
+    parser.add_argument("path", help="Artifact base path (writes <path>.npy and <path>.meta.json).")
+    parser.add_argument("--chunks", required=True, help="***-delimited chunk file the embeddings belong to.")
+    parser.add_argument("--model-name", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--dtype", choices=DTYPES, default="float32")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.chunks, "r", encoding="utf-8") as f:
+        chunks = [c.strip() for c in f.read().split("***") if c.strip()]
+    convert_json(args.json_path, args.path, chunks, args.model_name, args.dtype)
+
+
+if __name__ == "__main__":
+    main()
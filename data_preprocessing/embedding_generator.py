@@ -1,46 +1,200 @@
-from config import JINA_URL,JINA_API,CHUNKS
+from config import JINA_URL, JINA_API, CHUNKS, EMBEDDING_MODEL_NAME, EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_WORKERS
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
 import logging
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-def generate_embeddings(chunks):
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _batch_hash(batch):
+    """Fingerprint of a batch's texts, so a checkpoint is never reused for different chunks."""
+    digest = hashlib.sha256()
+    for text in batch:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _load_checkpoint(checkpoint_path):
+    """
+    Reads completed batches from a JSON-lines checkpoint file.
+
+    Returns:
+        Dict[int, Dict]: Batch number -> {"hash": ..., "data": [...]}.
+    """
+    done = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                done[record["batch"]] = record
+            except (ValueError, KeyError):
+                # A torn last line from an interrupted run; that batch is simply redone
+                continue
+    return done
+
+
+def create_session(pool_size=EMBEDDING_MAX_WORKERS):
     """
-    Sends text chunks to Jina AI embedding API.
+    Creates a requests session whose connection pool matches the number of workers.
 
     Args:
-        chunks (List[str]): List of text chunks.
+        pool_size (int): Maximum number of concurrent connections.
 
     Returns:
-        List[Dict]: Embeddings response.
+        requests.Session: Session reusing TCP/TLS connections across batches.
     """
-    data = {
-        "input": chunks,
-        "model": "jina-embeddings-v3"
-    }
-    headers = {
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
         "Authorization": f"Bearer {JINA_API}",
         "Content-Type": "application/json"
+    })
+    return session
+
+
+def embed_batch(session, batch, url=JINA_URL, model_name=EMBEDDING_MODEL_NAME, retries=3, backoff=1.0, timeout=60):
+    """
+    Sends one batch of chunks to the Jina AI embedding API, retrying transient failures.
+
+    Args:
+        session (requests.Session): Pooled HTTP session.
+        batch (List[str]): Text chunks.
+        url (str): Embeddings endpoint.
+        model_name (str): Embedding model name.
+        retries (int): Attempts for retryable errors (HTTP 429/5xx, connection errors).
+        backoff (float): Base delay in seconds; doubles after every failed attempt.
+        timeout (float): Per-request timeout in seconds.
+
+    Returns:
+        List[Dict]: Embedding records for the batch, in input order.
+    """
+    data = {
+        "input": batch,
+        "model": model_name
     }
-    response = requests.post(JINA_URL, headers=headers, json=data)
+    for attempt in range(retries):
+        try:
+            response = session.post(url, json=data, timeout=timeout)
+        except requests.RequestException as e:
+            error = f"Request failed: {e}"
+        else:
+            if response.status_code == 200:
+                return sorted(response.json().get("data", []), key=lambda item: item.get("index", 0))
+            if response.status_code not in RETRYABLE_STATUS:
+                raise ValueError(f"API Error {response.status_code}: {response.text}")
+            error = f"API Error {response.status_code}: {response.text}"
+
+        if attempt < retries - 1:
+            wait = backoff * (2 ** attempt)
+            logger.warning(f"[Attempt {attempt + 1}] {error}. Retrying in {wait:.1f}s.")
+            time.sleep(wait)
+    raise ValueError(f"Embedding batch failed after {retries} attempts: {error}")
+
+
+def generate_embeddings(chunks, batch_size=EMBEDDING_BATCH_SIZE, max_workers=EMBEDDING_MAX_WORKERS,
+                        checkpoint_path=None, session=None, url=JINA_URL, model_name=EMBEDDING_MODEL_NAME,
+                        retries=3, backoff=1.0):
+    """
+    Embeds text chunks with the Jina AI API in batches, with bounded concurrency.
+
+    Finished batches are appended to a JSON-lines checkpoint as soon as they complete, so an
+    interrupted run resumes with only the missing batches.
+
+    Args:
+        chunks (List[str]): List of text chunks.
+        batch_size (int): Chunks per API request.
+        max_workers (int): Maximum number of requests in flight.
+        checkpoint_path (str): Optional checkpoint file for resumable runs.
+        session (requests.Session): Optional pooled session; one is created if omitted.
+        url (str): Embeddings endpoint.
+        model_name (str): Embedding model name.
+        retries (int): Attempts per batch for retryable errors.
+        backoff (float): Base retry delay in seconds.
+
+    Returns:
+        List[Dict]: One {"index", "embedding", ...} record per chunk, in chunk order.
+    """
+    batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+    done = _load_checkpoint(checkpoint_path)
+    results = {}
+    for number, batch in enumerate(batches):
+        record = done.get(number)
+        if record and record.get("hash") == _batch_hash(batch):
+            results[number] = record["data"]
+    if results:
+        logger.info(f"Resuming: {len(results)} of {len(batches)} batches already embedded.")
+
+    pending = [n for n in range(len(batches)) if n not in results]
+    session = session or create_session(max_workers)
+    checkpoint_lock = threading.Lock()
+    checkpoint_file = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(embed_batch, session, batches[n], url, model_name, retries, backoff): n
+                for n in pending
+            }
+            for future in as_completed(futures):
+                number = futures[future]
+                data = future.result()
+                if len(data) != len(batches[number]):
+                    raise ValueError(f"Batch {number}: expected {len(batches[number])} embeddings, got {len(data)}")
+                results[number] = data
+                if checkpoint_file:
+                    with checkpoint_lock:
+                        checkpoint_file.write(json.dumps({"batch": number, "hash": _batch_hash(batches[number]),
+                                                          "data": data}) + "\n")
+                        checkpoint_file.flush()
+                logger.info(f"Embedded batch {number + 1}/{len(batches)}.")
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    embeddings = []
+    for number in range(len(batches)):
+        for offset, item in enumerate(results[number]):
+            item = dict(item)
+            item["index"] = number * batch_size + offset
+            embeddings.append(item)
+    return embeddings
+
 
-    if response.status_code == 200:
-        return response.json().get("data", [])
-    else:
-        raise ValueError(f"API Error {response.status_code}: {response.text}")
+if __name__ == "__main__":
+    import argparse
+    from data_preprocessing.chromadb_manager import chunk_id
+    from data_preprocessing.embedding_artifact import DTYPES, save_embeddings
 
-try:
-    with open(CHUNKS, "r", encoding="utf-8") as f:
-        content = f.read()
-        chunks = [chunk.strip() for chunk in content.split('***') if chunk.strip()]
+    parser = argparse.ArgumentParser(description="Embed the chunk file into a binary embedding artifact.")
+    parser.add_argument("--output", default="embeddings", help="Artifact base path (<output>.npy, <output>.meta.json).")
+    parser.add_argument("--dtype", choices=DTYPES, default="float32")
+    args = parser.parse_args()
+    try:
+        with open(CHUNKS, "r", encoding="utf-8") as f:
+            content = f.read()
+            chunks = [chunk.strip() for chunk in content.split('***') if chunk.strip()]
 
-    embeddings = generate_embeddings(chunks)
+        checkpoint = "embeddings.checkpoint.jsonl"
+        embeddings = generate_embeddings(chunks, checkpoint_path=checkpoint)
 
-    with open("embeddings.json", "w", encoding="utf-8") as f:
-        json.dump(embeddings, f, indent=2)
+        save_embeddings(args.output, [chunk_id(c) for c in chunks], [e["embedding"] for e in embeddings],
+                        EMBEDDING_MODEL_NAME, chunks, args.dtype)
+        os.remove(checkpoint)
 
-    logger.info("Embeddings saved to 'embeddings.json'.")
+        logger.info(f"Embeddings saved to '{args.output}.npy'.")
 
-except Exception as e:
-    logger.critical(f"Embedding generation failed: {e}")
\ No newline at end of file
+    except Exception as e:
+        logger.critical(f"Embedding generation failed: {e}")
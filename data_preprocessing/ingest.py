@@ -0,0 +1,524 @@
+"""
+Single-command ingestion: extract -> chunk -> tag -> embed -> index.
+
+    python -m data_preprocessing.ingest ["PROSPECTUS.pdf" ...] [--collection NAME] [--strategy section]
+
+The stages run as a streaming pipeline instead of four scripts handing files to each other.
+Every stage runs in its own thread(s) and is connected to the next one by a small bounded
+queue, so the stages overlap (batch N is embedded while batch N+1 is being chunked and
+batch N-1 is written to Chroma) and a slow stage throttles the ones before it instead of
+letting work pile up in memory (back-pressure). Pages are extracted by the process pool of
+pdf_extractor.iter_pages(); text is cut into blocks at numbered section headings as soon as
+a section is complete, so at any time only a few pages, sections and batches are in flight.
+
+The collection is synced incrementally like chromadb_manager.sync_collection(): ids are
+content-addressed, chunks already stored with the same embedding model are not re-embedded,
+metadata-only changes are updated in place and chunks that are no longer produced are
+deleted. The embedding model is recorded in the collection metadata; when it changes, every
+chunk is re-embedded. Afterwards the chunk manifest, the BM25 index and the memmap export are
+rebuilt from the collection.
+
+At the end a per-stage report is logged: items in / out and how long each stage was busy,
+starved (waiting for input) and blocked (waiting for the next stage to take its output).
+The stage that is busy most of the wall time is the bottleneck.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import chromadb
+from config import PDF, CHROMA_DIR, COLLECTION_NAME, CHUNKING_STRATEGY, EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, \
+    EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_WORKERS
+from data_preprocessing.chromadb_manager import SOURCE_NAME, WRITE_BATCH_SIZE, MANIFEST_PATH, chunk_id, tag_chunk, \
+    save_manifest
+from data_preprocessing.pdf_extractor import iter_pages
+from data_preprocessing.text_chunker import chunk_text, get_tokenizer
+from retrieval.collection_router import CollectionRegistry, registry_path
+
+logger = logging.getLogger(__name__)
+
+MODEL_METADATA_KEY = "embedding_model"
+HEADING_PATTERN = re.compile(r"\n\d+\.\s[A-Z]")  # same boundary as text_chunker.split_sections()
+MAX_BLOCK_CHARS = 200_000
+TEXT_PAGE_CHARS = 4000
+
+_END = object()
+
+
+class PipelineCancelled(Exception):
+    """Raised inside stage threads when another stage failed or the consumer stopped."""
+
+
+class Stage:
+    """
+    One pipeline stage.
+
+    Args:
+        name (str): Name shown in the report.
+        fn (Callable[[Any], Iterable]): Processes one input item and returns its outputs
+            (any number, including none, so stages can split, filter or batch).
+        flush (Callable[[], Iterable]): Returns the outputs still buffered when the input ends.
+        workers (int): Threads running fn concurrently (output order is then not preserved).
+    """
+
+    def __init__(self, name: str, fn, flush=None, workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.flush = flush
+        self.workers = workers
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> dict:
+        return {"stage": self.name, "workers": self.workers, "items_in": self.items_in, "items_out": self.items_out,
+                "busy_s": round(self.busy, 3), "starved_s": round(self.starved, 3), "blocked_s": round(self.blocked, 3)}
+
+
+class Pipeline:
+    """
+    Runs a source iterable through stages, each in its own thread(s), connected by bounded
+    queues. Iterating the pipeline yields the outputs of the last stage; the first error
+    raised by any stage is re-raised to the caller and stops all other stages.
+
+    Attributes:
+        stats (List[StageStats]): Per-stage counters, the source first.
+        wall (float): Seconds from the first next() to the end of the input.
+    """
+
+    def __init__(self, source, stages: list, queue_size: int = 4, source_name: str = "extract"):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(source_name)] + [StageStats(s.name, s.workers) for s in stages]
+        self.wall = 0.0
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, q, item, stats):
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineCancelled()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.add(blocked=time.perf_counter() - started)
+
+    def _get(self, q, stats):
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineCancelled()
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        stats.add(starved=time.perf_counter() - started)
+        return item
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _run_source(self, out_q, stats):
+        try:
+            iterator = iter(self.source)
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stats.add(busy=time.perf_counter() - started)
+                stats.add(items_out=1)
+                self._put(out_q, item, stats)
+            self._put(out_q, _END, stats)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _run_stage(self, stage, in_q, out_q, stats, remaining):
+        try:
+            while True:
+                item = self._get(in_q, stats)
+                if item is _END:
+                    break
+                stats.add(items_in=1)
+                started = time.perf_counter()
+                outputs = list(stage.fn(item))
+                stats.add(busy=time.perf_counter() - started)
+                for output in outputs:
+                    stats.add(items_out=1)
+                    self._put(out_q, output, stats)
+
+            # Let sibling workers see the end too; the last one flushes and passes it on
+            self._put(in_q, _END, stats)
+            with stats._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                started = time.perf_counter()
+                outputs = list(stage.flush()) if stage.flush else []
+                stats.add(busy=time.perf_counter() - started)
+                for output in outputs:
+                    stats.add(items_out=1)
+                    self._put(out_q, output, stats)
+                self._put(out_q, _END, stats)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def __iter__(self):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0], self.stats[0]), daemon=True)]
+        for i, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_stage, args=(stage, queues[i], queues[i + 1], self.stats[i + 1], remaining),
+                    daemon=True
+                ))
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                try:
+                    item = queues[-1].get(timeout=0.1)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.wall = time.perf_counter() - started
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def report(self) -> str:
+        lines = [f"{'stage':<10}{'workers':>8}{'in':>8}{'out':>8}{'busy s':>9}{'starved s':>11}{'blocked s':>11}"]
+        for s in self.stats:
+            lines.append(f"{s.name:<10}{s.workers:>8}{s.items_in:>8}{s.items_out:>8}{s.busy:>9.2f}"
+                         f"{s.starved:>11.2f}{s.blocked:>11.2f}")
+        lines.append(f"wall time: {self.wall:.2f} s")
+        return "\n".join(lines)
+
+
+def iter_text_pages(path: str, page_chars: int = TEXT_PAGE_CHARS):
+    """
+    Reads an already extracted text file as page-sized pieces (split at blank lines), so
+    text files can be ingested through the same pipeline as PDFs.
+    """
+    page, parts, size = 1, [], 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts.append(line)
+            size += len(line)
+            if size >= page_chars and not line.strip():
+                yield {"source": os.path.basename(path), "page": page, "text": "".join(parts), "tables": []}
+                page, parts, size = page + 1, [], 0
+    if parts:
+        yield {"source": os.path.basename(path), "page": page, "text": "".join(parts), "tables": []}
+
+
+def iter_documents(paths: list, workers: int = None):
+    """Pages of the given PDFs (extracted in parallel) and text files, in order."""
+    pdfs = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            pdfs.append(path)
+            continue
+        if pdfs:
+            yield from iter_pages(pdfs, workers)
+            pdfs = []
+        yield from iter_text_pages(path)
+    if pdfs:
+        yield from iter_pages(pdfs, workers)
+
+
+class SectionSplitter:
+    """
+    Turns a stream of pages into text blocks that end at a numbered section heading, so no
+    section is split across blocks. Blocks grow to at most max_chars when no heading comes.
+    """
+
+    def __init__(self, max_chars: int = MAX_BLOCK_CHARS):
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, page: dict) -> list:
+        if page["text"]:
+            self.buffer += f"\n\n{page['text']}"
+        text = re.sub(r"\n{2,}", "\n", self.buffer)
+        headings = [m.start() for m in HEADING_PATTERN.finditer(text) if m.start() > 0]
+        if headings:
+            cut = headings[-1]
+        elif len(text) > self.max_chars:
+            cut = text.rfind("\n", 0, self.max_chars)
+            cut = cut if cut > 0 else self.max_chars
+        else:
+            return []
+        self.buffer = text[cut:]
+        return [text[:cut]] if text[:cut].strip() else []
+
+    def flush(self) -> list:
+        text, self.buffer = self.buffer, ""
+        return [text] if text.strip() else []
+
+
+class RecordTagger:
+    """Tags chunks in document order, dropping duplicates; remembers every id it produced."""
+
+    def __init__(self, source: str = SOURCE_NAME):
+        self.source = source
+        self.ids = set()
+
+    def feed(self, chunk: str) -> list:
+        cid = chunk_id(chunk)
+        if cid in self.ids:
+            return []
+        self.ids.add(cid)
+        return [tag_chunk(chunk, len(self.ids) - 1, self.source)]
+
+
+class Batcher:
+    def __init__(self, size: int):
+        self.size = size
+        self.items = []
+
+    def feed(self, item) -> list:
+        self.items.append(item)
+        if len(self.items) < self.size:
+            return []
+        batch, self.items = self.items, []
+        return [batch]
+
+    def flush(self) -> list:
+        batch, self.items = self.items, []
+        return [batch] if batch else []
+
+
+def default_embed_fn(workers: int = EMBEDDING_MAX_WORKERS):
+    """
+    Embedding function of the configured backend and the model name it records.
+
+    Returns:
+        Tuple[Callable[[List[str]], List[List[float]]], str]
+    """
+    if (EMBEDDING_BACKEND or "jina").lower() == "jina":
+        from data_preprocessing.embedding_generator import create_session, embed_batch
+        session = create_session(workers)
+        return (lambda texts: [e["embedding"] for e in embed_batch(session, texts)]), EMBEDDING_MODEL_NAME
+    # Local backends: the collection must hold vectors from the model that serves queries
+    from retrieval.embedding_backends import create_backend
+    backend = create_backend(EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME)
+    return backend.embed_documents, backend.cache_namespace
+
+
+def ingest(paths: list, collection, embed_fn, model_name: str = EMBEDDING_MODEL_NAME, encoder=None,
+           strategy: str = CHUNKING_STRATEGY, source: str = SOURCE_NAME, batch_size: int = EMBEDDING_BATCH_SIZE,
+           embed_workers: int = EMBEDDING_MAX_WORKERS, extract_workers: int = None, queue_size: int = 4,
+           chroma_dir: str = None, registry_info: dict = None, manifest_path: str = None, **chunk_kwargs) -> dict:
+    """
+    Ingests documents into a Chroma collection through the streaming pipeline.
+
+    Args:
+        paths (List[str]): PDFs and/or extracted text files, in document order.
+        collection: Chroma collection.
+        embed_fn (Callable[[List[str]], List[List[float]]]): Embeds one batch of texts.
+        model_name (str): Embedding model recorded in the collection metadata.
+        encoder: Tokenizer for chunking (default: text_chunker.get_tokenizer()).
+        strategy (str): Chunking strategy (see text_chunker.CHUNKING_STRATEGIES).
+        source (str): Source document label stored in metadata.
+        batch_size (int): Chunks per embedding call and Chroma write.
+        embed_workers (int): Embedding calls in flight.
+        extract_workers (int): PDF extraction processes (default: CPU count).
+        queue_size (int): Items buffered between two stages.
+        chroma_dir (str): When given, the BM25 index and memmap export are rebuilt there and the
+            collection is (re)registered for query routing (see retrieval/collection_router.py).
+        registry_info (dict): Extra registry fields, e.g. description and routing keywords.
+        manifest_path (str): When given, the chunk id -> embedding manifest (see
+            chromadb_manager.save_manifest()) is rewritten from the collection.
+        **chunk_kwargs: Passed to the chunking strategy (max_tokens, overlap, ...).
+
+    Returns:
+        Dict: Counts of "chunks", "added", "updated", "deleted", "unchanged" and "embedded",
+            plus the per-stage "stages" report and "wall_s".
+    """
+    encoder = encoder or get_tokenizer()
+    reembed_all = (collection.metadata or {}).get(MODEL_METADATA_KEY) != model_name
+    if reembed_all and collection.count():
+        logger.warning("Collection was embedded with a different model. Re-embedding all chunks.")
+
+    splitter = SectionSplitter()
+    tagger = RecordTagger(source)
+    batcher = Batcher(batch_size)
+
+    def chunk(block):
+        return [c.strip() for c in chunk_text(block, encoder, strategy, **chunk_kwargs) if c.strip()]
+
+    def embed(batch):
+        existing = {}
+        if not reembed_all:
+            stored = collection.get(ids=[r["id"] for r in batch], include=["metadatas"])
+            existing = dict(zip(stored["ids"], stored["metadatas"]))
+        new = [r for r in batch if r["id"] not in existing]
+        if new:
+            vectors = embed_fn([r["text"] for r in new])
+            if len(vectors) != len(new):
+                raise ValueError(f"Expected {len(new)} embeddings, got {len(vectors)}")
+            for record, vector in zip(new, vectors):
+                record["embedding"] = vector
+        changed = [r for r in batch if r["id"] in existing and existing[r["id"]] != r["metadata"]]
+        return [{"new": new, "changed": changed, "unchanged": len(batch) - len(new) - len(changed)}]
+
+    def index(work):
+        if work["new"]:
+            collection.upsert(
+                ids=[r["id"] for r in work["new"]],
+                documents=[r["text"] for r in work["new"]],
+                embeddings=[r["embedding"] for r in work["new"]],
+                metadatas=[r["metadata"] for r in work["new"]]
+            )
+        if work["changed"]:
+            collection.update(ids=[r["id"] for r in work["changed"]], metadatas=[r["metadata"] for r in work["changed"]])
+        return [{"added": len(work["new"]), "updated": len(work["changed"]), "unchanged": work["unchanged"]}]
+
+    pipeline = Pipeline(iter_documents(paths, extract_workers), [
+        Stage("chunk", lambda page: [c for block in splitter.feed(page) for c in chunk(block)],
+              flush=lambda: [c for block in splitter.flush() for c in chunk(block)]),
+        Stage("tag", tagger.feed),
+        Stage("batch", batcher.feed, flush=batcher.flush),
+        Stage("embed", embed, workers=max(1, embed_workers)),
+        Stage("index", index),
+    ], queue_size=queue_size)
+
+    stats = {"chunks": 0, "added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    for result in pipeline:
+        for key, value in result.items():
+            stats[key] += value
+    stats["chunks"] = len(tagger.ids)
+    stats["embedded"] = stats["added"]
+
+    stored = collection.get(include=[])["ids"]
+    removed = [cid for cid in stored if cid not in tagger.ids]
+    for i in range(0, len(removed), WRITE_BATCH_SIZE):
+        collection.delete(ids=removed[i:i + WRITE_BATCH_SIZE])
+    stats["deleted"] = len(removed)
+
+    record_model(collection, model_name)
+
+    if manifest_path:
+        data = collection.get(include=["embeddings"])
+        save_manifest(manifest_path, dict(zip(data["ids"], data["embeddings"])), model_name)
+
+    if chroma_dir:
+        started = time.perf_counter()
+        build_indexes(collection, chroma_dir)
+        registry = CollectionRegistry.load(registry_path(chroma_dir))
+        registry.register(collection.name, collection, source=source, model_name=model_name, **(registry_info or {}))
+        registry.save()
+        logger.info(f"Rebuilt indexes and registry entry in {time.perf_counter() - started:.2f} s.")
+
+    stats["stages"] = [s.to_dict() for s in pipeline.stats]
+    stats["wall_s"] = round(pipeline.wall, 3)
+    logger.info("Ingestion stage report:\n" + pipeline.report())
+    logger.info(f"Ingestion complete: { {k: v for k, v in stats.items() if k != 'stages'} }")
+    return stats
+
+
+def record_model(collection, model_name: str):
+    """
+    Records the embedding model in the collection metadata, keeping the rest of it.
+
+    modify() replaces the whole metadata, so the index settings (hnsw:space, ...) are passed
+    back unchanged. Chroma >= 1.0 refuses hnsw:space in modify() even when it is unchanged; it
+    keeps the distance metric in the collection configuration instead, so it is left out there.
+    """
+    metadata = {**(collection.metadata or {}), MODEL_METADATA_KEY: model_name}
+    try:
+        collection.modify(metadata=metadata)
+    except ValueError:
+        if "hnsw:space" not in metadata:
+            raise
+        metadata.pop("hnsw:space")
+        collection.modify(metadata=metadata)
+
+
+def build_indexes(collection, chroma_dir: str):
+    """Rebuilds the BM25 index and the memmap export of a collection from what Chroma stores."""
+    from retrieval.lexical_index import LexicalIndex, lexical_index_path
+    from retrieval.memmap_vectorstore import export_from_chroma, vectors_path
+
+    data = collection.get(include=["documents", "metadatas"])
+    records = sorted(
+        ({"id": cid, "text": text, "metadata": meta or {}} for cid, text, meta in
+         zip(data["ids"], data["documents"], data["metadatas"])),
+        key=lambda r: r["metadata"].get("index", 0)
+    )
+    LexicalIndex.build(records).save(lexical_index_path(collection.name, chroma_dir))
+    export_from_chroma(collection, vectors_path(collection.name, chroma_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract, chunk, tag, embed and index documents in one pass.")
+    parser.add_argument("paths", nargs="*", default=[PDF], help="PDFs or extracted text files (default: PDF from config).")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--chroma-dir", default=CHROMA_DIR)
+    parser.add_argument("--strategy", default=CHUNKING_STRATEGY, help="Chunking strategy (token, section, semantic).")
+    parser.add_argument("--source", default=SOURCE_NAME, help="Source label stored in chunk metadata.")
+    parser.add_argument("--description", help="Description of the document set, stored in the collection registry.")
+    parser.add_argument("--keywords", help="Comma-separated words that route a question to this collection (e.g. 2025).")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--embed-workers", type=int, default=EMBEDDING_MAX_WORKERS)
+    parser.add_argument("--extract-workers", type=int, default=None, help="PDF extraction processes (default: CPU count).")
+    parser.add_argument("--queue-size", type=int, default=4, help="Items buffered between stages.")
+    parser.add_argument("--manifest", help="Chunk manifest to rewrite (default: the chromadb_manager manifest "
+                                           "for the default collection, none for other collections).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    collection = chromadb.PersistentClient(path=args.chroma_dir).get_or_create_collection(name=args.collection)
+    embed_fn, model_name = default_embed_fn(args.embed_workers)
+    ingest(args.paths, collection, embed_fn, model_name, strategy=args.strategy, source=args.source,
+           batch_size=args.batch_size, embed_workers=args.embed_workers, extract_workers=args.extract_workers,
+           queue_size=args.queue_size, chroma_dir=args.chroma_dir,
+           manifest_path=args.manifest or (MANIFEST_PATH if args.collection == COLLECTION_NAME else None),
+           registry_info={"description": args.description,
+                          "keywords": [k.strip() for k in args.keywords.split(",") if k.strip()] if args.keywords else None})
+
+
+if __name__ == "__main__":
+    main()
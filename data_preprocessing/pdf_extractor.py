@@ -1,43 +1,165 @@
 import pdfplumber
 import re
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from config import PDF
 import logging
 logger = logging.getLogger(__name__)
 
-def extract_text_and_tables(pdf_path):
+# Per-process cache of open documents, so a worker parses each PDF's structure only once
+_open_pdfs = {}
+
+
+def clean_page_text(text):
+    """
+    Removes standalone page numbers from the text of one page.
+
+    Args:
+        text (str): Raw page text.
+
+    Returns:
+        str: Cleaned page text.
+    """
+    text = re.sub(r'(?m)^\s*\d+\s*$', '', text)
+    text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
+    return text
+
+
+def table_records(tables, source, page_number):
+    """
+    Converts pdfplumber tables into structured records (first row is the header).
+
+    Args:
+        tables (List[List[List[str]]]): Tables as returned by page.extract_tables().
+        source (str): Name of the PDF the tables come from.
+        page_number (int): 1-based page number.
+
+    Returns:
+        List[Dict]: One record per non-empty table.
+    """
+    records = []
+    for table_index, table in enumerate(tables):
+        rows = [[(cell or "").strip() for cell in row] for row in table if row and any(row)]
+        if not rows:
+            continue
+        records.append({
+            "source": source,
+            "page": page_number,
+            "table": table_index,
+            "header": rows[0],
+            "rows": rows[1:]
+        })
+    return records
+
+
+def _extract_page(task):
+    """Worker: extracts the cleaned text and tables of a single page."""
+    pdf_path, page_index = task
+    pdf = _open_pdfs.get(pdf_path)
+    if pdf is None:
+        pdf = _open_pdfs[pdf_path] = pdfplumber.open(pdf_path)
+    page = pdf.pages[page_index]
+    try:
+        text = page.extract_text()
+        tables = page.extract_tables()
+    finally:
+        # Release the page's parsed layout objects; only the results are kept
+        page.close()
+    return {
+        "source": os.path.basename(pdf_path),
+        "page": page_index + 1,
+        "text": clean_page_text(text) if text else "",
+        "tables": table_records(tables, os.path.basename(pdf_path), page_index + 1)
+    }
+
+
+def iter_pages(pdf_paths, workers=None, chunksize=2):
+    """
+    Extracts pages of one or more PDFs in parallel and yields them in document order.
+
+    pdfplumber parsing is CPU-bound, so pages are spread over a process pool. Results are
+    yielded as soon as the next page in order is ready, so callers can stream them to disk.
+
+    Args:
+        pdf_paths (List[str]): PDFs to extract, processed in the given order.
+        workers (int): Number of worker processes (default: CPU count). 1 runs in-process.
+        chunksize (int): Pages handed to a worker at a time.
+
+    Yields:
+        Dict: {"source", "page", "text", "tables"} for each page.
+    """
+    if isinstance(pdf_paths, str):
+        pdf_paths = [pdf_paths]
+
+    tasks = []
+    for pdf_path in pdf_paths:
+        with pdfplumber.open(pdf_path) as pdf:
+            tasks.extend((pdf_path, i) for i in range(len(pdf.pages)))
+    logger.info(f"Extracting {len(tasks)} pages from {len(pdf_paths)} PDF(s).")
+
+    if workers == 1:
+        yield from map(_extract_page, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_extract_page, tasks, chunksize=chunksize)
+
+
+def extract_text_and_tables(pdf_path, workers=None):
     """
     Extracts text from a PDF, removing standalone page numbers.
 
     Args:
         pdf_path (str): Path to the PDF file.
+        workers (int): Number of worker processes (default: CPU count).
 
     Returns:
         str: Cleaned full text extracted from the PDF.
     """
-
-    full_text = ""
-   
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text:
-                    text = re.sub(r'(?m)^\s*\d+\s*$', '', text)
-                    text = re.sub(r'\n\s*\d+\s*\n', '\n', text)
-                    full_text += f"\n\n{text}"
+        text = "".join(f"\n\n{page['text']}" for page in iter_pages([pdf_path], workers) if page["text"])
         logger.info("PDF extraction completed.")
     except Exception as e:
         logger.error(f"Error extracting PDF text: {e}")
         raise
 
-    return full_text
+    return text
+
+
+def extract_to_files(pdf_paths, text_path="Extracted_text.txt", tables_path="Extracted_tables.jsonl", workers=None):
+    """
+    Streams extracted page text and table records to disk without holding the documents in memory.
+
+    Args:
+        pdf_paths (List[str]): PDFs to extract.
+        text_path (str): Output text file.
+        tables_path (str): Output JSON-lines file with one record per table.
+        workers (int): Number of worker processes (default: CPU count).
+
+    Returns:
+        Dict[str, int]: Number of pages and tables written.
+    """
+    pages, tables = 0, 0
+    with open(text_path, "w", encoding="utf-8") as text_file, open(tables_path, "w", encoding="utf-8") as tables_file:
+        for page in iter_pages(pdf_paths, workers):
+            pages += 1
+            if page["text"]:
+                text_file.write(f"\n\n{page['text']}")
+            for record in page["tables"]:
+                tables_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                tables += 1
+    return {"pages": pages, "tables": tables}
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text and tables from prospectus PDFs.")
+    parser.add_argument("pdfs", nargs="*", default=[PDF], help="PDF files to extract (default: PDF from config).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args()
     try:
-        pdf = PDF
-        text = extract_text_and_tables(pdf)
-        with open("Extracted_text.txt", "w", encoding="utf-8") as f:
-            f.write(text)
-        logger.info("Saved extracted text to 'Extracted_text.txt'.")
+        stats = extract_to_files(args.pdfs, workers=args.workers)
+        logger.info(f"Saved extracted text to 'Extracted_text.txt' and {stats['tables']} tables to 'Extracted_tables.jsonl'.")
     except Exception as e:
-        logger.critical(f"Failed to extract or save PDF content: {e}")
\ No newline at end of file
+        logger.critical(f"Failed to extract or save PDF content: {e}")
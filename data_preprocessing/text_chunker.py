@@ -1,11 +1,30 @@
-from config import HUGGINGFACE_TOKEN,EXTRACTED_TEXT
+from config import HUGGINGFACE_TOKEN, EXTRACTED_TEXT, TOKENIZER_NAME, CHUNKING_STRATEGY
 import logging
+import math
+from collections import Counter, deque
+from functools import lru_cache
 from huggingface_hub import login
 from transformers import AutoTokenizer
 import re
 
 logger = logging.getLogger(__name__)
-login(token=HUGGINGFACE_TOKEN)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name=TOKENIZER_NAME):
+    """
+    Loads the (fast, Rust-backed) tokenizer once per process.
+
+    Args:
+        name (str): Hugging Face model id of the tokenizer.
+
+    Returns:
+        PreTrainedTokenizerFast: Cached tokenizer instance.
+    """
+    if HUGGINGFACE_TOKEN:
+        login(token=HUGGINGFACE_TOKEN)
+    return AutoTokenizer.from_pretrained(name, trust_remote_code=True, use_fast=True)
+
 
 def custom_sent_tokenize(text):
     """
@@ -22,62 +41,89 @@ def custom_sent_tokenize(text):
     return [sentence.strip() for sentence in sentences if sentence.strip()]
 
 
-def split_chunk_by_tokens(sentences, encoder, max_tokens=512, overlap=50):
+def count_tokens(sentences, encoder):
+    """
+    Counts tokens of every sentence, tokenizing each sentence exactly once.
+
+    Fast Hugging Face tokenizers are called once on the whole batch; any other encoder with
+    an encode() method is called per sentence.
+
+    Args:
+        sentences (List[str]): Sentences to measure.
+        encoder: Tokenizer model.
+
+    Returns:
+        List[int]: Token count per sentence.
+    """
+    if not sentences:
+        return []
+    if getattr(encoder, "is_fast", False):
+        return [len(ids) for ids in encoder(sentences, add_special_tokens=False)["input_ids"]]
+    return [len(encoder.encode(sentence, add_special_tokens=False)) for sentence in sentences]
+
+
+def split_chunk_by_tokens(sentences, encoder, max_tokens=512, overlap=50, token_counts=None):
     """
     Chunks a list of sentences into groups based on token limits.
 
+    Token counts are computed once per sentence and carried along, so building the overlap
+    and the length of the carried-over chunk never re-encodes text.
+
     Args:
         sentences (List[str]): Tokenized sentences.
         encoder: Tokenizer model.
         max_tokens (int): Max token limit per chunk.
         overlap (int): Overlap tokens between chunks.
+        token_counts (List[int]): Precomputed token counts; computed here if omitted.
 
     Returns:
         List[str]: Chunked sections of text.
     """
+    if token_counts is None:
+        token_counts = count_tokens(sentences, encoder)
 
-    all_chunks, current_chunk, current_len = [], [], 0
+    all_chunks = []
+    current_chunk, current_len = deque(), 0
 
-    for sentence in sentences:
-        tokenized = encoder.encode(sentence, add_special_tokens=False)
-        sent_len = len(tokenized)
+    for sentence, sent_len in zip(sentences, token_counts):
         if current_len + sent_len > max_tokens:
-            all_chunks.append(" ".join(current_chunk))
+            all_chunks.append(" ".join(s for s, _ in current_chunk))
             if overlap > 0:
-                overlap_tokens = []
-                total_tokens = 0
-                for sent in reversed(current_chunk):
-                    t = encoder.encode(sent, add_special_tokens=False)
-                    total_tokens += len(t)
-                    if total_tokens >= overlap:
+                # Carry over trailing sentences totalling fewer than `overlap` tokens
+                carried, total = deque(), 0
+                for item in reversed(current_chunk):
+                    total += item[1]
+                    if total >= overlap:
                         break
-                    overlap_tokens.insert(0, sent)
-                current_chunk = overlap_tokens
-                current_len = sum(len(encoder.encode(s, add_special_tokens=False)) for s in current_chunk)
+                    carried.appendleft(item)
+                current_chunk = carried
+                current_len = sum(n for _, n in carried)
             else:
-                current_chunk = []
-                current_len = 0
-        current_chunk.append(sentence)
+                current_chunk, current_len = deque(), 0
+        current_chunk.append((sentence, sent_len))
         current_len += sent_len
 
     if current_chunk:
-        all_chunks.append(" ".join(current_chunk))
+        all_chunks.append(" ".join(s for s, _ in current_chunk))
 
     return all_chunks
 
 
-try:
-    with open(EXTRACTED_TEXT, "r", encoding="utf-8") as f:
-        full_text = f.read()
+def split_sections(text):
+    """
+    Splits the prospectus text at numbered headings ("1. Eligibility", ...).
 
-    full_text = re.sub(r'\n{2,}', '\n', full_text).strip()
-    tokenizer = AutoTokenizer.from_pretrained("meta-llama/Meta-Llama-3-8B-Instruct", trust_remote_code=True, use_fast=False)
+    Args:
+        text (str): Extracted document text.
 
+    Returns:
+        List[str]: Sections, each starting with its heading where one exists.
+    """
+    text = re.sub(r'\n{2,}', '\n', text).strip()
     section_pattern = r"(?=\n\d+\.\s[A-Z])"
-    sections = re.split(section_pattern, full_text)
 
     processed_sections = []
-    for section in sections:
+    for section in re.split(section_pattern, text):
         cleaned = section.strip()
         if not cleaned:
             continue
@@ -87,18 +133,112 @@ try:
             processed_sections[-1] += " " + cleaned
         else:
             processed_sections.append(cleaned)
+    return processed_sections
+
+
+def _chunk_sentence_groups(groups, encoder, max_tokens, overlap):
+    # Tokenize every sentence of every group in one batch, then window each group independently
+    flat = [sentence for group in groups for sentence in group]
+    counts = count_tokens(flat, encoder)
+    chunks, start = [], 0
+    for group in groups:
+        end = start + len(group)
+        chunks.extend(split_chunk_by_tokens(group, encoder, max_tokens, overlap, counts[start:end]))
+        start = end
+    return chunks
+
+
+def token_window_chunks(text, encoder, max_tokens=512, overlap=50):
+    """Token windows over the whole document, ignoring section boundaries."""
+    text = re.sub(r'\n{2,}', '\n', text).strip()
+    return _chunk_sentence_groups([custom_sent_tokenize(text)], encoder, max_tokens, overlap)
 
-    final_chunks = []
-    for section in processed_sections:
+
+def section_chunks(text, encoder, max_tokens=512, overlap=50):
+    """Token windows that never cross a numbered section heading."""
+    groups = [custom_sent_tokenize(section) for section in split_sections(text)]
+    return _chunk_sentence_groups(groups, encoder, max_tokens, overlap)
+
+
+def _bag_of_words(sentence):
+    return Counter(re.findall(r"\w+", sentence.lower()))
+
+
+def _cosine(a, b):
+    dot = sum(count * b.get(word, 0) for word, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def semantic_chunks(text, encoder, max_tokens=512, overlap=50, threshold=0.1, similarity=None):
+    """
+    Section-aware chunks that also break where consecutive sentences stop being related.
+
+    Within each section, a new segment starts whenever the similarity of neighbouring
+    sentences drops below the threshold; segments are then token-windowed without overlap
+    across semantic boundaries.
+
+    Args:
+        similarity (Callable[[str, str], float]): Sentence similarity; defaults to
+            bag-of-words cosine, and can be replaced by an embedding-based function.
+    """
+    groups = []
+    for section in split_sections(text):
         sentences = custom_sent_tokenize(section)
-        chunks = split_chunk_by_tokens(sentences, tokenizer)
-        final_chunks.extend(chunks)
+        if not sentences:
+            continue
+        if similarity is None:
+            bags = [_bag_of_words(s) for s in sentences]
+            scores = [_cosine(bags[i - 1], bags[i]) for i in range(1, len(sentences))]
+        else:
+            scores = [similarity(sentences[i - 1], sentences[i]) for i in range(1, len(sentences))]
+        segment = [sentences[0]]
+        for sentence, score in zip(sentences[1:], scores):
+            if score < threshold:
+                groups.append(segment)
+                segment = []
+            segment.append(sentence)
+        groups.append(segment)
+    return _chunk_sentence_groups(groups, encoder, max_tokens, overlap)
+
+
+CHUNKING_STRATEGIES = {
+    "token": token_window_chunks,
+    "section": section_chunks,
+    "semantic": semantic_chunks,
+}
+
+
+def chunk_text(text, encoder, strategy=CHUNKING_STRATEGY, **kwargs):
+    """
+    Chunks a document with one of the registered strategies.
+
+    Args:
+        text (str): Extracted document text.
+        encoder: Tokenizer model.
+        strategy (str): Key of CHUNKING_STRATEGIES ("token", "section" or "semantic").
+        **kwargs: Passed to the strategy (max_tokens, overlap, ...).
+
+    Returns:
+        List[str]: Chunks in document order.
+    """
+    if strategy not in CHUNKING_STRATEGIES:
+        raise ValueError(f"Unknown chunking strategy '{strategy}'. Choose from {sorted(CHUNKING_STRATEGIES)}.")
+    return CHUNKING_STRATEGIES[strategy](text, encoder, **kwargs)
+
+
+if __name__ == "__main__":
+    try:
+        with open(EXTRACTED_TEXT, "r", encoding="utf-8") as f:
+            full_text = f.read()
+
+        final_chunks = chunk_text(full_text, get_tokenizer())
 
-    with open("Chunks.txt", "w", encoding="utf-8") as f:
-        for chunk in final_chunks:
-            f.write(chunk.strip() + "\n\n***\n\n")
+        with open("Chunks.txt", "w", encoding="utf-8") as f:
+            for chunk in final_chunks:
+                f.write(chunk.strip() + "\n\n***\n\n")
 
-    logger.info(f"Chunking complete. Total chunks: {len(final_chunks)}")
+        logger.info(f"Chunking complete. Total chunks: {len(final_chunks)}")
 
-except Exception as e:
-    logger.critical(f"Chunking failed: {e}")
+    except Exception as e:
+        logger.critical(f"Chunking failed: {e}")
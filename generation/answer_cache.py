@@ -0,0 +1,229 @@
+"""
+This module provides a two-tier answer cache placed in front of the RAG pipeline.
+
+Tier 1 is an exact cache keyed on the normalized query text and is checked before any
+embedding call. Tier 2 is a semantic cache that returns a stored answer when the new query
+embedding is within a cosine-similarity threshold of a previously answered query. Both tiers
+use LRU + TTL eviction and are cleared automatically when the collection version changes,
+so answers never outlive the knowledge base they were generated from.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalizes a query for exact-match caching (case, punctuation and whitespace insensitive).
+
+    Args:
+        text (str): Raw user query.
+
+    Returns:
+        str: Normalized query key.
+    """
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class AnswerCache:
+    """
+    Exact + semantic answer cache with LRU/TTL eviction and version-based invalidation.
+
+    Attributes:
+        max_entries (int): Capacity of the exact tier.
+        semantic_max_entries (int): Capacity of the semantic tier.
+        ttl_seconds (float): Lifetime of a cached answer.
+        similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+        version_fn (Callable[[], Any]): Returns the current collection version; a change
+            clears both tiers.
+
+    Methods:
+        get_exact(query: str) -> Optional[str]
+        get_semantic(query_embedding: list, threshold: float = None) -> Optional[str]
+        put(query: str, query_embedding: list, answer: str) -> None
+        invalidate() -> None
+        stats() -> dict
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, semantic_max_entries: int = SEMANTIC_CACHE_SIZE,
+                 ttl_seconds: float = ANSWER_CACHE_TTL, similarity_threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 version_fn=None):
+        self.max_entries = max_entries
+        self.semantic_max_entries = semantic_max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.version_fn = version_fn
+
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        self._counters = {"exact_hits": 0, "exact_misses": 0, "semantic_hits": 0, "semantic_misses": 0}
+
+        # Exact tier: normalized query -> (answer, expires_at)
+        self._exact = OrderedDict()
+
+        # Semantic tier: normalized query -> (slot, answer, expires_at), vectors in a preallocated matrix
+        self._semantic = OrderedDict()
+        self._matrix = None
+        self._valid = None
+        self._slot_keys = []
+        self._free_slots = []
+
+    def _check_version(self) -> None:
+        # Caller must hold the lock
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            logger.info("Collection version changed. Clearing answer cache.")
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._exact.clear()
+        self._semantic.clear()
+        self._matrix = None
+        self._valid = None
+        self._slot_keys = []
+        self._free_slots = []
+
+    def _init_matrix(self, dim: int) -> None:
+        self._matrix = np.zeros((self.semantic_max_entries, dim), dtype=np.float32)
+        self._valid = np.zeros(self.semantic_max_entries, dtype=bool)
+        self._slot_keys = [None] * self.semantic_max_entries
+        self._free_slots = list(range(self.semantic_max_entries - 1, -1, -1))
+
+    def _remove_semantic(self, key: str) -> None:
+        slot, _, _ = self._semantic.pop(key)
+        self._valid[slot] = False
+        self._slot_keys[slot] = None
+        self._free_slots.append(slot)
+
+    @staticmethod
+    def _normalize_vector(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_exact(self, query: str):
+        """
+        Looks up an answer for the normalized query text.
+
+        Args:
+            query (str): Raw user query.
+
+        Returns:
+            Optional[str]: Cached answer, or None on a miss.
+        """
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            entry = self._exact.get(key)
+            if entry is not None and entry[1] > now:
+                self._exact.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._exact[key]
+            self._counters["exact_misses"] += 1
+            return None
+
+    def get_semantic(self, query_embedding, threshold: float = None):
+        """
+        Looks up the answer of the most similar cached query embedding.
+
+        Args:
+            query_embedding (list): Embedding of the new query.
+            threshold (float): Overrides similarity_threshold, e.g. a looser bound used as a
+                fallback while the LLM is unavailable.
+
+        Returns:
+            Optional[str]: Cached answer if the best match clears the similarity threshold.
+        """
+        vector = self._normalize_vector(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            if not self._semantic or self._matrix.shape[1] != vector.shape[0]:
+                self._counters["semantic_misses"] += 1
+                return None
+
+            similarities = self._matrix @ vector
+            similarities[~self._valid] = -np.inf
+            best = int(np.argmax(similarities))
+
+            if similarities[best] >= (self.similarity_threshold if threshold is None else threshold):
+                key = self._slot_keys[best]
+                _, answer, expires_at = self._semantic[key]
+                if expires_at > now:
+                    self._semantic.move_to_end(key)
+                    self._counters["semantic_hits"] += 1
+                    logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f}).")
+                    return answer
+                self._remove_semantic(key)
+
+            self._counters["semantic_misses"] += 1
+            return None
+
+    def put(self, query: str, query_embedding, answer: str) -> None:
+        """
+        Stores an answer in both tiers.
+
+        Args:
+            query (str): Raw user query.
+            query_embedding (list): Embedding of the query; the semantic tier is skipped if empty.
+            answer (str): Generated answer to cache.
+        """
+        key = normalize_query(query)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._check_version()
+
+            self._exact[key] = (answer, expires_at)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if query_embedding is None or len(query_embedding) == 0 or self.semantic_max_entries <= 0:
+                return
+            vector = self._normalize_vector(query_embedding)
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._semantic.clear()
+                self._init_matrix(vector.shape[0])
+
+            if key in self._semantic:
+                self._remove_semantic(key)
+            if not self._free_slots:
+                self._remove_semantic(next(iter(self._semantic)))
+
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._slot_keys[slot] = key
+            self._semantic[key] = (slot, answer, expires_at)
+
+    def invalidate(self) -> None:
+        """Drops every cached answer."""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current sizes of both tiers.
+
+        Returns:
+            dict: Counters plus "exact_size" and "semantic_size".
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["exact_size"] = len(self._exact)
+            stats["semantic_size"] = len(self._semantic)
+        return stats
@@ -0,0 +1,86 @@
+"""
+This module assembles the retrieved chunks into the context section of the prompt.
+
+Instead of joining every retrieved chunk, the context builder
+    1. drops chunks whose vector distance exceeds a relevance threshold (the best chunk is
+       always kept, so the model is never left without context),
+    2. removes sentences already present in a higher-ranked chunk, which strips the overlap
+       the chunker adds between neighbouring chunks,
+    3. packs chunks in rank order until the prompt-token budget is used up.
+
+Tokens are estimated with the same heuristic as the chat history budget.
+"""
+
+import logging
+import re
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_MAX_DISTANCE
+from generation.session_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _normalize_sentence(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def build_context(results: list, token_budget: int = CONTEXT_TOKEN_BUDGET, max_distance: float = CONTEXT_MAX_DISTANCE,
+                  token_counter=estimate_tokens, separator: str = "\n") -> str:
+    """
+    Builds a deduplicated, relevance-filtered context that fits the token budget.
+
+    Args:
+        results (List[Dict]): Retrieved chunks, best first, as {"text": str, "distance": Optional[float]}.
+            A distance of None (e.g. a keyword-only hit) is never filtered.
+        token_budget (int): Maximum number of context tokens.
+        max_distance (float): Chunks farther than this from the query are dropped; None disables it.
+        token_counter (Callable[[str], int]): Token estimate for a piece of text.
+        separator (str): Text placed between chunks.
+
+    Returns:
+        str: The context text, empty if no chunk was selected.
+    """
+    seen_sentences = set()
+    selected, used = [], 0
+    separator_tokens = token_counter(separator)
+
+    for rank, result in enumerate(results):
+        text = (result.get("text") or "").strip()
+        distance = result.get("distance")
+        if not text:
+            continue
+        if rank > 0 and max_distance is not None and distance is not None and distance > max_distance:
+            logger.info(f"Dropping chunk {rank} with distance {distance:.3f}.")
+            continue
+
+        sentences = [s for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+        fresh = [s for s in sentences if _normalize_sentence(s) not in seen_sentences]
+        if not fresh:
+            continue
+        # Keep the chunk verbatim unless overlap was removed
+        if len(fresh) < len(sentences):
+            text = " ".join(fresh)
+
+        cost = token_counter(text) + (separator_tokens if selected else 0)
+        if used + cost > token_budget:
+            if selected:
+                continue
+            # The best chunk alone exceeds the budget: keep as many leading sentences as fit
+            kept, cost = [], 0
+            for sentence in fresh:
+                sentence_cost = token_counter(sentence) + (1 if kept else 0)
+                if cost + sentence_cost > token_budget:
+                    break
+                kept.append(sentence)
+                cost += sentence_cost
+            if not kept:
+                continue
+            fresh, text = kept, " ".join(kept)
+
+        seen_sentences.update(_normalize_sentence(s) for s in fresh)
+        selected.append(text)
+        used += cost
+
+    logger.info(f"Context: kept {len(selected)} of {len(results)} chunks (~{used} tokens).")
+    return separator.join(selected)
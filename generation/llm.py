@@ -1,124 +1,621 @@
 """
 
-This module provides a wrapper around the Groq API to interact with LLaMA 3 models.
-It supports prompt-based response generation with streaming and includes retry and timeout handling
-for reliable LLM integration in downstream tasks like RAG-based question answering systems.
+This module provides a wrapper around chat-completion backends (Groq by default, see
+generation/llm_backends.py) to interact with LLaMA 3 models.
+It supports prompt-based response generation with streaming, both synchronously and with asyncio,
+and includes retry and timeout handling for reliable LLM integration in downstream tasks like
+RAG-based question answering systems.
+
+All LLM instances of a rate-limited (hosted) backend share one LLMScheduler, so concurrent
+action workers stop retrying into a rate-limited provider at the same moment:
+
+    - two token buckets keep requests/min and tokens/min at the provider limits,
+    - waiting requests form a bounded priority queue; when it is full or a request has
+      waited too long, SchedulerBusyError is raised instead of piling up more work,
+    - retries back off exponentially with full jitter, and a 429's retry-after header
+      pauses every caller for the time the provider asked for,
+    - a circuit breaker opens after repeated failures, so requests fail fast with
+      CircuitOpenError and the caller can serve a FAQ or cached answer instead.
+
+Local and mock backends have no provider quota; they share a second scheduler with the same
+queue and breaker but without request/token limits.
 """
 
+import asyncio
+import heapq
+import itertools
 import logging
+import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
-from groq import Groq
-from config import GROQ_API_KEY, LLM_MODEL_NAME
+from config import (
+    GROQ_API_KEY, LLM_MODEL_NAME, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE,
+    LLM_EXPECTED_COMPLETION_TOKENS, LLM_MAX_QUEUE, LLM_MAX_QUEUE_WAIT, LLM_BACKOFF_MAX,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS,
+)
+from generation.session_memory import SessionMemoryStore, DEFAULT_SESSION_ID, estimate_tokens
+from generation.llm_backends import LLMBackend, build_llm_backend
+from generation.telemetry import span, record
 
 logger = logging.getLogger(__name__)
 
+GENERATION_FAILED_MESSAGE = "Failed to generate a response after multiple attempts."
+
+GENERATION_PARAMS = {"temperature": 0.7, "top_p": 1, "max_tokens": 1024}
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# How often a queued request re-checks whether it is its turn
+_POLL_INTERVAL = 0.05
+
+
+class LLMUnavailableError(Exception):
+    """The scheduler refused the request without calling the provider."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """The circuit breaker is open after repeated provider failures."""
+
+
+class SchedulerBusyError(LLMUnavailableError):
+    """The request queue is full or the request waited longer than allowed."""
+
+
+class GenerationInterruptedError(Exception):
+    """The response stream failed after part of the answer had been yielded."""
+
+
+def _retry_after(error: Exception):
+    """Seconds from the retry-after header of a provider error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return max(0.0, float(value)) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum level; a full minute's allowance by default.
+
+    A rate of 0 disables the limit: the bucket never makes a request wait.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are available now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open -> half-open after
+    `reset_timeout` seconds, when one probe request is let through. The probe's outcome
+    closes the breaker again or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_timeout: float = LLM_BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            now = self._clock()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_started = None
+            if self.state == self.CLOSED:
+                return True
+            # A probe that never reported back (e.g. dropped from the queue) is replaced
+            if self.state == self.HALF_OPEN and (self._probe_started is None
+                                                 or now - self._probe_started >= self.reset_timeout):
+                self._probe_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"[LLMScheduler] Circuit breaker opened after {self.failures} failures.")
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_started = None
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM requests.
+
+    Requests are admitted in (priority, arrival) order when both the request and the token
+    bucket have room; lower priority values go first.
+
+    Methods:
+        acquire(tokens, priority, max_wait) -> float
+        aacquire(tokens, priority, max_wait) -> float
+        try_acquire(tokens, priority, max_wait) / atry_acquire(...) -> Optional[float]
+        release(reserved, used_tokens) -> None
+        record_success() / record_failure(error) -> None
+        backoff_delay(attempt, error) -> float
+        stats() -> dict
+    """
+
+    def __init__(self, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE, max_queue: int = LLM_MAX_QUEUE,
+                 max_wait: float = LLM_MAX_QUEUE_WAIT, backoff_max: float = LLM_BACKOFF_MAX,
+                 breaker: CircuitBreaker = None, clock=time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.backoff_max = backoff_max
+        self.breaker = breaker if breaker is not None else CircuitBreaker(clock=clock)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._counters = {"admitted": 0, "rejected_busy": 0, "rejected_open": 0, "rate_limited": 0}
+
+    def _enqueue(self, priority: int):
+        allowed = self.breaker.allow()
+        with self._lock:
+            if not allowed:
+                self._counters["rejected_open"] += 1
+                raise CircuitOpenError("LLM circuit breaker is open.")
+            if len(self._queue) >= self.max_queue:
+                self._counters["rejected_busy"] += 1
+                raise SchedulerBusyError(f"LLM request queue is full ({self.max_queue} waiting).")
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._queue, ticket)
+            return ticket
+
+    def _try_admit(self, ticket, tokens: float) -> float:
+        """Admits the ticket and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            if self._queue[0] != ticket:
+                return _POLL_INTERVAL
+            wait = max(self._paused_until - self._clock(), self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            heapq.heappop(self._queue)
+            self._counters["admitted"] += 1
+            return 0.0
+
+    def _abandon(self, ticket):
+        """Removes a still-queued ticket; a ticket that was admitted meanwhile is left alone."""
+        with self._lock:
+            if ticket not in self._queue:
+                return
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._counters["rejected_busy"] += 1
+
+    def acquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> float:
+        """
+        Blocks until the request may be sent.
+
+        Args:
+            tokens (float): Estimated prompt + completion tokens.
+            priority (int): Lower values are admitted first.
+            max_wait (float): Maximum queueing time; defaults to the scheduler's max_wait.
+
+        Returns:
+            float: The reserved token count, to be passed to release().
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            SchedulerBusyError: If the queue is full or max_wait is exceeded.
+        """
+        ticket = self._enqueue(priority)
+        deadline = self._clock() + (self.max_wait if max_wait is None else max_wait)
+        while True:
+            wait = self._try_admit(ticket, tokens)
+            if wait == 0:
+                return tokens
+            if self._clock() + min(wait, _POLL_INTERVAL) > deadline:
+                self._abandon(ticket)
+                raise SchedulerBusyError("Timed out waiting for LLM capacity.")
+            time.sleep(min(wait, _POLL_INTERVAL))
+
+    async def aacquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> float:
+        """Async version of acquire(); waits without blocking the event loop."""
+        ticket = self._enqueue(priority)
+        deadline = self._clock() + (self.max_wait if max_wait is None else max_wait)
+        try:
+            while True:
+                wait = self._try_admit(ticket, tokens)
+                if wait == 0:
+                    return tokens
+                if self._clock() + min(wait, _POLL_INTERVAL) > deadline:
+                    raise SchedulerBusyError("Timed out waiting for LLM capacity.")
+                await asyncio.sleep(min(wait, _POLL_INTERVAL))
+        except BaseException:
+            # Timed out or cancelled while queued: give the slot to the next request
+            self._abandon(ticket)
+            raise
+
+    def try_acquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None):
+        """Like acquire(), but returns None instead of raising when the request is refused."""
+        try:
+            return self.acquire(tokens, priority, max_wait)
+        except LLMUnavailableError:
+            return None
+
+    async def atry_acquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None):
+        """Async version of try_acquire()."""
+        try:
+            return await self.aacquire(tokens, priority, max_wait)
+        except LLMUnavailableError:
+            return None
+
+    def release(self, reserved: float, used_tokens: float):
+        """Returns over-reserved tokens once the real usage of a request is known."""
+        if reserved > used_tokens:
+            with self._lock:
+                self.tokens.refund(reserved - used_tokens)
+
+    def record_success(self):
+        self.breaker.record_success()
+
+    def record_failure(self, error: Exception):
+        """
+        Records a failed request. Rate limiting is not a provider failure: it pauses all
+        callers for the retry-after period instead of counting towards the breaker.
+        """
+        if _is_rate_limited(error):
+            pause = _retry_after(error)
+            with self._lock:
+                self._counters["rate_limited"] += 1
+                if pause:
+                    self._paused_until = max(self._paused_until, self._clock() + pause)
+            return
+        self.breaker.record_failure()
+
+    def backoff_delay(self, attempt: int, base: float, error: Exception = None) -> float:
+        """
+        Delay before retry number `attempt` (0-based): the retry-after the provider asked
+        for, otherwise full-jitter exponential backoff capped at backoff_max.
+        """
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, base * (2 ** attempt)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "queued": len(self._queue), "breaker": self.breaker.state}
+
+
+llm_scheduler = LLMScheduler()
+local_llm_scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+
+
+def scheduler_for(backend: LLMBackend) -> LLMScheduler:
+    """The process-wide scheduler for a backend: rate-limited only for hosted providers."""
+    return llm_scheduler if backend.rate_limited else local_llm_scheduler
+
 
 class LLM:
     """
-    Wrapper class to interface with Groq-hosted LLaMA 3 models via the Groq Python SDK.
+    Wrapper class to interface with LLaMA 3 models through a pluggable LLMBackend.
     
     Features:
     - Prompt-based text generation using chat completions
     - Streaming response support
-    - Retry mechanism for robustness
+    - Per-conversation chat memory keyed by session id
+    - Rate limiting, jittered backoff and a circuit breaker through the shared LLMScheduler
     - Timeout handling for long-running requests
 
     Attributes:
-        model (str): Name of the Groq-hosted LLaMA model to use (e.g., 'llama3-8b-8192')
-        client (Groq): Initialized Groq client with API key
+        model (str): Name of the LLaMA model to use (e.g., 'llama3-8b-8192')
+        backend (LLMBackend): Streaming chat-completion backend (LLM_BACKEND by default)
+        memory (SessionMemoryStore): Bounded chat history per conversation
+        scheduler (LLMScheduler): Admission control shared by all LLM instances of the same
+            kind of backend (see scheduler_for())
 
     Methods:
-        generate(prompt: str, retries: int = 3, delay: float = 1.5, timeout: int = 10) -> str
-            Generates a response for a given prompt using the Groq API with retries and timeout.
+        generate(prompt: str, retries: int = 3, delay: float = 1.5, timeout: float = None,
+                 session_id: str = "default", memory_text: str = None, priority: int = 0) -> str
+            Generates a response for a given prompt with retries and timeout.
+        agenerate(...) -> str
+            Async version of generate() with cancellation-based timeouts.
+        generate_stream(...) / agenerate_stream(...)
+            Yield response text fragments as soon as they arrive.
     """
 
-    def __init__(self, model_name: str = LLM_MODEL_NAME, api_key: str = GROQ_API_KEY):
+    def __init__(self, model_name: str = LLM_MODEL_NAME, api_key: str = GROQ_API_KEY, memory: SessionMemoryStore = None,
+                 scheduler: LLMScheduler = None, backend: LLMBackend = None):
         """
-        Initializes the LLM client and sets up initial system message.
+        Initializes the LLM client and sets up the system message and session memory.
 
         Args:
-            model_name (str): Name of the model to be used from Groq.
-            api_key (str): Groq API key for authentication.
+            model_name (str): Name of the model to be used.
+            api_key (str): Groq API key, used when LLM_BACKEND is "groq".
+            memory (SessionMemoryStore): Per-conversation history store. A private store is
+                created if none is given.
+            scheduler (LLMScheduler): Scheduler for every request, including the secondary
+                requests of a HedgedBackend; defaults to scheduler_for() of each backend.
+            backend (LLMBackend): Backend to use; defaults to build_llm_backend().
 
         Raises:
-            ValueError: If the API key is not set.
+            ValueError: If the Groq backend is used and the API key is not set.
         """
 
-        if not api_key:
-            raise ValueError("GROQ_API_KEY is not set. Please check your environment configuration.")
-        self.client = Groq(api_key=api_key)
-        self.model = model_name
-        self.chat_history = [
-            {"role": "system", "content": "You are a helpful assistant."}
-        ]
+        self.backend = backend if backend is not None else build_llm_backend(model_name, api_key)
+        self.model = self.backend.model_name
+        self.system_message = {"role": "system", "content": "You are a helpful assistant."}
+        self.memory = memory if memory is not None else SessionMemoryStore()
+        if scheduler is None:
+            self.scheduler = scheduler_for(self.backend)
+            self.backend.bind_scheduler(scheduler_for)
+        else:
+            self.scheduler = scheduler
+            self.backend.bind_scheduler(lambda backend: scheduler)
 
-    def _call_llm(self, prompt: str):
+    def _build_messages(self, prompt: str, session_id: str) -> list:
+        # System message + this session's bounded, token-trimmed history + the new prompt
+        messages = [self.system_message] + self.memory.get_history(session_id) + [{"role": "user", "content": prompt}]
+        logger.debug(f"Messages sent to LLM for session '{session_id}': {messages}")
+        return messages
+
+    def _call_llm(self, prompt: str, session_id: str = DEFAULT_SESSION_ID, timeout: float = None):
         """
-        Internal method to prepare and send a streaming chat completion request to the LLM.
+        Internal method to prepare and send a streaming chat completion request to the backend.
 
-        This method maintains a rolling window of the last 3 user-assistant message pairs
-        (plus the system message) to provide short-term context during conversation.
+        The request carries the system message, the recent history of this session only
+        (bounded and token-trimmed by the memory store) and the new prompt.
 
         Args:
-            prompt (str): The user input to include in the conversation history.
+            prompt (str): The user input for this turn.
+            session_id (str): Conversation whose history should be included.
+            timeout (float): Per-request timeout; defaults to the backend's own timeout.
+
+        Returns:
+            Generator: A generator yielding response text fragments.
+        """
+        return self.backend.stream(self._build_messages(prompt, session_id), timeout=timeout, **GENERATION_PARAMS)
+
+    def _acall_llm(self, prompt: str, session_id: str = DEFAULT_SESSION_ID, timeout: float = None):
+        """
+        Async counterpart of _call_llm.
 
         Returns:
-            Generator: A generator yielding streamed response chunks from the Groq API.
-        """
-        # Add latest user input to history
-        self.chat_history.append({"role": "user", "content": prompt})
-        logger.info("User input added to chat history.")
-        # Keep only last 3 user-assistant pairs (6 messages) + system message
-        filtered_history = [self.chat_history[0]] + self.chat_history[-6:]
-        logger.debug(f"Filtered chat history (memory): {filtered_history}")
-
-        return self.client.chat.completions.create(
-            model=self.model,
-            messages=filtered_history,
-            temperature=0.7,
-            top_p=1,
-            max_tokens=1024,
-            stream=True
-        )
-
-    def generate(self, prompt: str, retries: int = 3, delay: float = 1.5, timeout: int = 10) -> str:
+            AsyncIterator: Response text fragments.
+        """
+        return self.backend.astream(self._build_messages(prompt, session_id), timeout=timeout, **GENERATION_PARAMS)
+
+    def _estimate_tokens(self, prompt: str, session_id: str) -> int:
+        history = sum(estimate_tokens(m["content"]) for m in self.memory.get_history(session_id))
+        return estimate_tokens(prompt) + history + LLM_EXPECTED_COMPLETION_TOKENS
+
+    def _release(self, reserved: float, prompt: str, parts: list):
+        self.scheduler.release(reserved, estimate_tokens(prompt) + estimate_tokens("".join(parts)))
+
+    def _settle(self, reserved: float, prompt: str, parts: list, error: Exception = None):
+        """Reports the outcome of one attempt to the scheduler."""
+        self._release(reserved, prompt, parts)
+        if error is None:
+            self.scheduler.record_success()
+        else:
+            self.scheduler.record_failure(error)
+
+    def generate_stream(self, prompt: str, retries: int = 3, delay: float = 1.5, timeout: float = None,
+                        session_id: str = DEFAULT_SESSION_ID, memory_text: str = None,
+                        priority: int = PRIORITY_INTERACTIVE):
+        """
+        Streams the response token by token as it arrives from the LLM.
+
+        Every attempt is admitted by the shared scheduler first. Failed attempts are retried
+        with jittered exponential backoff only until the first token has been yielded; after
+        that an error raises GenerationInterruptedError, so a truncated answer is never taken
+        for a complete one. If every attempt fails, the fallback message is yielded instead.
+        Only a complete exchange is added to chat memory.
+
+        Args:
+            Same as generate().
+
+        Yields:
+            str: Response text fragments.
+
+        Raises:
+            LLMUnavailableError: If the scheduler refuses the request (breaker open or queue
+                full). Nothing has been yielded at that point.
+            GenerationInterruptedError: If the stream failed after the first fragment.
+        """
+        started = time.perf_counter()
+        for attempt in range(retries):
+            parts = []
+            with span("llm_queue"):
+                reserved = self.scheduler.acquire(self._estimate_tokens(prompt, session_id), priority)
+            try:
+                for content in self._call_llm(prompt, session_id, timeout=timeout):
+                    if not parts:
+                        record("ttft", time.perf_counter() - started)
+                    parts.append(content)
+                    yield content
+            except Exception as e:
+                logger.warning(f"[Attempt {attempt + 1}] LLM request failed: {e}")
+                self._settle(reserved, prompt, parts, e)
+                if parts:
+                    raise GenerationInterruptedError(f"LLM stream failed after {len(parts)} fragments: {e}") from e
+                if attempt + 1 < retries:
+                    time.sleep(self.scheduler.backoff_delay(attempt, delay, e))
+                continue
+            except BaseException:
+                # Closed by the consumer mid-stream: return the unused reservation, but this is
+                # not a provider failure
+                self._release(reserved, prompt, parts)
+                raise
+            else:
+                self._settle(reserved, prompt, parts)
+
+            # Remember the exchange for this conversation only
+            self.memory.add_turn(session_id, memory_text or prompt, "".join(parts))
+            logger.info(f"Exchange added to chat memory for session '{session_id}'.")
+            return
+
+        yield GENERATION_FAILED_MESSAGE
+
+    async def agenerate_stream(self, prompt: str, retries: int = 3, delay: float = 1.5, timeout: float = None,
+                               session_id: str = DEFAULT_SESSION_ID, memory_text: str = None,
+                               priority: int = PRIORITY_INTERACTIVE):
+        """
+        Async version of generate_stream().
+
+        The timeout bounds the wait for the first chunk and for each following chunk, and
+        is enforced by cancelling the pending read. Queueing for the scheduler does not count
+        towards the timeout.
+
+        Args:
+            Same as generate().
+
+        Yields:
+            str: Response text fragments.
+
+        Raises:
+            LLMUnavailableError: If the scheduler refuses the request.
+            GenerationInterruptedError: If the stream failed after the first fragment.
+        """
+        started = time.perf_counter()
+        for attempt in range(retries):
+            parts = []
+            with span("llm_queue"):
+                reserved = await self.scheduler.aacquire(self._estimate_tokens(prompt, session_id), priority)
+            iterator = self._acall_llm(prompt, session_id, timeout).__aiter__()
+            try:
+                while True:
+                    try:
+                        content = await asyncio.wait_for(iterator.__anext__(), timeout=timeout or self.backend.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if not parts:
+                        record("ttft", time.perf_counter() - started)
+                    parts.append(content)
+                    yield content
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    logger.warning(f"[Attempt {attempt + 1}] LLM request timed out.")
+                else:
+                    logger.warning(f"[Attempt {attempt + 1}] LLM request failed: {e}")
+                self._settle(reserved, prompt, parts, e)
+                if parts:
+                    raise GenerationInterruptedError(f"LLM stream failed after {len(parts)} fragments: {e}") from e
+                if attempt + 1 < retries:
+                    await asyncio.sleep(self.scheduler.backoff_delay(attempt, delay, e))
+                continue
+            except BaseException:
+                # Cancelled or closed by the consumer: return the unused reservation, but this
+                # is not a provider failure
+                self._release(reserved, prompt, parts)
+                raise
+            else:
+                self._settle(reserved, prompt, parts)
+            finally:
+                await iterator.aclose()
+
+            self.memory.add_turn(session_id, memory_text or prompt, "".join(parts))
+            logger.info(f"Exchange added to chat memory for session '{session_id}'.")
+            return
+
+        yield GENERATION_FAILED_MESSAGE
+
+    def generate(self, prompt: str, retries: int = 3, delay: float = 1.5, timeout: float = None,
+                 session_id: str = DEFAULT_SESSION_ID, memory_text: str = None,
+                 priority: int = PRIORITY_INTERACTIVE) -> str:
         """
         Generates a response from the LLM for a given prompt, with timeout and retry logic.
 
         Args:
             prompt (str): The user prompt to send to the language model.
             retries (int): Number of retry attempts on failure.
-            delay (float): Delay in seconds between retries.
-            timeout (int): Timeout duration in seconds for each LLM call.
+            delay (float): Base delay in seconds of the exponential backoff between retries.
+            timeout (float): Timeout in seconds for each LLM call; defaults to the backend's timeout.
+            session_id (str): Conversation identifier (Rasa sender_id) used for chat memory.
+            memory_text (str): What to remember as the user turn; defaults to the full prompt.
+            priority (int): Scheduler priority; lower values are admitted first.
 
         Returns:
             str: The generated response or an error fallback message.
+
+        Raises:
+            LLMUnavailableError: If the scheduler refuses the request (breaker open or queue full).
+            GenerationInterruptedError: If the response stream broke off part-way.
         """
-        for attempt in range(retries):
-            try:
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(self._call_llm, prompt)
-                    response_chunks = future.result(timeout=timeout)
-
-                # Collect streamed response
-                response = "".join(
-                    chunk.choices[0].delta.content
-                    for chunk in response_chunks
-                    if chunk.choices[0].delta.content
-                )
-
-                # Add assistant reply to history
-                self.chat_history.append({"role": "assistant", "content": response})
-                logger.info("Assistant response added to chat history.")
-                logger.debug(f"Updated chat history: {self.chat_history}")
-
-                return response
-
-            except TimeoutError:
-                logger.warning(f"[Attempt {attempt + 1}] LLM request timed out.")
-            except Exception as e:
-                logger.warning(f"[Attempt {attempt + 1}] LLM request failed: {e}")
-            time.sleep(delay)
+        return "".join(self.generate_stream(prompt, retries, delay, timeout, session_id, memory_text, priority))
 
-        return "Failed to generate a response after multiple attempts."
\ No newline at end of file
+    async def agenerate(self, prompt: str, retries: int = 3, delay: float = 1.5, timeout: float = None,
+                        session_id: str = DEFAULT_SESSION_ID, memory_text: str = None,
+                        priority: int = PRIORITY_INTERACTIVE) -> str:
+        """
+        Async version of generate().
+
+        Timeouts are enforced by cancelling the pending read, so no worker thread is left
+        running after a timeout.
+
+        Args:
+            Same as generate().
+
+        Returns:
+            str: The generated response or an error fallback message.
+        """
+        parts = []
+        async for content in self.agenerate_stream(prompt, retries, delay, timeout, session_id, memory_text, priority):
+            parts.append(content)
+        return "".join(parts)
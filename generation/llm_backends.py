@@ -0,0 +1,473 @@
+"""
+This module provides the chat-completion backends behind LLM, selected with LLM_BACKEND.
+
+    groq     Groq-hosted models through the Groq SDK (default, needs GROQ_API_KEY)
+    openai   Any OpenAI-compatible /chat/completions endpoint, e.g. a vLLM or llama.cpp
+             server at LLM_BASE_URL
+    mock     The deterministic local stand-in server (generation/mock_llm_server.py) at LLM_MOCK_URL
+
+Every backend streams response text fragments, both synchronously and with asyncio, keeps
+its HTTP connections pooled across requests and has its own timeout.
+
+When LLM_SECONDARY_BACKEND is set, the two backends are combined by HedgedBackend: if the
+primary has not produced its first token within the LLM_HEDGE_PERCENTILE of its recent
+time-to-first-token, the same request is sent to the secondary and whichever answers first
+is streamed; the other request is cancelled. A primary that fails before its first token
+fails over to the secondary immediately. This bounds tail latency when one provider degrades.
+The secondary request is admitted by the scheduler of its own kind of backend (see
+generation.llm.scheduler_for()): a hedge is only sent when there is capacity for it right
+away, and a fail-over waits for capacity. Only the primary draws on the LLM's scheduler.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+import httpx
+import numpy as np
+from groq import Groq, AsyncGroq
+from config import (
+    GROQ_API_KEY, LLM_BACKEND, LLM_MODEL_NAME, LLM_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_BASE_URL,
+    LLM_API_KEY, LLM_MOCK_URL, LLM_SECONDARY_BACKEND, LLM_SECONDARY_MODEL_NAME, LLM_SECONDARY_TIMEOUT,
+    LLM_HEDGE_PERCENTILE, LLM_EXPECTED_COMPLETION_TOKENS,
+)
+from generation.session_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class LLMBackend(abc.ABC):
+    """
+    Base class of all chat-completion backends.
+
+    Attributes:
+        model_name (str): Model requested from the provider.
+        timeout (float): Default per-request timeout in seconds.
+        rate_limited (bool): Whether the provider enforces request/token quotas, so calls
+            must go through the rate-limited scheduler.
+
+    Methods:
+        stream(messages, timeout=None, **params) -> Iterator[str]
+        astream(messages, timeout=None, **params) -> AsyncIterator[str]
+        bind_scheduler(scheduler_for) -> None
+    """
+
+    name = "base"
+    rate_limited = True
+
+    def __init__(self, model_name: str, timeout: float = LLM_TIMEOUT):
+        self.model_name = model_name
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def stream(self, messages: list, timeout: float = None, **params):
+        """Yields the response text fragments of one chat completion."""
+
+    @abc.abstractmethod
+    async def astream(self, messages: list, timeout: float = None, **params):
+        """Async version of stream()."""
+        yield
+
+    def bind_scheduler(self, scheduler_for) -> None:
+        """
+        Called by LLM with a function that returns the scheduler admitting a given backend's
+        requests; unused by single backends, whose requests LLM admits itself.
+        """
+
+
+class GroqBackend(LLMBackend):
+    """Groq-hosted models. The SDK clients pool their HTTP connections."""
+
+    name = "groq"
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, api_key: str = GROQ_API_KEY, timeout: float = LLM_TIMEOUT):
+        if not api_key:
+            raise ValueError("GROQ_API_KEY is not set. Please check your environment configuration.")
+        super().__init__(model_name, timeout)
+        self.api_key = api_key
+        # Retries are owned by LLM and the shared scheduler; SDK retries would multiply them
+        self.client = Groq(api_key=api_key, max_retries=0)
+        self.async_client = None  # created on first async call, inside the running event loop
+
+    def stream(self, messages: list, timeout: float = None, **params):
+        response = self.client.chat.completions.create(
+            model=self.model_name, messages=messages, stream=True, timeout=timeout or self.timeout, **params
+        )
+        for chunk in response:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+    async def astream(self, messages: list, timeout: float = None, **params):
+        if self.async_client is None:
+            self.async_client = AsyncGroq(api_key=self.api_key, max_retries=0)
+        response = await self.async_client.chat.completions.create(
+            model=self.model_name, messages=messages, stream=True, timeout=timeout or self.timeout, **params
+        )
+        async for chunk in response:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+
+def parse_sse_line(line: str):
+    """
+    Parses one line of an OpenAI-style server-sent event stream.
+
+    Returns:
+        The delta content of a "data:" line, _END for "data: [DONE]", or None for anything else.
+    """
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _END
+    try:
+        return json.loads(data)["choices"][0]["delta"].get("content")
+    except (ValueError, KeyError, IndexError, TypeError):
+        logger.debug(f"Ignoring malformed stream line: {line!r}")
+        return None
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Streaming client for OpenAI-compatible servers (vLLM, llama.cpp server, ...).
+
+    Uses one pooled httpx client per backend (and one async client per backend, created
+    inside the running event loop), so connections are reused across requests.
+    """
+
+    name = "openai"
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, base_url: str = LLM_BASE_URL, api_key: str = LLM_API_KEY,
+                 timeout: float = LLM_TIMEOUT, max_connections: int = LLM_MAX_CONNECTIONS):
+        super().__init__(model_name, timeout)
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        # Hosted providers need a key and meter usage; a keyless local server (vLLM, llama.cpp) does not
+        self.rate_limited = bool(api_key)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.Client(base_url=self.base_url, headers=self.headers, limits=self.limits, timeout=timeout)
+        self.async_client = None
+
+    def _payload(self, messages: list, params: dict) -> dict:
+        return {"model": self.model_name, "messages": messages, "stream": True, **params}
+
+    def stream(self, messages: list, timeout: float = None, **params):
+        with self.client.stream("POST", "/chat/completions", json=self._payload(messages, params),
+                                timeout=timeout or self.timeout) as response:
+            if response.status_code >= 400:
+                response.read()
+                response.raise_for_status()
+            for line in response.iter_lines():
+                content = parse_sse_line(line)
+                if content is _END:
+                    return
+                if content:
+                    yield content
+
+    async def astream(self, messages: list, timeout: float = None, **params):
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(base_url=self.base_url, headers=self.headers,
+                                                  limits=self.limits, timeout=self.timeout)
+        async with self.async_client.stream("POST", "/chat/completions", json=self._payload(messages, params),
+                                            timeout=timeout or self.timeout) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                content = parse_sse_line(line)
+                if content is _END:
+                    return
+                if content:
+                    yield content
+
+
+class MockBackend(OpenAICompatibleBackend):
+    """OpenAI-compatible client pointed at the local mock server (python -m generation.mock_llm_server)."""
+
+    name = "mock"
+
+    def __init__(self, model_name: str = "mock", base_url: str = LLM_MOCK_URL, timeout: float = LLM_TIMEOUT,
+                 max_connections: int = LLM_MAX_CONNECTIONS):
+        super().__init__(model_name, base_url, None, timeout, max_connections)
+
+
+class HedgedBackend(LLMBackend):
+    """
+    Races a secondary backend against a slow primary.
+
+    The hedge delay is the `percentile` of the primary's recent time-to-first-token (the
+    last `window` requests); until `min_samples` are collected, `initial_delay` is used.
+    When the primary loses a race, the time it had been waiting is recorded, so a degraded
+    primary pushes the percentile up instead of hiding its slow requests.
+
+    Attributes:
+        primary (LLMBackend), secondary (LLMBackend)
+        rate_limited (bool): Whether the primary is rate-limited; the secondary is admitted
+            separately, by its own scheduler.
+        scheduler (Optional[LLMScheduler]): Admits the secondary request; bound by LLM.
+    """
+
+    name = "hedged"
+
+    def __init__(self, primary: LLMBackend, secondary: LLMBackend, percentile: float = LLM_HEDGE_PERCENTILE,
+                 window: int = 200, min_samples: int = 20, initial_delay: float = None):
+        # Worst case: the primary fails at its timeout and the secondary uses all of its own
+        super().__init__(primary.model_name, primary.timeout + secondary.timeout)
+        self.primary = primary
+        self.secondary = secondary
+        # LLM admits every request for the primary; the secondary has its own scheduler
+        self.rate_limited = primary.rate_limited
+        self.scheduler = None
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay if initial_delay is not None else primary.timeout / 2
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.secondary_wins = 0
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary's first token before sending the hedge request."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial_delay
+            return float(np.percentile(self._samples, self.percentile))
+
+    def _record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def bind_scheduler(self, scheduler_for) -> None:
+        self.scheduler = scheduler_for(self.secondary)
+
+    def _reservation(self, messages: list) -> float:
+        return sum(estimate_tokens(m["content"]) for m in messages) + LLM_EXPECTED_COMPLETION_TOKENS
+
+    def _admit_secondary(self, messages: list, max_wait: float = None):
+        """Reserves scheduler capacity for the secondary request; None if it was refused."""
+        if self.scheduler is None:
+            return 0.0
+        return self.scheduler.try_acquire(self._reservation(messages), max_wait=max_wait)
+
+    async def _aadmit_secondary(self, messages: list, max_wait: float = None):
+        if self.scheduler is None:
+            return 0.0
+        return await self.scheduler.atry_acquire(self._reservation(messages), max_wait=max_wait)
+
+    def _release_secondary(self, messages: list, reserved, answer: list):
+        if self.scheduler is not None and reserved:
+            used = sum(estimate_tokens(m["content"]) for m in messages) + estimate_tokens("".join(answer))
+            self.scheduler.release(reserved, used)
+
+    def _settle_race(self, label: str, started: float, hedged: bool):
+        """Bookkeeping once a backend has produced the first token (or finished)."""
+        if label == "primary":
+            self._record(time.monotonic() - started)
+        else:
+            self.secondary_wins += 1
+            if hedged:
+                self._record(time.monotonic() - started)
+            logger.info(f"[LLM] Secondary backend '{self.secondary.name}' answered first.")
+
+    def stream(self, messages: list, timeout: float = None, **params):
+        results = queue.Queue()
+        stopped = {"primary": threading.Event(), "secondary": threading.Event()}
+        backends = {"primary": self.primary, "secondary": self.secondary}
+
+        def pump(label):
+            fragments = backends[label].stream(messages, timeout, **params)
+            try:
+                for content in fragments:
+                    if stopped[label].is_set():
+                        return
+                    results.put((label, content, None))
+                results.put((label, _END, None))
+            except Exception as e:
+                results.put((label, None, e))
+            finally:
+                fragments.close()
+
+        def start(label):
+            threading.Thread(target=pump, args=(label,), daemon=True).start()
+
+        started = time.monotonic()
+        hedge_at = started + self.hedge_delay()
+        running, errors, winner, hedged = {"primary"}, {}, None, False
+        # Scheduler reservation of the secondary request (None: not sent) and its answer
+        reserved, answer = None, []
+        start("primary")
+        try:
+            while True:
+                if winner is None and reserved is None and "secondary" not in errors and hedge_at is not None:
+                    try:
+                        label, content, error = results.get(timeout=max(0.0, hedge_at - time.monotonic()))
+                    except queue.Empty:
+                        hedge_at = None
+                        reserved = self._admit_secondary(messages, max_wait=0)
+                        if reserved is None:
+                            logger.info("[LLM] No scheduler capacity for a hedge request. Waiting for the primary.")
+                            continue
+                        logger.info(f"[LLM] Primary slower than {self.hedge_delay():.2f}s. Hedging to '{self.secondary.name}'.")
+                        self.hedges += 1
+                        hedged = True
+                        running.add("secondary")
+                        start("secondary")
+                        continue
+                else:
+                    label, content, error = results.get()
+
+                if winner is not None and label != winner:
+                    continue
+                if error is not None:
+                    if winner is not None:
+                        raise error
+                    errors[label] = error
+                    running.discard(label)
+                    logger.warning(f"[LLM] Backend '{backends[label].name}' failed: {error}")
+                    if label == "primary" and reserved is None:
+                        reserved = self._admit_secondary(messages)
+                        if reserved is not None:
+                            running.add("secondary")
+                            start("secondary")
+                    if not running:
+                        raise errors["primary"] if "primary" in errors else error
+                    continue
+                if winner is None:
+                    winner = label
+                    self._settle_race(label, started, hedged)
+                    for other in running - {label}:
+                        stopped[other].set()
+                if content is _END:
+                    return
+                if label == "secondary":
+                    answer.append(content)
+                yield content
+        finally:
+            for event in stopped.values():
+                event.set()
+            self._release_secondary(messages, reserved, answer)
+
+    async def astream(self, messages: list, timeout: float = None, **params):
+        results = asyncio.Queue()
+        backends = {"primary": self.primary, "secondary": self.secondary}
+        tasks = {}
+
+        async def pump(label):
+            try:
+                async for content in backends[label].astream(messages, timeout, **params):
+                    await results.put((label, content, None))
+                await results.put((label, _END, None))
+            except Exception as e:
+                await results.put((label, None, e))
+
+        def start(label):
+            tasks[label] = asyncio.create_task(pump(label))
+
+        started = time.monotonic()
+        hedge_at = started + self.hedge_delay()
+        errors, winner, hedged = {}, None, False
+        reserved, answer = None, []
+        start("primary")
+        try:
+            while True:
+                if winner is None and "secondary" not in tasks and hedge_at is not None:
+                    try:
+                        label, content, error = await asyncio.wait_for(
+                            results.get(), timeout=max(0.0, hedge_at - time.monotonic())
+                        )
+                    except asyncio.TimeoutError:
+                        hedge_at = None
+                        reserved = await self._aadmit_secondary(messages, max_wait=0)
+                        if reserved is None:
+                            logger.info("[LLM] No scheduler capacity for a hedge request. Waiting for the primary.")
+                            continue
+                        logger.info(f"[LLM] Primary slower than {self.hedge_delay():.2f}s. Hedging to '{self.secondary.name}'.")
+                        self.hedges += 1
+                        hedged = True
+                        start("secondary")
+                        continue
+                else:
+                    label, content, error = await results.get()
+
+                if winner is not None and label != winner:
+                    continue
+                if error is not None:
+                    if winner is not None:
+                        raise error
+                    errors[label] = error
+                    logger.warning(f"[LLM] Backend '{backends[label].name}' failed: {error}")
+                    if label == "primary" and "secondary" not in tasks:
+                        reserved = await self._aadmit_secondary(messages)
+                        if reserved is not None:
+                            start("secondary")
+                    if len(errors) == len(tasks):
+                        raise errors["primary"] if "primary" in errors else error
+                    continue
+                if winner is None:
+                    winner = label
+                    self._settle_race(label, started, hedged)
+                    for other, task in tasks.items():
+                        if other != label:
+                            task.cancel()
+                if content is _END:
+                    return
+                if label == "secondary":
+                    answer.append(content)
+                yield content
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            self._release_secondary(messages, reserved, answer)
+
+
+LLM_BACKENDS = {
+    GroqBackend.name: GroqBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend,
+    MockBackend.name: MockBackend,
+}
+
+
+def create_llm_backend(backend: str = LLM_BACKEND, model_name: str = LLM_MODEL_NAME, **kwargs) -> LLMBackend:
+    """
+    Instantiates an LLM backend by name.
+
+    Args:
+        backend (str): Key of LLM_BACKENDS ("groq", "openai" or "mock").
+        model_name (str): Model identifier passed to the backend.
+        **kwargs: Backend-specific options (api_key, base_url, timeout, ...).
+
+    Returns:
+        LLMBackend: The initialized backend.
+    """
+    backend = (backend or "groq").lower()
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}'. Choose from {sorted(LLM_BACKENDS)}.")
+    if backend == MockBackend.name:
+        kwargs.pop("api_key", None)
+        model_name = model_name or "mock"
+    return LLM_BACKENDS[backend](model_name=model_name, **kwargs)
+
+
+def build_llm_backend(model_name: str = LLM_MODEL_NAME, api_key: str = None) -> LLMBackend:
+    """
+    Builds the configured backend: LLM_BACKEND, hedged with LLM_SECONDARY_BACKEND if set.
+
+    Args:
+        model_name (str): Model of the primary backend.
+        api_key (str): Groq API key, used when the primary backend is Groq.
+    """
+    kwargs = {"api_key": api_key} if LLM_BACKEND.lower() == GroqBackend.name else {}
+    primary = create_llm_backend(LLM_BACKEND, model_name, **kwargs)
+    if not LLM_SECONDARY_BACKEND:
+        return primary
+    secondary = create_llm_backend(LLM_SECONDARY_BACKEND, LLM_SECONDARY_MODEL_NAME, timeout=LLM_SECONDARY_TIMEOUT)
+    logger.info(f"Hedging LLM backend '{primary.name}' with '{secondary.name}'.")
+    return HedgedBackend(primary, secondary)
@@ -0,0 +1,140 @@
+"""
+This module provides a deterministic, OpenAI-compatible chat-completion server for local runs,
+tests and load tests (LLM_BACKEND=mock), so the RAG pipeline can be exercised without a
+provider account or network access.
+
+POST /v1/chat/completions streams server-sent events like the real APIs. The answer is
+derived from the last user message only, so the same prompt always produces the same
+tokens; latency is simulated with a time-to-first-token delay and a per-token delay.
+Setting fail_every=N makes every N-th request return HTTP 429 with a retry-after header.
+
+Usage:
+    python -m generation.mock_llm_server --port 8765 --first-token-delay 0.2 --token-delay 0.01
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.mock_http import MockServer, serve_in_background
+
+logger = logging.getLogger(__name__)
+
+VOCABULARY = ("the", "admission", "programme", "candidates", "must", "apply", "before", "deadline",
+              "with", "valid", "GATE", "score", "and", "required", "documents", "for", "M.Tech")
+
+
+def mock_answer(prompt: str, tokens: int = 32) -> list:
+    """Deterministic list of answer tokens for a prompt."""
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    words = [VOCABULARY[(seed >> (4 * i)) % len(VOCABULARY)] for i in range(tokens)]
+    return [word + ("." if i == tokens - 1 else " ") for i, word in enumerate(words)]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_event(self, data: str):
+        event = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.mock_config
+
+        if config["fail_every"] and next(self.server.request_counter) % config["fail_every"] == 0:
+            self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"retry-after": "1"})
+            return
+
+        user_messages = [m["content"] for m in body.get("messages", []) if m.get("role") == "user"]
+        tokens = mock_answer(user_messages[-1] if user_messages else "", config["tokens"])
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            time.sleep(config["first_token_delay"] + config["token_delay"] * len(tokens))
+            self._send_json(200, {"model": model, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+            ]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(config["first_token_delay"])
+        try:
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(config["token_delay"])
+                self._write_event(json.dumps({"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}))
+            self._write_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled the request (e.g. it lost a hedged race)
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, first_token_delay: float = 0.0,
+                  token_delay: float = 0.0, tokens: int = 32, fail_every: int = 0) -> ThreadingHTTPServer:
+    """
+    Creates (but does not start) a mock server. port=0 picks a free port; see server.server_address.
+    """
+    server = MockServer((host, port), MockLLMHandler)
+    server.mock_config = {"first_token_delay": first_token_delay, "token_delay": token_delay,
+                          "tokens": tokens, "fail_every": fail_every}
+    server.request_counter = itertools.count(1)
+    return server
+
+
+def start_in_background(port: int = 0, **kwargs):
+    """
+    Starts a mock server in a daemon thread, on a free port unless one is given.
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: The server (call shutdown() and server_close() when
+            done) and its /v1 base URL.
+    """
+    server = create_server(port=port, **kwargs)
+    return server, f"{serve_in_background(server)}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible mock LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="Seconds before the first token.")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between tokens.")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per answer.")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every N-th request with HTTP 429.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = create_server(args.host, args.port, args.first_token_delay, args.token_delay, args.tokens, args.fail_every)
+    logger.info(f"Mock LLM server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,21 +6,108 @@ The prompt is loaded from an external template file (prompt_template.txt) to all
 easy modification and configuration. The template instructs an AI assistant to 
 generate clear and concise responses based on contextual information and a 
 user-provided question.
+
+Templates are compiled once by a shared PromptRegistry and only recompiled when the file's
+modification time changes, so editing a template takes effect without a restart while
+requests never re-read or re-compile an unchanged template. Besides the default template,
+named templates (e.g. per document section) live in generation/prompts/<name>.txt. The set
+of available names is listed once and refreshed only when a template directory changes, so a
+section without a template falls back to the default without a failed lookup per request.
 """
 
 
 import os
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATE_DIR = os.path.dirname(__file__)
+NAMED_TEMPLATE_DIR = os.path.join(TEMPLATE_DIR, "prompts")
+DEFAULT_TEMPLATE = "default"
+DEFAULT_TEMPLATE_FILE = "prompt_template.txt"
+
+
+class PromptRegistry:
+    """
+    Named, compiled-once Jinja2 templates with mtime-based hot reload.
+
+    Attributes:
+        template_dirs (List[str]): Directories searched for "<name>.txt", in order.
 
-def build_prompt(context: str, question: str) -> str:
+    Methods:
+        get(name: str) -> jinja2.Template
+        has(name: str) -> bool
+        resolve(name: str) -> str
+        render(name: str, **variables) -> str
+        names() -> List[str]
+    """
+
+    def __init__(self, template_dirs=(NAMED_TEMPLATE_DIR, TEMPLATE_DIR)):
+        self.template_dirs = list(template_dirs)
+        # auto_reload: a cached template is reused until its file's mtime changes
+        self._env = Environment(loader=FileSystemLoader(self.template_dirs), auto_reload=True, cache_size=-1)
+        self._dirs_key = None
+        self._available = frozenset()
+
+    @staticmethod
+    def _filename(name: str) -> str:
+        return DEFAULT_TEMPLATE_FILE if name == DEFAULT_TEMPLATE else f"{name}.txt"
+
+    def get(self, name: str = DEFAULT_TEMPLATE):
+        """
+        Returns the compiled template, compiling it on first use or after the file changed.
+
+        Raises:
+            jinja2.TemplateNotFound: If no file exists for the name.
+        """
+        return self._env.get_template(self._filename(name))
+
+    def has(self, name: str) -> bool:
+        """Whether a template with this name exists."""
+        filename = self._filename(name)
+        return any(os.path.exists(os.path.join(d, filename)) for d in self.template_dirs)
+
+    def _dirs_version(self) -> tuple:
+        version = ()
+        for directory in self.template_dirs:
+            try:
+                version += (os.stat(directory).st_mtime_ns,)
+            except OSError:
+                version += (None,)
+        return version
+
+    def resolve(self, name: str) -> str:
+        """
+        The name itself if it has a template, else DEFAULT_TEMPLATE. Available names are
+        re-listed only when a template directory's mtime changes (a file added or removed).
+        """
+        version = self._dirs_version()
+        if version != self._dirs_key:
+            self._available = frozenset(self.names())
+            self._dirs_key = version
+        return name if name in self._available else DEFAULT_TEMPLATE
+
+    def render(self, name: str = DEFAULT_TEMPLATE, **variables) -> str:
+        """Renders a named template with the given variables."""
+        return self.get(name).render(**variables)
+
+    def names(self) -> list:
+        """Names of all available templates."""
+        names = {DEFAULT_TEMPLATE} if self.has(DEFAULT_TEMPLATE) else set()
+        for directory in self.template_dirs:
+            if directory != TEMPLATE_DIR and os.path.isdir(directory):
+                names.update(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith(".txt"))
+        return sorted(names)
+
+
+prompt_registry = PromptRegistry()
+
+
+def build_prompt(context: str, question: str, template_name: str = DEFAULT_TEMPLATE) -> str:
     """
     Builds a prompt using a Jinja2 template located in the same folder.
+
+    Args:
+        context (str): Retrieved context.
+        question (str): User question.
+        template_name (str): Named template to use; unknown names fall back to the default.
     """
-    # Path to the template file relative to this script's location
-    template_path = os.path.join(os.path.dirname(__file__), "prompt_template.txt")
-    
-    with open(template_path, "r") as file:
-        template_str = file.read()
-
-    template = Template(template_str)
-    return template.render(context=context, question=question)
+    return prompt_registry.get(prompt_registry.resolve(template_name)).render(context=context, question=question)
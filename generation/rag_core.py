@@ -1,10 +1,261 @@
-from generation.prompt_utils import build_prompt
+from generation.prompt_utils import build_prompt, DEFAULT_TEMPLATE
+from generation.llm import GENERATION_FAILED_MESSAGE, LLMUnavailableError, GenerationInterruptedError
+from generation.context_builder import build_context
+from generation.telemetry import span, record, annotate, record_cache_lookup
+from retrieval.query_understanding import infer_facets
+from config import METADATA_FILTERING_ENABLED, FALLBACK_CACHE_THRESHOLD
+import asyncio
+import functools
+import inspect
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def answer_query(user_query: str, embedding_model, vectorstore, llm) -> str:
+LLM_UNAVAILABLE_MESSAGE = ("The assistant is receiving a lot of questions right now. "
+                           "Please try again in a minute.")
+
+INTERRUPTED_MESSAGE = " [The answer was cut off. Please ask again.]"
+
+EMPTY_QUERY_MESSAGE = "Please enter a valid question. The query cannot be empty or just spaces."
+MISSING_COMPONENTS_MESSAGE = "Internal error: Missing RAG components."
+EMBEDDING_ERROR_MESSAGE = "Failed to process your question due to an embedding error."
+RETRIEVAL_ERROR_MESSAGE = "Sorry, I couldn't access the knowledge base at the moment."
+NO_CONTEXT_MESSAGE = "Sorry, I couldn't find any relevant information."
+INVALID_LLM_MESSAGE = "Internal error: LLM configuration is invalid."
+GENERATION_ERROR_MESSAGE = "Sorry, something went wrong while generating the response. Please try again later."
+
+
+@functools.lru_cache(maxsize=256)
+def _accepted_kwargs(function):
+    """
+    Names of the keyword arguments a retriever method accepts, or None if it takes any.
+    Resolved once per method (the cache is keyed on the underlying function, shared by every
+    instance of a retriever class), not on every query.
+    """
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return None
+    return frozenset(p.name for p in parameters)
+
+
+def _retrieval_kwargs(retrieve, user_query: str, top_k: int = None) -> dict:
+    """
+    Optional keyword arguments for a retriever method: metadata filters inferred from the
+    question (when METADATA_FILTERING_ENABLED), the raw question for hybrid search and, when
+    reranking, the number of candidates to over-fetch. Only arguments the method accepts are
+    returned, so plain retrievers keep working.
+    """
+    kwargs = {"query_text": user_query}
+    if top_k is not None:
+        kwargs["top_k"] = top_k
+    if METADATA_FILTERING_ENABLED:
+        facets = infer_facets(user_query)
+        if facets:
+            logger.info(f"Inferred query facets: {facets}")
+            kwargs["filters"] = facets
+
+    try:
+        accepted = _accepted_kwargs(getattr(retrieve, "__func__", retrieve))
+    except TypeError:
+        # Unhashable callable: introspect it directly
+        accepted = _accepted_kwargs.__wrapped__(retrieve)
+    if accepted is None:
+        return kwargs
+    return {name: value for name, value in kwargs.items() if name in accepted}
+
+
+def _template_name(user_query: str) -> str:
+    """Per-section prompt template for the question (e.g. "fees"), or the default one."""
+    section = infer_facets(user_query).get("section")
+    return section.lower().replace(" ", "_") if section else DEFAULT_TEMPLATE
+
+
+def _note_collections(docs: list) -> list:
+    """Records on the trace which collections answered (set by CollectionRouter)."""
+    collections = sorted({d["collection"] for d in docs if d.get("collection")})
+    if collections:
+        annotate(collections=",".join(collections))
+    return docs
+
+
+def _retrieve(vectorstore, query_embedding, user_query: str, top_k: int = None) -> list:
+    """
+    Retrieves chunks as {"text", "distance"} dicts, using retrieve_scored() when the vector
+    store provides distances and retrieve_documents() otherwise.
+    """
+    retrieve = getattr(vectorstore, "retrieve_scored", None)
+    if retrieve is not None:
+        return _note_collections(retrieve(query_embedding, **_retrieval_kwargs(retrieve, user_query, top_k)))
+    docs = vectorstore.retrieve_documents(
+        query_embedding, **_retrieval_kwargs(vectorstore.retrieve_documents, user_query, top_k)
+    )
+    return [{"text": doc, "distance": None} for doc in docs]
+
+
+def _session_cache(cache, llm, session_id: str = None):
+    """
+    The answer cache to use for a request. Answers to follow-up questions are generated from
+    the conversation's history, so they are neither served from nor stored in the shared
+    cache; only the first question of a conversation (or one without a session) uses it.
+    """
+    memory = getattr(llm, "memory", None)
+    if cache is None or not session_id or memory is None:
+        return cache
+    return None if memory.get_history(session_id) else cache
+
+
+def _cache_hit(answer: str, tier: str, llm, session_id: str, user_query: str) -> str:
+    """Serves a cached answer and records the exchange in the conversation's memory."""
+    logger.info(f"Answer served from {tier} cache.")
+    memory = getattr(llm, "memory", None)
+    if session_id and memory is not None:
+        memory.add_turn(session_id, user_query, answer)
+    return answer
+
+
+def _fallback_answer(user_query: str, query_embedding, cache=None, fallback=None) -> str:
+    """
+    Answer served when the LLM scheduler fails fast: a cached answer to a similar question
+    (with a looser similarity threshold than normal cache hits), else the caller's fallback
+    (e.g. a FAQ match with a lower score threshold), else a "try again" message.
+    """
+    annotate(route="fallback")
+    if cache is not None and query_embedding:
+        cached_answer = cache.get_semantic(query_embedding, threshold=FALLBACK_CACHE_THRESHOLD)
+        if cached_answer is not None:
+            logger.info("LLM unavailable. Answer served from semantic cache.")
+            return cached_answer
+    if fallback is not None:
+        try:
+            answer = fallback(user_query)
+        except Exception:
+            logger.exception("Error in fallback answer.")
+            answer = None
+        if answer:
+            logger.info("LLM unavailable. Answer served from fallback.")
+            return answer
+    return LLM_UNAVAILABLE_MESSAGE
+
+
+async def _aretrieve(vectorstore, query_embedding, user_query: str, top_k: int = None) -> list:
+    """Async version of _retrieve()."""
+    if hasattr(vectorstore, "aretrieve_scored") or hasattr(vectorstore, "retrieve_scored"):
+        retrieve = getattr(vectorstore, "aretrieve_scored", None) or vectorstore.retrieve_scored
+        return _note_collections(await _call_async(vectorstore, "aretrieve_scored", "retrieve_scored", query_embedding,
+                                                   **_retrieval_kwargs(retrieve, user_query, top_k)))
+    retrieve = getattr(vectorstore, "aretrieve_documents", None) or vectorstore.retrieve_documents
+    docs = await _call_async(vectorstore, "aretrieve_documents", "retrieve_documents", query_embedding,
+                             **_retrieval_kwargs(retrieve, user_query, top_k))
+    return [{"text": doc, "distance": None} for doc in docs]
+
+
+def _rerank(reranker, user_query: str, docs: list) -> list:
+    """
+    Keeps the reranker's choice of the retrieved chunks and notes on the trace whether it
+    reranked them or skipped to stay within its latency budget. A failing reranker falls
+    back to the retrieval order.
+    """
+    try:
+        with span("rerank"):
+            reranked = reranker.rerank(user_query, docs)
+    except Exception:
+        logger.exception("Error reranking documents. Using retrieval order.")
+        return docs[:reranker.top_n]
+    annotate(rerank="applied" if reranked and "rerank_score" in reranked[0] else "skipped")
+    return reranked
+
+
+async def _arerank(reranker, user_query: str, docs: list) -> list:
+    """Async version of _rerank(); the forward pass runs in a worker thread."""
+    return await asyncio.to_thread(_rerank, reranker, user_query, docs)
+
+
+def _check_request(user_query: str, embedding_model, vectorstore, llm, cache, session_id: str = None):
+    """
+    The steps before any I/O: validates the request and looks the question up in the exact
+    cache. Returns the final answer when the request ends here, else None.
+    """
+    if user_query is None or not user_query.strip():
+        logger.warning("Empty or whitespace-only query received.")
+        return EMPTY_QUERY_MESSAGE
+
+    if not all([embedding_model, vectorstore, llm]):
+        logger.error("One or more RAG components are missing (embedding model, vectorstore, or LLM).")
+        return MISSING_COMPONENTS_MESSAGE
+
+    if cache is not None:
+        cached_answer = cache.get_exact(user_query)
+        record_cache_lookup("exact", cached_answer is not None)
+        if cached_answer is not None:
+            return _cache_hit(cached_answer, "exact", llm, session_id, user_query)
+    return None
+
+
+def _semantic_hit(cache, query_embedding, llm, session_id: str, user_query: str):
+    """A cached answer to a similar question, or None."""
+    if cache is None or not query_embedding:
+        return None
+    cached_answer = cache.get_semantic(query_embedding)
+    record_cache_lookup("semantic", cached_answer is not None)
+    if cached_answer is None:
+        return None
+    return _cache_hit(cached_answer, "semantic", llm, session_id, user_query)
+
+
+def _prepare_prompt(docs: list, user_query: str):
+    """
+    Builds the context and the prompt from the retrieved chunks.
+
+    Returns:
+        tuple: (final_answer, prompt). final_answer is set when there is nothing to send
+            to the LLM (no usable context, or the prompt could not be built).
+    """
+    try:
+        with span("prompt_build"):
+            context = build_context(docs)
+            prompt = build_prompt(context, user_query, _template_name(user_query)) if context else None
+    except Exception as e:
+        logger.exception("Error building prompt.")
+        return GENERATION_ERROR_MESSAGE, None
+    if prompt is None:
+        logger.warning("No documents found for the query.")
+        return NO_CONTEXT_MESSAGE, None
+    return None, prompt
+
+
+def _memory_kwargs(session_id: str, user_query: str) -> dict:
+    """Generation arguments that keep chat memory for the conversation, if there is one."""
+    return {"session_id": session_id, "memory_text": user_query} if session_id else {}
+
+
+def _store_answer(raw_answer: str, user_query: str, query_embedding, cache) -> str:
+    """Final answer from the LLM output, cached unless generation failed."""
+    logger.info("LLM response generated successfully.")
+    answer = raw_answer.strip()
+    if cache is not None and answer and answer != GENERATION_FAILED_MESSAGE:
+        cache.put(user_query, query_embedding, answer)
+    return answer
+
+
+def _generation_error(error: Exception, user_query: str, query_embedding, cache, fallback) -> str:
+    """Answer served when generation raised `error`."""
+    if isinstance(error, LLMUnavailableError):
+        logger.warning(f"LLM unavailable: {error}")
+        return _fallback_answer(user_query, query_embedding, cache, fallback)
+    if isinstance(error, AttributeError):
+        logger.exception("LLM object is missing the required 'generate()' method.", exc_info=error)
+        return INVALID_LLM_MESSAGE
+    logger.exception("Error during LLM response generation.", exc_info=error)
+    return GENERATION_ERROR_MESSAGE
+
+
+def answer_query(user_query: str, embedding_model, vectorstore, llm, session_id: str = None, cache=None,
+                 fallback=None, reranker=None) -> str:
     """
     Generates an answer to the user query using provided components.
 
@@ -13,56 +264,190 @@ def answer_query(user_query: str, embedding_model, vectorstore, llm) -> str:
         embedding_model: Embedding model instance with embed_query().
         vectorstore: Vector store retriever with retrieve_documents().
         llm: LLM model with generate() method.
+        session_id (str): Conversation identifier (Rasa sender_id). When given, the LLM keeps
+            chat memory for this conversation only and remembers the question, not the full prompt.
+        cache: Optional AnswerCache. Exact hits skip the whole pipeline; semantic hits skip
+            retrieval and generation. Follow-up questions in a session with history bypass it.
+        fallback (Callable[[str], Optional[str]]): Answers the question without the LLM when the
+            LLM scheduler fails fast (circuit open or queue full), e.g. a relaxed FAQ match.
+        reranker: Optional CrossEncoderReranker. When given, reranker.candidates chunks are
+            retrieved and only the reranker's top_n reach the prompt.
 
     Returns:
         str: Final generated answer.
     """
-
-    # Early validation: Ensure user query is not empty or only whitespace
-    if user_query is None or not user_query.strip():
-        logger.warning("Empty or whitespace-only query received.")
-        return "Please enter a valid question. The query cannot be empty or just spaces."
-
-    # Validate dependencies
-    if not all([embedding_model, vectorstore, llm]):
-        logger.error("One or more RAG components are missing (embedding model, vectorstore, or LLM).")
-        return "Internal error: Missing RAG components."
+    cache = _session_cache(cache, llm, session_id)
+    final_answer = _check_request(user_query, embedding_model, vectorstore, llm, cache, session_id)
+    if final_answer is not None:
+        return final_answer
 
     # Generate query embedding
     try:
         logger.info("Embedding user query...")
-        query_embedding = embedding_model.embed_query(user_query)
+        with span("embed"):
+            query_embedding = embedding_model.embed_query(user_query)
         logger.info("Query embedding generated.")
     except Exception as e:
         logger.exception("Error embedding query.")
-        return "Failed to process your question due to an embedding error."
+        return EMBEDDING_ERROR_MESSAGE
+
+    final_answer = _semantic_hit(cache, query_embedding, llm, session_id, user_query)
+    if final_answer is not None:
+        return final_answer
 
     # Retrieve documents
     try:
         logger.info("Retrieving documents from vector store...")
-        docs = vectorstore.retrieve_documents(query_embedding)
+        with span("retrieve"):
+            docs = _retrieve(vectorstore, query_embedding, user_query, reranker.candidates if reranker else None)
         logger.info(f"Retrieved {len(docs)} documents.")
     except Exception as e:
         logger.exception("Error retrieving documents from vectorstore.")
-        return "Sorry, I couldn't access the knowledge base at the moment."
+        return RETRIEVAL_ERROR_MESSAGE
 
-    if not docs:
-        logger.warning("No documents found for the query.")
-        return "Sorry, I couldn't find any relevant information."
+    if reranker is not None and docs:
+        docs = _rerank(reranker, user_query, docs)
+
+    final_answer, prompt = _prepare_prompt(docs, user_query)
+    if final_answer is not None:
+        return final_answer
+
+    # Get answer
+    try:
+        logger.info("Generating response from LLM...")
+        with span("generation"):
+            raw_answer = llm.generate(prompt, **_memory_kwargs(session_id, user_query))
+    except Exception as e:
+        return _generation_error(e, user_query, query_embedding, cache, fallback)
+    return _store_answer(raw_answer, user_query, query_embedding, cache)
+
+
+async def _call_async(component, async_method: str, sync_method: str, *args, **kwargs):
+    """
+    Awaits the component's native async method, or runs its sync method in a worker thread
+    for components that have no async variant.
+    """
+    method = getattr(component, async_method, None)
+    if method is not None:
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(getattr(component, sync_method), *args, **kwargs)
+
+
+async def _aprepare_prompt(user_query: str, embedding_model, vectorstore, llm, cache=None, reranker=None,
+                           session_id: str = None):
+    """
+    Async version of the steps of answer_query() up to prompt construction. `cache` is the
+    cache returned by _session_cache() for the request.
+
+    Returns:
+        tuple: (final_answer, prompt, query_embedding). final_answer is set when the request
+            can be answered without the LLM (validation errors, cache hits, retrieval failures);
+            otherwise it is None and prompt holds the text to send to the LLM.
+    """
+    final_answer = _check_request(user_query, embedding_model, vectorstore, llm, cache, session_id)
+    if final_answer is not None:
+        return final_answer, None, None
+
+    try:
+        logger.info("Embedding user query...")
+        with span("embed"):
+            query_embedding = await _call_async(embedding_model, "aembed_query", "embed_query", user_query)
+        logger.info("Query embedding generated.")
+    except Exception as e:
+        logger.exception("Error embedding query.")
+        return EMBEDDING_ERROR_MESSAGE, None, None
+
+    final_answer = _semantic_hit(cache, query_embedding, llm, session_id, user_query)
+    if final_answer is not None:
+        return final_answer, None, None
+
+    try:
+        logger.info("Retrieving documents from vector store...")
+        with span("retrieve"):
+            docs = await _aretrieve(vectorstore, query_embedding, user_query, reranker.candidates if reranker else None)
+        logger.info(f"Retrieved {len(docs)} documents.")
+    except Exception as e:
+        logger.exception("Error retrieving documents from vectorstore.")
+        return RETRIEVAL_ERROR_MESSAGE, None, None
+
+    if reranker is not None and docs:
+        docs = await _arerank(reranker, user_query, docs)
 
-    
-    context = "\n".join(docs)
+    final_answer, prompt = _prepare_prompt(docs, user_query)
+    return final_answer, prompt, query_embedding
+
+
+async def answer_query_async(user_query: str, embedding_model, vectorstore, llm, session_id: str = None, cache=None,
+                             fallback=None, reranker=None) -> str:
+    """
+    Async version of answer_query().
+
+    Uses aembed_query(), aretrieve_documents() and agenerate() so that a single event loop
+    can serve many conversations concurrently. Parameters and return value are the same as
+    answer_query().
+    """
+    cache = _session_cache(cache, llm, session_id)
+    final_answer, prompt, query_embedding = await _aprepare_prompt(user_query, embedding_model, vectorstore, llm,
+                                                                   cache, reranker, session_id)
+    if final_answer is not None:
+        return final_answer
 
-    # Generate prompt and get answer
     try:
-        logger.info("Building prompt and generating response from LLM...")
-        prompt = build_prompt(context, user_query)
-        raw_answer = llm.generate(prompt)
-        logger.info("LLM response generated successfully.")
-        return raw_answer.strip()
-    except AttributeError:
-        logger.exception("LLM object is missing the required 'generate()' method.")
-        return "Internal error: LLM configuration is invalid."
+        logger.info("Generating response from LLM...")
+        with span("generation"):
+            raw_answer = await _call_async(llm, "agenerate", "generate", prompt,
+                                           **_memory_kwargs(session_id, user_query))
     except Exception as e:
-        logger.exception("Error during LLM response generation.")
-        return "Sorry, something went wrong while generating the response. Please try again later."
\ No newline at end of file
+        return _generation_error(e, user_query, query_embedding, cache, fallback)
+    return _store_answer(raw_answer, user_query, query_embedding, cache)
+
+
+async def answer_query_stream(user_query: str, embedding_model, vectorstore, llm, session_id: str = None, cache=None,
+                              fallback=None, reranker=None):
+    """
+    Streaming version of answer_query_async().
+
+    Cached answers and error messages are yielded as a single fragment; generated answers
+    are yielded token by token via llm.agenerate_stream(), so the first words reach the user
+    as soon as the model produces them. If the stream breaks off part-way, INTERRUPTED_MESSAGE
+    is yielded last and the partial answer is not cached.
+
+    Yields:
+        str: Answer text fragments.
+    """
+    cache = _session_cache(cache, llm, session_id)
+    final_answer, prompt, query_embedding = await _aprepare_prompt(user_query, embedding_model, vectorstore, llm,
+                                                                   cache, reranker, session_id)
+    if final_answer is not None:
+        yield final_answer
+        return
+
+    parts = []
+    # Generation time excludes the time spent suspended at `yield` while the caller dispatches
+    generation_seconds, resumed = 0.0, time.perf_counter()
+    try:
+        logger.info("Streaming response from LLM...")
+        async for content in llm.agenerate_stream(prompt, **_memory_kwargs(session_id, user_query)):
+            generation_seconds += time.perf_counter() - resumed
+            parts.append(content)
+            yield content
+            resumed = time.perf_counter()
+        generation_seconds += time.perf_counter() - resumed
+    except LLMUnavailableError as e:
+        logger.warning(f"LLM unavailable: {e}")
+        if not parts:
+            yield _fallback_answer(user_query, query_embedding, cache, fallback)
+        return
+    except GenerationInterruptedError as e:
+        # Tell the user the answer is incomplete; it is neither cached nor remembered
+        logger.warning(f"LLM stream interrupted: {e}")
+        yield INTERRUPTED_MESSAGE
+        return
+    except Exception as e:
+        logger.exception("Error during LLM response streaming.")
+        if not parts:
+            yield GENERATION_ERROR_MESSAGE
+        return
+
+    record("generation", generation_seconds)
+    _store_answer("".join(parts), user_query, query_embedding, cache)
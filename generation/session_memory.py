@@ -0,0 +1,147 @@
+"""
+This module provides a bounded, per-conversation chat memory for the LLM wrapper.
+
+Each conversation (identified by the Rasa sender_id) gets its own ring buffer of recent
+messages, so a shared LLM instance never mixes one user's turns into another user's prompt.
+Idle sessions expire after a TTL, the total number of sessions is capped with LRU eviction,
+and history handed to the model is trimmed to a token budget.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from config import HISTORY_MAX_MESSAGES, HISTORY_TOKEN_BUDGET, SESSION_TTL_SECONDS, MAX_SESSIONS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (about four characters per token for English text).
+
+    Args:
+        text (str): Message content.
+
+    Returns:
+        int: Approximate number of tokens.
+    """
+    return max(1, len(text) // 4) if text else 0
+
+
+class _Session:
+    __slots__ = ("messages", "last_seen")
+
+    def __init__(self, max_messages: int):
+        self.messages = deque(maxlen=max_messages)
+        self.last_seen = time.monotonic()
+
+
+class SessionMemoryStore:
+    """
+    Thread-safe store of chat histories keyed by session id.
+
+    Attributes:
+        max_messages (int): Ring buffer size per session (user and assistant messages).
+        token_budget (int): Maximum estimated tokens of history returned for one prompt.
+        ttl_seconds (float): Idle time after which a session is discarded.
+        max_sessions (int): Maximum number of sessions kept; least recently used are evicted.
+        token_counter (Callable[[str], int]): Function used to measure message size.
+
+    Methods:
+        get_history(session_id: str) -> List[Dict]
+        add_turn(session_id: str, user_content: str, assistant_content: str) -> None
+        clear(session_id: str) -> None
+    """
+
+    def __init__(self, max_messages: int = HISTORY_MAX_MESSAGES, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 ttl_seconds: float = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS,
+                 token_counter=estimate_tokens):
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.token_counter = token_counter
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return len(self._sessions)
+
+    def _evict_expired(self, now: float) -> None:
+        # Sessions are kept in last-access order, so expired ones are always at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            logger.debug(f"Session '{session_id}' expired and was removed from memory.")
+
+    def get_history(self, session_id: str = DEFAULT_SESSION_ID) -> list:
+        """
+        Returns the most recent messages of a session that fit within the token budget.
+
+        Args:
+            session_id (str): Conversation identifier (Rasa sender_id).
+
+        Returns:
+            List[Dict]: Chat messages in chronological order, starting with a user message.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            messages = list(session.messages)
+
+        history, used = [], 0
+        for message in reversed(messages):
+            cost = self.token_counter(message["content"])
+            if used + cost > self.token_budget:
+                break
+            history.append(message)
+            used += cost
+        history.reverse()
+
+        # Never start the window with an orphaned assistant reply
+        while history and history[0]["role"] != "user":
+            history.pop(0)
+        return history
+
+    def add_turn(self, session_id: str, user_content: str, assistant_content: str) -> None:
+        """
+        Records one user/assistant exchange for a session.
+
+        Args:
+            session_id (str): Conversation identifier (Rasa sender_id).
+            user_content (str): What the user asked.
+            assistant_content (str): What the assistant replied.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self.max_messages)
+                self._sessions[session_id] = session
+            session.messages.append({"role": "user", "content": user_content})
+            session.messages.append({"role": "assistant", "content": assistant_content})
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.debug(f"Session '{evicted_id}' evicted (max sessions reached).")
+
+    def clear(self, session_id: str) -> None:
+        """Forgets everything stored for a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
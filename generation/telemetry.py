@@ -0,0 +1,224 @@
+"""
+This module provides per-request timing spans and Prometheus metrics for the RAG path.
+
+A request is traced with trace_request(sender_id), which opens a RequestTrace carrying a
+request id derived from the Rasa sender_id. Code along the path records its stage with
+span("embed") / record("ttft", seconds) without having the trace passed in: the active
+trace lives in a context variable, which follows the request through awaits and
+asyncio.to_thread(). When no trace is active, spans are still exported as metrics.
+
+Stages:
+    faq_match, embed, retrieve, prompt_build, llm_queue (waiting for the LLM scheduler),
+    ttft (time to first token), generation (the full LLM call), dispatch (sending the answer)
+
+When the trace ends, one structured "[Trace]" log line with all span durations is written and
+the request is counted. Metrics (exported when prometheus_client is installed):
+
+    rag_stage_seconds{stage}                 histogram of stage durations
+    rag_request_seconds{route}               histogram of end-to-end latency
+    rag_requests_total{route, outcome}       requests by route (faq, rag, fallback, ...) and outcome
+    rag_cache_lookups_total{tier, result}    answer cache lookups (exact / semantic, hit / miss)
+    embedding_cache_lookups_total{result}    query embedding cache lookups (memory / disk / miss)
+    embedding_cache_saved_seconds_total      embedding latency saved by cache hits (estimated)
+
+The stream server serves them at GET /metrics; the action server starts a metrics endpoint on
+METRICS_PORT when it handles its first request (see start_metrics_server()).
+"""
+
+import contextvars
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from config import METRICS_ENABLED, METRICS_PORT
+
+try:
+    from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest, start_http_server
+except ImportError:  # metrics are optional; spans are still logged
+    Counter = Histogram = generate_latest = start_http_server = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("faq_match", "embed", "retrieve", "rerank", "prompt_build", "llm_queue", "ttft", "generation", "dispatch")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+if Counter is not None and METRICS_ENABLED:
+    STAGE_SECONDS = Histogram("rag_stage_seconds", "Duration of a RAG pipeline stage.", ["stage"],
+                              buckets=LATENCY_BUCKETS)
+    REQUEST_SECONDS = Histogram("rag_request_seconds", "End-to-end request latency.", ["route"],
+                                buckets=LATENCY_BUCKETS)
+    REQUESTS = Counter("rag_requests_total", "Requests by route and outcome.", ["route", "outcome"])
+    CACHE_LOOKUPS = Counter("rag_cache_lookups_total", "Answer cache lookups.", ["tier", "result"])
+    EMBEDDING_CACHE_LOOKUPS = Counter("embedding_cache_lookups_total", "Query embedding cache lookups.", ["result"])
+    EMBEDDING_CACHE_SAVED = Counter("embedding_cache_saved_seconds_total",
+                                    "Estimated embedding latency saved by cache hits.")
+else:
+    STAGE_SECONDS = REQUEST_SECONDS = REQUESTS = CACHE_LOOKUPS = None
+    EMBEDDING_CACHE_LOOKUPS = EMBEDDING_CACHE_SAVED = None
+
+_current_trace = contextvars.ContextVar("rag_request_trace", default=None)
+_trace_listeners = []
+_metrics_server_started = None  # None until the first start_metrics_server() call, then its outcome
+
+
+class RequestTrace:
+    """
+    Timing spans and attributes of one request.
+
+    Attributes:
+        request_id (str): "<sender_id>-<8 hex chars>", unique per request.
+        sender_id (str): Rasa conversation id.
+        spans (Dict[str, float]): Seconds per stage; repeated stages are summed.
+        attributes (Dict[str, str]): route, cache result, outcome, ...
+    """
+
+    def __init__(self, sender_id: str = None):
+        self.sender_id = sender_id or "anonymous"
+        self.request_id = f"{self.sender_id}-{uuid.uuid4().hex[:8]}"
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.attributes = {"route": "rag"}
+
+    def add(self, stage: str, seconds: float):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "sender_id": self.sender_id,
+            **self.attributes,
+            "total_ms": round(self.elapsed() * 1000, 2),
+            "spans_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.spans.items()},
+        }
+
+
+def add_trace_listener(callback):
+    """Calls callback(trace) for every finished RequestTrace (e.g. to aggregate a load test)."""
+    _trace_listeners.append(callback)
+
+
+def remove_trace_listener(callback):
+    if callback in _trace_listeners:
+        _trace_listeners.remove(callback)
+
+
+def current_trace():
+    """The active RequestTrace, or None."""
+    return _current_trace.get()
+
+
+def record(stage: str, seconds: float):
+    """Records a stage duration on the active trace and the stage histogram."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+    if STAGE_SECONDS is not None:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """Times the enclosed block as `stage`, also when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+def annotate(**attributes):
+    """Sets attributes (e.g. route="faq") on the active trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def record_cache_lookup(tier: str, hit: bool):
+    """Counts an answer cache lookup and notes the result on the active trace."""
+    if CACHE_LOOKUPS is not None:
+        CACHE_LOOKUPS.labels(tier=tier, result="hit" if hit else "miss").inc()
+    if hit:
+        annotate(cache=tier)
+
+
+def record_embedding_cache_lookup(result: str, saved_seconds: float = 0.0):
+    """Counts a query embedding cache lookup ("memory", "disk" or "miss") and the latency a hit saved."""
+    if EMBEDDING_CACHE_LOOKUPS is not None:
+        EMBEDDING_CACHE_LOOKUPS.labels(result=result).inc()
+    if EMBEDDING_CACHE_SAVED is not None and saved_seconds > 0:
+        EMBEDDING_CACHE_SAVED.inc(saved_seconds)
+
+
+@contextmanager
+def trace_request(sender_id: str = None):
+    """
+    Traces one request from the enclosed block.
+
+    Args:
+        sender_id (str): Rasa sender_id; it prefixes the request id.
+
+    Yields:
+        RequestTrace: The trace, active for everything called inside the block.
+    """
+    trace = RequestTrace(sender_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException:
+        trace.attributes["outcome"] = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace.attributes.setdefault("outcome", "ok")
+        route, outcome = trace.attributes["route"], trace.attributes["outcome"]
+        if REQUESTS is not None:
+            REQUESTS.labels(route=route, outcome=outcome).inc()
+            REQUEST_SECONDS.labels(route=route).observe(trace.elapsed())
+        logger.info("[Trace] " + json.dumps(trace.to_dict()))
+        for listener in list(_trace_listeners):
+            listener(trace)
+
+
+def metrics_payload():
+    """
+    Current metrics in the Prometheus text format.
+
+    Returns:
+        Tuple[bytes, str]: Body and content type; the body is empty when metrics are disabled.
+    """
+    if generate_latest is None or not METRICS_ENABLED:
+        return b"", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> bool:
+    """
+    Serves /metrics on its own port (used by the Rasa action server, whose HTTP app is
+    owned by rasa_sdk). Only the first call tries to start it; later calls are cheap and
+    return the same outcome, so it can be called on every request.
+
+    Returns:
+        bool: Whether the endpoint is running.
+    """
+    global _metrics_server_started
+    if _metrics_server_started is not None:
+        return _metrics_server_started
+    _metrics_server_started = False
+    if not METRICS_ENABLED or not port:
+        return False
+    if start_http_server is None:
+        logger.warning("prometheus_client is not installed; metrics endpoint disabled.")
+        return False
+    try:
+        start_http_server(port)
+    except OSError as e:
+        logger.warning(f"Could not start metrics endpoint on port {port}: {e}")
+        return False
+    _metrics_server_started = True
+    logger.info(f"Prometheus metrics available on port {port}.")
+    return True
@@ -8,73 +8,42 @@ import logging
 from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from generation.rag_core import answer_query
-from retrieval.embedding import EmbeddingModel
-from retrieval.chroma_vectorstore import ChromaRetriever
-from generation.llm import LLM
-from fuzzywuzzy import process
-from rasa_layer.faq_data import faq_list
+from rasa_layer.component_pool import component_pool
+from rasa_layer.smart_router import route_query
+from generation.telemetry import trace_request, span, start_metrics_server
+from config import WARM_UP_COMPONENTS
 
 
 
 logger = logging.getLogger(__name__)
 
+# Build the RAG components once when the action server loads this module
+if WARM_UP_COMPONENTS:
+    component_pool.warm_up()
+
 
 class ActionSmartRouter(Action):
     def name(self) -> Text:
         return "action_smart_router"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
 
-        user_query = tracker.latest_message.get("text")
-        logger.info(f"[SmartRouter] Received user query: '{user_query}'")
-
-        if not user_query or user_query.strip() == "":
-            logger.warning("[SmartRouter] Empty or missing user query.")
-            dispatcher.utter_message(text="I didn't receive a valid question. Please try again.")
-            return []
-
-        # Fuzzy FAQ Handling
-        try:
-            questions = [faq["question"] for faq in faq_list]
-            best_match, score = process.extractOne(user_query, questions)
-            logger.debug(f"[SmartRouter] Best FAQ match: '{best_match}' with score {score}")
-
-            if score >= 90:
-                logger.info(f"[SmartRouter] High-confidence FAQ match found (Score: {score})")
-                matched_faq = next(item for item in faq_list if item["question"] == best_match)
-                answer = matched_faq["answer"]
-                logger.info(f"[SmartRouter] Responding with FAQ answer: '{answer}'")
-                dispatcher.utter_message(text=answer)
-                return []
-
-            logger.info(f"[SmartRouter] No strong FAQ match (score: {score}). Proceeding to RAG.")
-        except Exception as e:
-            logger.error(f"[SmartRouter] Error during FAQ matching: {str(e)}")
-
-        # RAG Pipeline Fallback
-        try:
-            logger.debug("[SmartRouter] Initializing RAG components...")
-            embedding_model = EmbeddingModel()
-            vectorstore = ChromaRetriever()
-            llm = LLM()
-
-            logger.debug("[SmartRouter] Calling RAG pipeline...")
-            answer = answer_query(user_query.strip(), embedding_model, vectorstore, llm)
+        # rasa_sdk owns the action server's HTTP app, so metrics get their own port. Started on
+        # the first request rather than at import; METRICS_PORT=0 or METRICS_ENABLED=false disables it
+        start_metrics_server()
+        with trace_request(tracker.sender_id) as trace:
+            await self._route(dispatcher, tracker, trace)
+        return []
 
-            if not answer or answer.strip() == "":
-                logger.warning("[SmartRouter] Empty response from RAG. Sending fallback message.")
-                answer = "I'm sorry, I couldn't find any information for that query."
+    async def _route(self, dispatcher: CollectingDispatcher, tracker: Tracker, trace) -> None:
+        user_query = tracker.latest_message.get("text")
+        logger.info(f"[SmartRouter] [{trace.request_id}] Received user query: '{user_query}'")
 
-            cleaned_answer = ' '.join(answer.split())
-            logger.info(f"[SmartRouter] Final RAG response: '{cleaned_answer}'")
+        # Rasa shows one message per utterance, so the answer is dispatched in one piece
+        answer = "".join([fragment async for fragment in route_query(user_query, tracker.sender_id)])
+        cleaned_answer = ' '.join(answer.split())
+        logger.info(f"[SmartRouter] Final response: '{cleaned_answer}'")
+        with span("dispatch"):
             dispatcher.utter_message(text=cleaned_answer)
-
-        except Exception as e:
-            logger.error(f"[SmartRouter] Error in RAG logic: {str(e)}")
-            dispatcher.utter_message(text="There was an error while retrieving the information. Please try again.")
-
-        return []
-
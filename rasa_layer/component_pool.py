@@ -0,0 +1,265 @@
+"""
+This module provides a process-wide pool of warm RAG components for the Rasa action server.
+
+Building an EmbeddingModel, a ChromaRetriever (which reopens the SQLite/HNSW files) and an
+LLM client (which sets up a new HTTP connection) is far more expensive than a single query.
+The ComponentPool creates each component lazily, exactly once, and hands the same instance
+to every request. The vector store is rebuilt transparently when the Chroma data on disk
+changes, so re-indexing does not require restarting the action server.
+"""
+
+import functools
+import logging
+import os
+import threading
+from config import CHROMA_DIR, VECTORSTORE_BACKEND, RERANK_ENABLED
+from retrieval.embedding import EmbeddingModel
+from retrieval.chroma_vectorstore import ChromaRetriever
+from retrieval.memmap_vectorstore import MemmapRetriever
+from retrieval.collection_router import CollectionRegistry, CollectionRouter, served_collections, \
+    registry_path, REGISTRY_FILE
+from generation.llm import LLM
+from generation.answer_cache import AnswerCache
+
+logger = logging.getLogger(__name__)
+
+CHROMA_DB_FILE = "chroma.sqlite3"
+
+# Index files written next to each collection at ingest time; any change triggers a reload
+INDEX_SIDECAR_SUFFIXES = (".lexical.json", ".vectors.json")
+
+
+def index_files(names: list) -> tuple:
+    """The registry and the index sidecars of the given collections, relative to the Chroma directory."""
+    return (REGISTRY_FILE,) + tuple(f"{name}{suffix}" for name in names for suffix in INDEX_SIDECAR_SUFFIXES)
+
+
+def create_vectorstore(chroma_dir: str = CHROMA_DIR):
+    """
+    Builds the retriever selected by VECTORSTORE_BACKEND ("chroma" or "memmap") over the
+    collections in chroma_dir; with several served collections, a CollectionRouter over one
+    retriever per collection.
+    """
+    backend = MemmapRetriever if VECTORSTORE_BACKEND == "memmap" else ChromaRetriever
+    retriever_factory = functools.partial(backend, chroma_dir=chroma_dir)
+    registry = CollectionRegistry.load(registry_path(chroma_dir))
+    names = served_collections(registry)
+    if len(names) == 1:
+        return retriever_factory(names[0])
+    logger.info(f"[ComponentPool] Routing queries across collections {names}.")
+    return CollectionRouter.from_registry(registry, retriever_factory, names)
+
+
+def create_reranker():
+    """Builds the cross-encoder reranker, or returns None when RERANK_ENABLED is off."""
+    if not RERANK_ENABLED:
+        return None
+    from retrieval.reranker import CrossEncoderReranker
+    reranker = CrossEncoderReranker()
+    reranker.warm_up()
+    return reranker
+
+
+class ComponentPool:
+    """
+    Thread-safe, lazily initialized registry of shared RAG components.
+
+    Attributes:
+        chroma_dir (str): Directory holding the persistent Chroma data.
+        embedding_factory (Callable): Builds the embedding model.
+        vectorstore_factory (Callable): Builds the vector store retriever; create_vectorstore()
+            over chroma_dir by default.
+        llm_factory (Callable): Builds the LLM wrapper.
+        reranker_factory (Callable): Builds the reranker, or returns None when reranking is off.
+
+    Methods:
+        get_embedding_model() -> EmbeddingModel
+        get_vectorstore() -> ChromaRetriever | MemmapRetriever
+        get_llm() -> LLM
+        get_answer_cache() -> AnswerCache
+        get_reranker() -> Optional[CrossEncoderReranker]
+        collection_version() -> tuple
+        warm_up() -> bool
+        health() -> dict
+        reload() -> None
+    """
+
+    def __init__(self, chroma_dir: str = CHROMA_DIR, embedding_factory=EmbeddingModel,
+                 vectorstore_factory=None, llm_factory=LLM, reranker_factory=create_reranker):
+        self.chroma_dir = chroma_dir
+        self.embedding_factory = embedding_factory
+        self.vectorstore_factory = vectorstore_factory or functools.partial(create_vectorstore, chroma_dir)
+        self.llm_factory = llm_factory
+        self.reranker_factory = reranker_factory
+
+        self._lock = threading.RLock()
+        self._embedding_model = None
+        self._vectorstore = None
+        self._vectorstore_version = None
+        self._llm = None
+        self._answer_cache = None
+        self._reranker = None
+        self._reranker_built = False
+        self._registry_key = ()
+        self._sidecar_files = ()
+
+    def _index_files(self) -> tuple:
+        # The served collections only change with the registry, so it is re-read only then
+        path = registry_path(self.chroma_dir)
+        try:
+            stat = os.stat(path)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except (OSError, TypeError):
+            key = None
+        if key != self._registry_key:
+            registry = CollectionRegistry.load(path) if key else CollectionRegistry(path)
+            self._sidecar_files = index_files(served_collections(registry))
+            self._registry_key = key
+        return self._sidecar_files
+
+    def collection_version(self) -> tuple:
+        """
+        Returns a cheap fingerprint of the Chroma data on disk.
+
+        The fingerprint is the modification time and size of the Chroma SQLite file, which
+        changes whenever chunks are added, upserted or deleted, followed by those of the
+        lexical / memmap index sidecars that are rewritten after every ingest.
+
+        Returns:
+            tuple: (mtime_ns, size) of each file, (0, 0) for files that do not exist.
+        """
+        version = ()
+        for name in (CHROMA_DB_FILE,) + self._index_files():
+            try:
+                stat = os.stat(os.path.join(self.chroma_dir, name))
+                version += (stat.st_mtime_ns, stat.st_size)
+            except (OSError, TypeError):
+                version += (0, 0)
+        return version
+
+    def get_embedding_model(self):
+        """Returns the shared embedding model, creating it on first use."""
+        if self._embedding_model is None:
+            with self._lock:
+                if self._embedding_model is None:
+                    logger.info("[ComponentPool] Initializing embedding model...")
+                    self._embedding_model = self.embedding_factory()
+        return self._embedding_model
+
+    def get_vectorstore(self):
+        """
+        Returns the shared vector store, creating it on first use.
+
+        If the Chroma collection changed on disk since the retriever was built, a fresh
+        retriever is created so that queries see the re-indexed data.
+        """
+        version = self.collection_version()
+        if self._vectorstore is None or version != self._vectorstore_version:
+            with self._lock:
+                if self._vectorstore is None or version != self._vectorstore_version:
+                    if self._vectorstore is not None:
+                        logger.info("[ComponentPool] Chroma collection changed on disk. Reloading vector store...")
+                    else:
+                        logger.info("[ComponentPool] Initializing vector store...")
+                    self._vectorstore = self.vectorstore_factory()
+                    self._vectorstore_version = version
+        return self._vectorstore
+
+    def get_llm(self):
+        """Returns the shared LLM client, creating it on first use."""
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    logger.info("[ComponentPool] Initializing LLM client...")
+                    self._llm = self.llm_factory()
+        return self._llm
+
+    def get_answer_cache(self):
+        """
+        Returns the shared answer cache, creating it on first use.
+
+        The cache is tied to collection_version(), so it empties itself after re-indexing.
+        """
+        if self._answer_cache is None:
+            with self._lock:
+                if self._answer_cache is None:
+                    self._answer_cache = AnswerCache(version_fn=self.collection_version)
+        return self._answer_cache
+
+    def get_reranker(self):
+        """Returns the shared reranker (None when reranking is disabled), creating it on first use."""
+        if not self._reranker_built:
+            with self._lock:
+                if not self._reranker_built:
+                    logger.info("[ComponentPool] Initializing reranker...")
+                    self._reranker = self.reranker_factory()
+                    self._reranker_built = True
+        return self._reranker
+
+    def warm_up(self) -> bool:
+        """
+        Eagerly builds every component so the first user request does not pay for it.
+
+        Failures are logged rather than raised; the failing component is retried lazily
+        on the next request.
+
+        Returns:
+            bool: True if all components were initialized successfully.
+        """
+        ok = True
+        for name, getter in (("embedding model", self.get_embedding_model),
+                             ("vector store", self.get_vectorstore),
+                             ("LLM", self.get_llm),
+                             ("reranker", self.get_reranker)):
+            try:
+                getter()
+            except Exception as e:
+                ok = False
+                logger.error(f"[ComponentPool] Warm-up failed for {name}: {e}")
+        if ok:
+            logger.info("[ComponentPool] All RAG components warmed up.")
+        return ok
+
+    def health(self) -> dict:
+        """
+        Reports the status of each component without initializing anything.
+
+        Returns:
+            dict: Per-component status ("ready", "not_initialized", "stale" or "error")
+                  plus an overall "healthy" flag.
+        """
+        with self._lock:
+            status = {
+                "embedding_model": "ready" if self._embedding_model is not None else "not_initialized",
+                "llm": "ready" if self._llm is not None else "not_initialized",
+            }
+            if self._vectorstore is None:
+                status["vectorstore"] = "not_initialized"
+            elif self._vectorstore_version != self.collection_version():
+                status["vectorstore"] = "stale"
+            else:
+                try:
+                    count = getattr(self._vectorstore, "count", None) or self._vectorstore.collection.count
+                    count()
+                    status["vectorstore"] = "ready"
+                except Exception as e:
+                    logger.warning(f"[ComponentPool] Vector store health check failed: {e}")
+                    status["vectorstore"] = "error"
+
+        status["healthy"] = all(v in ("ready", "stale") for v in status.values())
+        return status
+
+    def reload(self) -> None:
+        """Drops every cached component so they are rebuilt on next use."""
+        with self._lock:
+            self._embedding_model = None
+            self._vectorstore = None
+            self._vectorstore_version = None
+            self._llm = None
+            self._answer_cache = None
+            self._reranker = None
+            self._reranker_built = False
+        logger.info("[ComponentPool] Components cleared; they will be rebuilt on next use.")
+
+
+component_pool = ComponentPool()
@@ -0,0 +1,172 @@
+"""
+This module provides a precomputed index over the curated FAQ list.
+
+Matching a message against the FAQs used to score every question with fuzzywuzzy, whose
+pure-Python WRatio costs a few hundred microseconds per question. FAQIndex instead:
+
+    1. answers exact questions (after fuzzywuzzy-style normalization) with a dict lookup,
+    2. ranks FAQs by shared word trigrams through an inverted index held in numpy arrays,
+    3. runs WRatio only on the few best candidates by trigram overlap, so a message costs at
+       most `candidates` WRatio calls however long the list is, whether it matches or not,
+    4. optionally compares embeddings of the message and the FAQ questions.
+
+A FAQ whose trigrams barely overlap the message (below min_overlap) is never scored. The
+default is low enough that typos, fragments and reordered words still reach the candidates.
+
+Answers are looked up by FAQ id in O(1).
+"""
+
+import logging
+import re
+import numpy as np
+from fuzzywuzzy import fuzz
+
+logger = logging.getLogger(__name__)
+
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercases text and collapses non-alphanumeric runs, like fuzzywuzzy's full_process()."""
+    return NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+
+
+def word_ngrams(text: str, n: int = 3) -> set:
+    """
+    Character n-grams of every word, padded with spaces so short words and word boundaries
+    count. Built per word, so word order does not change the set.
+    """
+    grams = set()
+    for word in normalize_question(text).split():
+        padded = f" {word} "
+        grams.update(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+class FAQIndex:
+    """
+    Immutable search structure over a list of {"question", "answer"[, "id"]} entries.
+
+    Attributes:
+        ids (List): FAQ ids in list order (the entry's "id", else its position).
+        candidates (int): Maximum number of FAQs scored with WRatio per message.
+        min_overlap (float): Minimum trigram overlap coefficient for a FAQ to be scored.
+
+    Methods:
+        match(query, threshold) -> Optional[Tuple[id, float]]
+        match_semantic(query, threshold) -> Optional[Tuple[id, float]]
+        answer(faq_id) -> str
+    """
+
+    def __init__(self, faqs: list, ngram: int = 3, candidates: int = 5, min_overlap: float = 0.4,
+                 embedding_model=None):
+        self.ngram = ngram
+        self.candidates = candidates
+        self.min_overlap = min_overlap
+        self.embedding_model = embedding_model
+        self._question_matrix = None
+
+        self.ids = [faq.get("id", position) for position, faq in enumerate(faqs)]
+        self.questions = {faq_id: faq["question"] for faq_id, faq in zip(self.ids, faqs)}
+        self.answers = {faq_id: faq["answer"] for faq_id, faq in zip(self.ids, faqs)}
+        self._normalized = [normalize_question(faq["question"]) for faq in faqs]
+        self._exact = {question: faq_id for question, faq_id in zip(self._normalized, self.ids)}
+
+        postings = {}
+        gram_counts = []
+        for row, faq in enumerate(faqs):
+            grams = word_ngrams(faq["question"], ngram)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        self._gram_ids = {gram: i for i, gram in enumerate(postings)}
+        self._indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        self._indptr[1:] = np.cumsum([len(rows) for rows in postings.values()])
+        self._rows = np.array([row for rows in postings.values() for row in rows], dtype=np.int32)
+        self._gram_counts = np.array(gram_counts, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def answer(self, faq_id) -> str:
+        """Returns the answer of a FAQ by id."""
+        return self.answers[faq_id]
+
+    def _candidate_rows(self, query: str) -> list:
+        grams = word_ngrams(query, self.ngram)
+        if not grams or not len(self.ids):
+            return []
+        shared = np.zeros(len(self.ids), dtype=np.float32)
+        for gram in grams:
+            i = self._gram_ids.get(gram)
+            if i is not None:
+                shared[self._rows[self._indptr[i]:self._indptr[i + 1]]] += 1
+        # Overlap coefficient: 1.0 when one side's trigrams are all contained in the other's
+        overlap = shared / np.maximum(np.minimum(self._gram_counts, len(grams)), 1)
+        rows = np.flatnonzero(overlap >= self.min_overlap)
+        if len(rows) > self.candidates:
+            rows = rows[np.argpartition(-overlap[rows], self.candidates - 1)[:self.candidates]]
+        return rows[np.argsort(-overlap[rows], kind="stable")].tolist()
+
+    def match(self, query: str, threshold: float):
+        """
+        Finds the best fuzzy match for a message.
+
+        Args:
+            query (str): User message.
+            threshold (float): Minimum WRatio score (0-100).
+
+        Returns:
+            Optional[Tuple[id, float]]: (faq_id, score) of the best match at or above the
+                threshold, or None.
+        """
+        if not query or not query.strip():
+            return None
+        faq_id = self._exact.get(normalize_question(query))
+        if faq_id is not None:
+            return faq_id, 100
+
+        best_row, best_score = self._best(normalize_question(query), self._candidate_rows(query))
+        best_id = self.ids[best_row] if best_row is not None else None
+        logger.debug(f"[FAQ] Best fuzzy candidate: {best_id} with score {best_score}")
+        if best_id is not None and best_score >= threshold:
+            return best_id, best_score
+        return None
+
+    def _best(self, processed: str, rows: list) -> tuple:
+        """(row, score) of the best WRatio among rows; ties go to the earliest row like process.extractOne."""
+        best_row, best_score = None, -1
+        for row in sorted(rows):
+            score = fuzz.WRatio(processed, self._normalized[row])
+            if score > best_score:
+                best_row, best_score = row, score
+        return best_row, best_score
+
+    def match_semantic(self, query: str, threshold: float):
+        """
+        Finds the FAQ whose question embedding is most similar to the message.
+
+        FAQ question embeddings are computed on first use with the index's embedding model.
+
+        Args:
+            query (str): User message.
+            threshold (float): Minimum cosine similarity.
+
+        Returns:
+            Optional[Tuple[id, float]]: (faq_id, similarity), or None.
+        """
+        if self.embedding_model is None or not query or not query.strip() or not len(self.ids):
+            return None
+        if self._question_matrix is None:
+            vectors = np.asarray(self.embedding_model.embed_documents([self.questions[i] for i in self.ids]),
+                                 dtype=np.float32)
+            self._question_matrix = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+        query_vector = np.asarray(self.embedding_model.embed_query(query), dtype=np.float32)
+        if not query_vector.size:
+            return None
+        similarities = self._question_matrix @ (query_vector / max(np.linalg.norm(query_vector), 1e-12))
+        row = int(np.argmax(similarities))
+        if similarities[row] >= threshold:
+            return self.ids[row], float(similarities[row])
+        return None
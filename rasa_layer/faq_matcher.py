@@ -0,0 +1,103 @@
+"""
+This module provides fuzzy matching of user queries against the curated FAQ list.
+
+It is shared by the Rasa action server (ActionSmartRouter) and the streaming endpoint, so
+both route high-confidence FAQ questions the same way before falling back to RAG.
+
+The FAQ list is indexed once at import (see rasa_layer/faq_index.py) and re-indexed
+automatically when faq_data.py is edited, so FAQs can be updated without a restart.
+"""
+
+import importlib
+import logging
+import os
+import threading
+from rasa_layer import faq_data
+from rasa_layer.faq_index import FAQIndex
+from config import FAQ_SEMANTIC_ENABLED, FAQ_SEMANTIC_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+FAQ_MATCH_THRESHOLD = 90
+# Looser threshold used when the LLM is unavailable: a close FAQ beats a "try again" message
+FAQ_FALLBACK_THRESHOLD = 75
+
+_index_lock = threading.Lock()
+_index = None
+_index_mtime = None
+
+
+def _faq_data_mtime():
+    try:
+        return os.stat(faq_data.__file__).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _embedding_model():
+    # Imported lazily: the semantic tier is optional and the pool pulls in the whole RAG stack
+    from rasa_layer.component_pool import component_pool
+    return component_pool.get_embedding_model()
+
+
+def get_faq_index() -> FAQIndex:
+    """
+    Returns the FAQ index, rebuilding it if faq_data.py changed on disk.
+
+    Returns:
+        FAQIndex: Index over the current faq_list.
+    """
+    global _index, _index_mtime
+    mtime = _faq_data_mtime()
+    if _index is None or mtime != _index_mtime:
+        with _index_lock:
+            if _index is None or mtime != _index_mtime:
+                if _index is not None:
+                    logger.info("[FAQ] faq_data.py changed. Re-indexing FAQs...")
+                    importlib.reload(faq_data)
+                _index = FAQIndex(faq_data.faq_list)
+                _index_mtime = mtime
+                logger.info(f"[FAQ] Indexed {len(_index)} FAQs.")
+    return _index
+
+
+def match_faq(user_query: str, threshold: int = FAQ_MATCH_THRESHOLD):
+    """
+    Returns the answer of the best-matching FAQ if its fuzzy score reaches the threshold.
+
+    When FAQ_SEMANTIC_ENABLED is set and no fuzzy match is found, the question embedding is
+    compared with the FAQ questions as a second tier.
+
+    Args:
+        user_query (str): The user's question.
+        threshold (int): Minimum fuzzy match score (0-100).
+
+    Returns:
+        Optional[str]: The FAQ answer, or None if there is no confident match.
+    """
+    index = get_faq_index()
+    match = index.match(user_query, threshold)
+    if match is not None:
+        faq_id, score = match
+        logger.info(f"[FAQ] High-confidence FAQ match found (Score: {score})")
+        return index.answer(faq_id)
+
+    if FAQ_SEMANTIC_ENABLED:
+        if index.embedding_model is None:
+            index.embedding_model = _embedding_model()
+        match = index.match_semantic(user_query, FAQ_SEMANTIC_THRESHOLD)
+        if match is not None:
+            faq_id, similarity = match
+            logger.info(f"[FAQ] Semantic FAQ match found (similarity: {similarity:.3f})")
+            return index.answer(faq_id)
+
+    logger.info("[FAQ] No strong FAQ match.")
+    return None
+
+
+def match_faq_fallback(user_query: str):
+    """match_faq() with FAQ_FALLBACK_THRESHOLD, used as the RAG fallback when the LLM is unavailable."""
+    return match_faq(user_query, threshold=FAQ_FALLBACK_THRESHOLD)
+
+
+get_faq_index()
@@ -0,0 +1,146 @@
+"""
+This module provides the message routing shared by the Rasa action server (ActionSmartRouter)
+and the streaming endpoint (rasa_layer/stream_server.py): small talk, then a FAQ match,
+then the RAG pipeline.
+
+The streaming endpoint receives messages without Rasa NLU in front of it, so greetings and
+goodbyes, which Rasa answers with utter_greet / utter_goodbye (data/rules.yml), are
+recognized here from the same training examples (data/nlu.yml) and answered with the same
+responses (domain.yml). Editing the Rasa project files changes both paths.
+"""
+
+import functools
+import logging
+import os
+import re
+import yaml
+from fuzzywuzzy import fuzz
+from generation.rag_core import answer_query_async, answer_query_stream
+from generation.telemetry import span, annotate
+from rasa_layer.faq_matcher import match_faq, match_faq_fallback
+from rasa_layer.component_pool import component_pool
+from config import ANSWER_CACHE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+RASA_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INVALID_QUERY_MESSAGE = "I didn't receive a valid question. Please try again."
+NO_ANSWER_MESSAGE = "I'm sorry, I couldn't find any information for that query."
+RAG_ERROR_MESSAGE = "There was an error while retrieving the information. Please try again."
+
+# Intents answered with a fixed response, and the response that answers them
+SMALL_TALK_RESPONSES = {"greet": "utter_greet", "goodbye": "utter_goodbye"}
+SMALL_TALK_THRESHOLD = 90
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+@functools.lru_cache(maxsize=1)
+def small_talk_examples() -> dict:
+    """
+    Normalized greet / goodbye training examples mapped to their response text, read once
+    from the Rasa project.
+    """
+    with open(os.path.join(RASA_PROJECT_DIR, "domain.yml"), "r", encoding="utf-8") as f:
+        responses = yaml.safe_load(f).get("responses", {})
+    with open(os.path.join(RASA_PROJECT_DIR, "data", "nlu.yml"), "r", encoding="utf-8") as f:
+        nlu = yaml.safe_load(f).get("nlu", [])
+
+    examples = {}
+    for block in nlu:
+        response = SMALL_TALK_RESPONSES.get(block.get("intent"))
+        if response is None or not responses.get(response):
+            continue
+        text = responses[response][0]["text"]
+        for line in (block.get("examples") or "").splitlines():
+            example = _normalize(line.strip().lstrip("-"))
+            if example:
+                examples[example] = text
+    return examples
+
+
+def match_small_talk(user_query: str):
+    """
+    The canned response to a greeting or goodbye, or None for any other message.
+
+    A message matches when it equals a training example once case and punctuation are
+    ignored, or is within SMALL_TALK_THRESHOLD (fuzzy ratio) of one, e.g. a typo.
+    """
+    query = _normalize(user_query)
+    if not query:
+        return None
+    examples = small_talk_examples()
+    if query in examples:
+        return examples[query]
+    best = max(examples, key=lambda example: fuzz.ratio(query, example), default=None)
+    if best is not None and fuzz.ratio(query, best) >= SMALL_TALK_THRESHOLD:
+        return examples[best]
+    return None
+
+
+async def route_query(user_query: str, sender_id: str, stream: bool = False):
+    """
+    Answers one user message: small talk, then a FAQ match, then RAG.
+
+    Args:
+        user_query (str): The user's message.
+        sender_id (str): Conversation id; keys the chat memory of the RAG answer.
+        stream (bool): Stream the RAG answer token by token (answer_query_stream()) instead
+            of producing it in one piece (answer_query_async()).
+
+    Yields:
+        str: Answer fragments. Errors are answered with a message rather than raised.
+    """
+    if not user_query or not user_query.strip():
+        logger.warning("[SmartRouter] Empty or missing user query.")
+        annotate(route="invalid")
+        yield INVALID_QUERY_MESSAGE
+        return
+    user_query = user_query.strip()
+
+    try:
+        with span("faq_match"):
+            answer = match_small_talk(user_query)
+            route = "small_talk"
+            if answer is None:
+                answer, route = match_faq(user_query), "faq"
+        if answer is not None:
+            logger.info(f"[SmartRouter] Responding with {route} answer: '{answer}'")
+            annotate(route=route)
+            yield answer
+            return
+        logger.info("[SmartRouter] Proceeding to RAG.")
+    except Exception as e:
+        logger.error(f"[SmartRouter] Error during FAQ matching: {str(e)}")
+
+    answered = False
+    try:
+        logger.debug("[SmartRouter] Fetching shared RAG components...")
+        components = (component_pool.get_embedding_model(), component_pool.get_vectorstore(),
+                      component_pool.get_llm())
+        options = {"session_id": sender_id,
+                   "cache": component_pool.get_answer_cache() if ANSWER_CACHE_ENABLED else None,
+                   "fallback": match_faq_fallback, "reranker": component_pool.get_reranker()}
+
+        logger.debug("[SmartRouter] Calling RAG pipeline...")
+        if stream:
+            async for fragment in answer_query_stream(user_query, *components, **options):
+                answered = answered or bool(fragment.strip())
+                yield fragment
+        else:
+            answer = await answer_query_async(user_query, *components, **options)
+            if answer and answer.strip():
+                answered = True
+                yield answer
+    except Exception as e:
+        logger.error(f"[SmartRouter] Error in RAG logic: {str(e)}")
+        annotate(outcome="error")
+        yield RAG_ERROR_MESSAGE
+        return
+
+    if not answered:
+        logger.warning("[SmartRouter] Empty response from RAG. Sending fallback message.")
+        yield NO_ANSWER_MESSAGE
@@ -0,0 +1,109 @@
+"""
+This module provides a streaming chat endpoint that runs next to the Rasa REST webhook.
+
+The Rasa REST channel only returns once the action server has produced the complete answer.
+This Sanic app accepts the same payload as /webhooks/rest/webhook ({"sender", "message"}),
+routes messages with the same router as ActionSmartRouter (rasa_layer/smart_router.py: small
+talk, FAQ, RAG) and streams the RAG answer to the browser as Server-Sent Events while the LLM
+is still generating it. The sender id keys the conversation's chat memory, so every client
+must send its own.
+
+Per-stage timings of every request are exported in the Prometheus format at GET /metrics
+(see generation/telemetry.py).
+
+Event format:
+    data: {"text": "<fragment>"}     one event per answer fragment
+    event: end                        sent once the answer is complete
+
+Run it from rasa_layer/actions (so CHROMA_DIR resolves like the action server):
+    python ../stream_server.py
+"""
+
+import sys
+import os
+
+# Dynamically add the project root (1 level up from stream_server.py) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import json
+import logging
+from sanic import Sanic
+from sanic.response import empty, raw, json as json_response
+from rasa_layer.component_pool import component_pool
+from rasa_layer.smart_router import route_query, RAG_ERROR_MESSAGE
+from generation.telemetry import trace_request, span, annotate, metrics_payload
+from config import STREAM_SERVER_HOST, STREAM_SERVER_PORT, WARM_UP_COMPONENTS
+
+logger = logging.getLogger(__name__)
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+app = Sanic("rag_stream_server")
+
+
+def sse_event(data: dict = None, event: str = None) -> str:
+    """
+    Formats a single Server-Sent Event.
+
+    Args:
+        data (dict): JSON payload of the event.
+        event (str): Optional event name.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data or {})}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route("/webhooks/stream/webhook", methods=["OPTIONS"])
+async def stream_webhook_preflight(request):
+    return empty(headers=CORS_HEADERS)
+
+
+@app.post("/webhooks/stream/webhook")
+async def stream_webhook(request):
+    payload = request.json or {}
+    user_query = payload.get("message", "")
+    sender_id = payload.get("sender") or "default"
+
+    with trace_request(sender_id) as trace:
+        logger.info(f"[StreamServer] [{trace.request_id}] Received user query from '{sender_id}': '{user_query}'")
+        response = await request.respond(
+            content_type="text/event-stream",
+            headers={**CORS_HEADERS, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        try:
+            async for fragment in route_query(user_query, sender_id, stream=True):
+                with span("dispatch"):
+                    await response.send(sse_event({"text": fragment}))
+        except Exception as e:
+            logger.error(f"[StreamServer] Streaming failed: {str(e)}")
+            annotate(outcome="error")
+            await response.send(sse_event({"text": RAG_ERROR_MESSAGE}))
+        await response.send(sse_event(event="end"))
+        await response.eof()
+
+
+@app.get("/metrics")
+async def metrics(request):
+    body, content_type = metrics_payload()
+    return raw(body, content_type=content_type)
+
+
+@app.get("/health")
+async def health(request):
+    return json_response(component_pool.health(), headers=CORS_HEADERS)
+
+
+if __name__ == "__main__":
+    if WARM_UP_COMPONENTS:
+        component_pool.warm_up()
+    app.run(host=STREAM_SERVER_HOST, port=STREAM_SERVER_PORT, access_log=False)
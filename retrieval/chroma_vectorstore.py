@@ -1,42 +1,111 @@
+import asyncio
 import logging
+import os
 import chromadb
-from config import CHROMA_DIR, COLLECTION_NAME, TOP_K
+from config import CHROMA_DIR, COLLECTION_NAME, TOP_K, FILTER_MIN_RESULTS, HYBRID_RETRIEVAL_ENABLED
+from retrieval.lexical_index import LexicalIndex, lexical_index_path, fuse_with_lexical
+from retrieval.query_understanding import relaxation_ladder
 
 logger = logging.getLogger(__name__)
 
 class ChromaRetriever:
-    def __init__(self, collection_name: str = COLLECTION_NAME):
-        if not CHROMA_DIR:
+    def __init__(self, collection_name: str = COLLECTION_NAME, lexical_index: LexicalIndex = None,
+                 chroma_dir: str = None):
+        chroma_dir = chroma_dir or CHROMA_DIR
+        if not chroma_dir:
             raise ValueError("CHROMA_DIR is not set in config.")
         if not collection_name:
             raise ValueError("COLLECTION_NAME is not set in config.")
         
-        self.client = chromadb.PersistentClient(path=CHROMA_DIR)
+        self.client = chromadb.PersistentClient(path=chroma_dir)
         try:
             self.collection = self.client.get_collection(name=collection_name)
         except Exception as e:
             logger.error(f"Error loading ChromaDB collection '{collection_name}': {e}")
             raise RuntimeError(f"Failed to load ChromaDB collection: {e}")
 
-    def retrieve_documents(self, query_embedding: list, top_k: int = TOP_K) -> list:
+        if lexical_index is None and HYBRID_RETRIEVAL_ENABLED:
+            path = lexical_index_path(collection_name, chroma_dir)
+            if os.path.exists(path):
+                try:
+                    lexical_index = LexicalIndex.load(path)
+                    logger.info(f"Loaded lexical index with {len(lexical_index)} chunks from '{path}'.")
+                except Exception as e:
+                    logger.warning(f"Could not load lexical index '{path}': {e}. Using vector search only.")
+        self.lexical_index = lexical_index
+
+    def _query(self, query_embedding: list, top_k: int, where: dict = None, query_text: str = None) -> list:
+        kwargs = {"where": where} if where else {}
+        results = self.collection.query(query_embeddings=[query_embedding], n_results=top_k, **kwargs)
+        documents = results.get("documents")
+        if not (documents and isinstance(documents, list) and len(documents) > 0):
+            documents = [[]]
+        documents = documents[0]
+        ids = (results.get("ids") or [documents])[0]
+        distances = (results.get("distances") or [[None] * len(documents)])[0]
+        scored = [{"id": i, "text": d, "distance": dist} for i, d, dist in zip(ids, documents, distances)]
+        if self.lexical_index is None or not query_text:
+            return scored
+        return fuse_with_lexical(scored, self.lexical_index, query_text, top_k, where)
+
+    def retrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                        query_text: str = None) -> list:
         """
-        Retrieve the top_k most similar documents for a given query embedding.
+        Retrieve the top_k most similar chunks together with their ids and vector distances.
+
+        When metadata filters are given, the search is restricted to matching chunks. If a
+        filtered search returns fewer than FILTER_MIN_RESULTS documents, the filter is relaxed
+        step by step (see relaxation_ladder()) down to an unfiltered search.
+
+        When the query text is given and a lexical index was built for the collection, BM25
+        results are fused with the vector results by reciprocal rank fusion.
 
         Args:
             query_embedding (list): A list of floats representing the query embedding.
             top_k (int): Number of top documents to retrieve.
+            filters (dict): Optional metadata facets, e.g. {"department": "Computer Science"}.
+            query_text (str): Optional raw question for the lexical side of hybrid search.
 
         Returns:
-            list: A list of document strings, or an empty list if none found.
+            list: {"id", "text", "distance"} dicts, best first. distance is None for
+                keyword-only hits. Empty if none found.
         """
         try:
-            results = self.collection.query(query_embeddings=[query_embedding], n_results=top_k)
-            documents = results.get("documents")
-            if documents and isinstance(documents, list) and len(documents) > 0:
-                return documents[0]
-            else:
+            for where in relaxation_ladder(filters or {}):
+                results = self._query(query_embedding, top_k, where, query_text)
+                if where is None or len(results) >= FILTER_MIN_RESULTS:
+                    break
+                logger.info(f"Filter {where} matched {len(results)} documents. Relaxing.")
+            if not results:
                 logger.warning("No documents returned from query.")
-                return []
+            return results
         except Exception as e:
             logger.error(f"Error during document retrieval: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def retrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                           query_text: str = None) -> list:
+        """
+        Retrieve the top_k most similar documents for a given query embedding.
+
+        Same as retrieve_scored(), returning only the document texts.
+
+        Returns:
+            list: A list of document strings, or an empty list if none found.
+        """
+        return [r["text"] for r in self.retrieve_scored(query_embedding, top_k, filters, query_text)]
+
+    async def aretrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                               query_text: str = None) -> list:
+        """Async wrapper around retrieve_scored(), run in the default executor."""
+        return await asyncio.to_thread(self.retrieve_scored, query_embedding, top_k, filters, query_text)
+
+    async def aretrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                                  query_text: str = None) -> list:
+        """
+        Async wrapper around retrieve_documents().
+
+        Chroma's persistent client has no async API, so the (short, disk-bound) query runs
+        in the default executor to keep the event loop free.
+        """
+        return await asyncio.to_thread(self.retrieve_documents, query_embedding, top_k, filters, query_text)
@@ -0,0 +1,292 @@
+"""
+This module lets one retriever serve several document sets (programmes, admission years)
+that are kept in separate Chroma collections instead of one mixed index.
+
+Every ingested collection is recorded in a registry file next to the Chroma data
+(<CHROMA_DIR>/collections.json) with its source label, embedding model, chunk count,
+optional routing keywords and the centroid of its (normalized) chunk embeddings.
+
+CollectionRouter exposes the retriever interface (retrieve_scored() / retrieve_documents()
+and their async versions) and sends each query only to the relevant collections:
+
+    1. Keywords: if the question mentions keywords of some collections (e.g. "2025",
+       "technology management"), only those collections are candidates.
+    2. Centroids: candidates are ranked by the cosine similarity between the query and their
+       centroid. The best one is always searched; others within ROUTER_MARGIN of it are
+       searched too (an ambiguous query), up to ROUTER_MAX_FANOUT collections.
+
+Searches of several collections run in parallel, on one thread pool shared by every router in
+the process (routers are rebuilt when the index changes, and must not each leave a pool
+behind), and their rankings are merged with reciprocal rank fusion. Routing costs one small matrix-vector product, so the search cost
+of a query depends on ROUTER_MAX_FANOUT, not on the number of registered collections.
+
+The served collections are COLLECTIONS when set, else every registered collection, else
+COLLECTION_NAME alone.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import CHROMA_DIR, COLLECTION_NAME, COLLECTIONS, TOP_K, ROUTER_MARGIN, ROUTER_MAX_FANOUT
+from retrieval.lexical_index import reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE = "collections.json"
+CENTROID_PAGE_SIZE = 1000
+
+# Worker threads are only started when searches are submitted
+_executor = ThreadPoolExecutor(max_workers=max(1, ROUTER_MAX_FANOUT), thread_name_prefix="collection-router")
+
+
+def registry_path(chroma_dir: str = CHROMA_DIR) -> str:
+    """Path of the collection registry stored next to the Chroma data."""
+    return os.path.join(chroma_dir, REGISTRY_FILE)
+
+
+def compute_centroid(collection, page_size: int = CENTROID_PAGE_SIZE) -> list:
+    """
+    Normalized mean of a collection's normalized embeddings, read page by page.
+
+    Returns:
+        List[float]: Centroid, or an empty list for an empty collection.
+    """
+    total, offset = None, 0
+    while True:
+        page = collection.get(include=["embeddings"], limit=page_size, offset=offset)
+        embeddings = page["embeddings"]
+        if embeddings is None or len(embeddings) == 0:
+            break
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        total = vectors.sum(axis=0) if total is None else total + vectors.sum(axis=0)
+        offset += len(vectors)
+    if total is None:
+        return []
+    return (total / max(float(np.linalg.norm(total)), 1e-12)).tolist()
+
+
+class CollectionRegistry:
+    """
+    The registry of ingested collections, persisted as JSON.
+
+    Methods:
+        register(name, collection, **info) -> Dict
+        remove(name) -> None
+        names() -> List[str]
+        save() -> None
+    """
+
+    def __init__(self, path: str = None, entries: dict = None):
+        self.path = path or registry_path()
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: str = None) -> "CollectionRegistry":
+        """Reads the registry; a missing file is an empty registry."""
+        path = path or registry_path()
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f).get("collections", {}))
+
+    def names(self) -> list:
+        return sorted(self.entries)
+
+    def register(self, name: str, collection=None, **info) -> dict:
+        """
+        Adds or updates a collection. When the collection is given, its chunk count and
+        centroid are (re)computed. Fields not passed keep their previous values.
+
+        Args:
+            name (str): Collection name.
+            collection: Chroma collection.
+            **info: source, model_name, description, keywords, ...
+        """
+        entry = dict(self.entries.get(name, {}))
+        entry.update({key: value for key, value in info.items() if value is not None})
+        if collection is not None:
+            entry["count"] = collection.count()
+            entry["centroid"] = compute_centroid(collection)
+        self.entries[name] = entry
+        return entry
+
+    def remove(self, name: str) -> None:
+        self.entries.pop(name, None)
+
+    def save(self) -> None:
+        """Writes the registry atomically."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"collections": self.entries}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(self.path + ".tmp", self.path)
+
+
+def served_collections(registry: CollectionRegistry = None) -> list:
+    """Collections to serve: COLLECTIONS, else all registered ones, else COLLECTION_NAME."""
+    if COLLECTIONS:
+        return list(COLLECTIONS)
+    registry = registry or CollectionRegistry.load()
+    return registry.names() or [COLLECTION_NAME]
+
+
+class CollectionRouter:
+    """
+    Routes each query to the relevant collection retriever(s) and merges their results.
+
+    Attributes:
+        retrievers (Dict[str, Any]): Retriever per collection name.
+        margin (float): Collections within this cosine similarity of the best one are
+            searched too.
+        max_fanout (int): Most collections searched per query.
+
+    Methods:
+        route(query_embedding, query_text) -> List[str]
+        retrieve_scored(query_embedding, top_k, filters, query_text) -> List[Dict]
+        retrieve_documents(query_embedding, top_k, filters, query_text) -> List[str]
+        count() -> int
+    """
+
+    def __init__(self, retrievers: dict, centroids: dict = None, keywords: dict = None,
+                 margin: float = ROUTER_MARGIN, max_fanout: int = ROUTER_MAX_FANOUT):
+        if not retrievers:
+            raise ValueError("CollectionRouter needs at least one collection.")
+        self.retrievers = retrievers
+        self.names = list(retrievers)
+        self.margin = margin
+        self.max_fanout = max(1, max_fanout)
+        self.keywords = {
+            name: [re.compile(r"\b" + re.escape(k.lower()) + r"\b") for k in (keywords or {}).get(name, [])]
+            for name in self.names
+        }
+
+        centroids = centroids or {}
+        dims = {len(c) for c in centroids.values() if c}
+        self.routable = [name for name in self.names if centroids.get(name)] if len(dims) == 1 else []
+        missing = [name for name in self.names if name not in self.routable]
+        if missing:
+            logger.warning(f"No usable centroid for collections {missing}; they are searched only when no "
+                           f"collection can be routed by centroid.")
+        self.centroids = (np.asarray([centroids[name] for name in self.routable], dtype=np.float32)
+                          if self.routable else None)
+
+    @classmethod
+    def from_registry(cls, registry: CollectionRegistry, retriever_factory, names: list = None, **kwargs):
+        """
+        Builds a router over the given (default: all registered) collections.
+
+        Args:
+            registry (CollectionRegistry): Registry with centroids and keywords.
+            retriever_factory (Callable[[str], Any]): Builds the retriever of one collection.
+            names (List[str]): Collections to serve.
+        """
+        names = names or registry.names()
+        entries = {name: registry.entries.get(name, {}) for name in names}
+        return cls({name: retriever_factory(name) for name in names},
+                   centroids={name: entry.get("centroid") for name, entry in entries.items()},
+                   keywords={name: entry.get("keywords", []) for name, entry in entries.items()}, **kwargs)
+
+    def count(self) -> int:
+        return sum(r.count() if hasattr(r, "count") else r.collection.count() for r in self.retrievers.values())
+
+    def route(self, query_embedding, query_text: str = None) -> list:
+        """
+        Picks the collections to search for a query.
+
+        Returns:
+            List[str]: Collection names, most relevant first.
+        """
+        candidates = self.names
+        if query_text:
+            text = query_text.lower()
+            matched = [name for name in self.names if any(p.search(text) for p in self.keywords[name])]
+            if matched:
+                candidates = matched
+
+        routable = [name for name in candidates if name in self.routable]
+        if not routable or query_embedding is None or not len(query_embedding):
+            return candidates[:self.max_fanout]
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        rows = [self.routable.index(name) for name in routable]
+        similarities = self.centroids[rows] @ query
+        order = np.argsort(-similarities, kind="stable")
+        best = similarities[order[0]]
+        return [routable[i] for i in order if similarities[i] >= best - self.margin][:self.max_fanout]
+
+    @staticmethod
+    def _merge(results: dict, top_k: int) -> list:
+        """Merges per-collection rankings with reciprocal rank fusion."""
+        if len(results) == 1:
+            return next(iter(results.values()))[:top_k]
+        by_key, rankings = {}, []
+        for name, scored in results.items():
+            ranking = []
+            for item in scored:
+                key = (name, item.get("id") or item["text"])
+                by_key[key] = item
+                ranking.append(key)
+            rankings.append(ranking)
+        return [by_key[key] for key in reciprocal_rank_fusion(rankings)[:top_k]]
+
+    def _search(self, name, query_embedding, top_k, filters, query_text) -> list:
+        retriever = self.retrievers[name]
+        scored = retriever.retrieve_scored(query_embedding, top_k=top_k, filters=filters, query_text=query_text)
+        return [dict(item, collection=name) for item in scored]
+
+    def retrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                        query_text: str = None) -> list:
+        """
+        Retrieves the top_k chunks from the routed collection(s).
+
+        Args:
+            query_embedding (list): Query embedding.
+            top_k (int): Number of chunks to return.
+            filters (dict): Optional metadata facets, passed to every collection.
+            query_text (str): Raw question, for keyword routing and hybrid search.
+
+        Returns:
+            list: {"id", "text", "distance", "collection"} dicts, best first.
+        """
+        names = self.route(query_embedding, query_text)
+        if len(names) == 1:
+            return self._search(names[0], query_embedding, top_k, filters, query_text)
+        futures = {name: _executor.submit(self._search, name, query_embedding, top_k, filters, query_text)
+                   for name in names}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Retrieval from collection '{name}' failed: {e}")
+        return self._merge(results, top_k) if results else []
+
+    def retrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                           query_text: str = None) -> list:
+        """Same as retrieve_scored(), returning only the document texts."""
+        return [r["text"] for r in self.retrieve_scored(query_embedding, top_k, filters, query_text)]
+
+    async def aretrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                               query_text: str = None) -> list:
+        """Async version of retrieve_scored(); routed collections are searched concurrently."""
+        names = self.route(query_embedding, query_text)
+        outcomes = await asyncio.gather(*(
+            asyncio.to_thread(self._search, name, query_embedding, top_k, filters, query_text) for name in names
+        ), return_exceptions=True)
+        results = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Retrieval from collection '{name}' failed: {outcome}")
+            else:
+                results[name] = outcome
+        return self._merge(results, top_k) if results else []
+
+    async def aretrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                                  query_text: str = None) -> list:
+        """Async version of retrieve_documents()."""
+        return [r["text"] for r in await self.aretrieve_scored(query_embedding, top_k, filters, query_text)]
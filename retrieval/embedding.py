@@ -1,44 +1,95 @@
 """
-This module provides a wrapper for generating text embeddings using Jina AI's embedding models.
+This module provides a wrapper for generating text embeddings.
 
-It defines the EmbeddingModel class, which initializes a JinaEmbeddings model using an API key
-and exposes a method to embed input queries into numerical vectors.
+It defines the EmbeddingModel class, which delegates to the backend selected by
+EMBEDDING_BACKEND (Jina AI's API by default, or a local ONNX / sentence-transformers model
+on CPU, see retrieval/embedding_backends.py) and exposes a method to embed input queries
+into numerical vectors. Query embeddings are served from a local EmbeddingCache when the
+same text was embedded before.
 The embeddings generated can be used in downstream tasks such as semantic search, clustering,
 or feeding into a retrieval-augmented generation (RAG) pipeline.
 """
 
 import logging
-from langchain_community.embeddings import JinaEmbeddings
-from config import JINA_API_KEY, EMBEDDING_MODEL_NAME  # Allow model name config
+import time
+from config import EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, EMBEDDING_CACHE_ENABLED  # Allow model name config
+from retrieval.embedding_backends import EmbeddingBackend, JinaBackend, create_backend
+from retrieval.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
 class EmbeddingModel:
     """
-    Initializes the JinaEmbeddings model using a configured API key and model name,
-    and generates vector embeddings for input queries.
+    Initializes the configured embedding backend and generates vector embeddings for
+    input queries.
     """
 
-    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
-        if not JINA_API_KEY or not JINA_API_KEY.strip():
-            logger.error("JINA_API_KEY is missing or invalid.")
-            raise ValueError("JINA_API_KEY is missing. Please set it in your .env or config.py.")
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache: EmbeddingCache = None, timeout: float = 10.0,
+                 backend: EmbeddingBackend = None):
+        if backend is None:
+            try:
+                options = {"timeout": timeout} if (EMBEDDING_BACKEND or "jina").lower() == JinaBackend.name else {}
+                backend = create_backend(EMBEDDING_BACKEND, model_name, **options)
+                logger.info(f"Embedding backend '{EMBEDDING_BACKEND}' initialized with model: {model_name}")
+            except Exception as e:
+                logger.exception(f"Failed to initialize embedding backend '{EMBEDDING_BACKEND}': {e}")
+                raise
+
+        if cache is None and EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(backend.cache_namespace)
+        self.backend = backend
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: list) -> list:
+        """
+        Embeds a batch of texts in one backend call (no caching).
+
+        Args:
+            texts (List[str]): Input strings.
+
+        Returns:
+            List[list]: One embedding per input text.
+        """
+        return self.backend.embed_documents(texts) if texts else []
+
+    def embed_query(self, text: str) -> list:
+        """
+        Generates an embedding for the input text.
+
+        Args:
+            text (str): The input string to embed.
+
+        Returns:
+            list: A list of floats representing the text embedding.
+        """
+        if not text or not text.strip():
+            logger.warning("Empty or whitespace-only text received for embedding.")
+            return []
+
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                logger.info("Query embedding served from cache.")
+                return cached
 
         try:
-            logger.info(f"Initializing JinaEmbeddings with model: {model_name}")
-            self.model = JinaEmbeddings(
-                jina_api_key=JINA_API_KEY,
-                model_name=model_name
-            )
-            logger.info("JinaEmbeddings initialized successfully.")
+            start = time.perf_counter()
+            embedding = self.backend.embed_query(text)
+            logger.info("Query embedded successfully.")
+            if self.cache is not None:
+                self.cache.put(text, embedding, latency=time.perf_counter() - start)
+            return embedding
         except Exception as e:
-            logger.exception(f"Failed to initialize JinaEmbeddings: {e}")
-            raise
+            logger.exception(f"Embedding failed for input: '{text[:30]}...' | Error: {e}")
+            return []
 
-    def embed_query(self, text: str) -> list:
+    async def aembed_query(self, text: str) -> list:
         """
-        Generates an embedding for the input text using the Jina model.
+        Async version of embed_query(). The Jina backend uses a pooled httpx.AsyncClient;
+        local backends run inference in a worker thread.
 
         Args:
             text (str): The input string to embed.
@@ -50,9 +101,18 @@ class EmbeddingModel:
             logger.warning("Empty or whitespace-only text received for embedding.")
             return []
 
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                logger.info("Query embedding served from cache.")
+                return cached
+
         try:
-            embedding = self.model.embed_query(text)
+            start = time.perf_counter()
+            embedding = await self.backend.aembed_query(text)
             logger.info("Query embedded successfully.")
+            if self.cache is not None:
+                self.cache.put(text, embedding, latency=time.perf_counter() - start)
             return embedding
         except Exception as e:
             logger.exception(f"Embedding failed for input: '{text[:30]}...' | Error: {e}")
@@ -0,0 +1,291 @@
+"""
+This module provides the embedding backends behind EmbeddingModel, selected with EMBEDDING_BACKEND.
+
+    jina                    Jina AI embeddings API (default, needs JINA_API_KEY and network access)
+    onnx                    Local ONNX Runtime model on CPU, e.g. an int8-quantized bge-small export
+    sentence-transformers   Local sentence-transformers model on CPU
+
+Every backend embeds a batch of texts in one call and exposes a cache_namespace, which is
+the name its vectors are cached under. Vectors from different backends are not
+interchangeable, so the Chroma collection must be built with the same backend that serves
+queries (see data_preprocessing/chromadb_manager.py).
+
+The local backends expect the model files on disk, so they also work without network access:
+    LOCAL_EMBEDDING_MODEL_DIR/
+        model.onnx              full-precision export
+        model_quantized.onnx    int8 export, used when EMBEDDING_QUANTIZED is true
+        tokenizer.json          Hugging Face fast tokenizer
+
+The cache namespace of a local backend includes a fingerprint of the model files it loaded,
+so replacing the model on disk under the same EMBEDDING_MODEL_NAME never serves stale vectors.
+"""
+
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import httpx
+import numpy as np
+from config import (
+    JINA_API_KEY, JINA_URL, EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, LOCAL_EMBEDDING_MODEL_DIR,
+    EMBEDDING_QUANTIZED, EMBEDDING_THREADS, EMBEDDING_MAX_LENGTH, EMBEDDING_BATCH_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+JINA_EMBEDDINGS_URL = JINA_URL or "https://api.jina.ai/v1/embeddings"
+
+
+def model_fingerprint(*paths) -> str:
+    """
+    Short hash of the resolved path, size and modification time of model files. Directories
+    contribute their top-level files; missing paths are ignored.
+
+    Returns:
+        str: 12 hex characters, or "" when none of the paths exist.
+    """
+    files = []
+    for path in paths:
+        path = os.path.realpath(path)
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)))
+        else:
+            files.append(path)
+    digest, found = hashlib.sha256(), False
+    for path in files:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+            found = True
+    return digest.hexdigest()[:12] if found else ""
+
+
+class EmbeddingBackend(abc.ABC):
+    """
+    Base class of all embedding backends.
+
+    Subclasses implement embed_documents(); single queries and the async variant are
+    derived from it.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+    @abc.abstractmethod
+    def embed_documents(self, texts: list) -> list:
+        """Embeds a batch of texts, one vector per text in input order."""
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> list:
+        # Local inference is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(self.embed_query, text)
+
+
+class JinaBackend(EmbeddingBackend):
+    """
+    Remote embeddings from the Jina AI API (or a compatible server at `url`, such as the
+    local stand-in in retrieval/mock_embedding_server.py). Sync and async calls each reuse
+    one pooled HTTP client.
+    """
+
+    name = "jina"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, timeout: float = 10.0, url: str = None,
+                 api_key: str = None):
+        api_key = api_key or JINA_API_KEY
+        if not api_key or not api_key.strip():
+            logger.error("JINA_API_KEY is missing or invalid.")
+            raise ValueError("JINA_API_KEY is missing. Please set it in your .env or config.py.")
+        super().__init__(model_name)
+
+        logger.info(f"Initializing Jina embeddings with model: {model_name}")
+        self.url = url or JINA_EMBEDDINGS_URL
+        self.timeout = timeout
+        self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self.client = httpx.Client(timeout=timeout, headers=self.headers)
+        self.async_client = None  # created on first async call, inside the running event loop
+
+    @property
+    def cache_namespace(self) -> str:
+        # Plain model name, so caches written before backends existed stay valid
+        return self.model_name
+
+    @staticmethod
+    def _parse(response) -> list:
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item.get("index", 0))
+        return [item["embedding"] for item in data]
+
+    def embed_documents(self, texts: list) -> list:
+        return self._parse(self.client.post(self.url, json={"input": list(texts), "model": self.model_name}))
+
+    async def aembed_query(self, text: str) -> list:
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(timeout=self.timeout, headers=self.headers)
+        response = await self.async_client.post(self.url, json={"input": [text], "model": self.model_name})
+        return self._parse(response)[0]
+
+
+def mean_pool(hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    Averages token vectors over the non-padding positions and L2-normalizes the result.
+
+    Args:
+        hidden_states (np.ndarray): (batch, tokens, dim) model output.
+        attention_mask (np.ndarray): (batch, tokens) 1 for real tokens, 0 for padding.
+
+    Returns:
+        np.ndarray: (batch, dim) float32 sentence embeddings.
+    """
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (hidden_states * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    Local CPU embeddings with ONNX Runtime.
+
+    Texts are tokenized and run through the model in batches of batch_size; the int8
+    export is used when quantized is set and present on disk.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, model_dir: str = LOCAL_EMBEDDING_MODEL_DIR,
+                 quantized: bool = EMBEDDING_QUANTIZED, threads: int = EMBEDDING_THREADS,
+                 max_length: int = EMBEDDING_MAX_LENGTH, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 session=None, tokenizer=None):
+        super().__init__(model_name)
+        self.batch_size = batch_size
+        self.quantized = quantized
+        self.fingerprint = ""
+
+        if tokenizer is None:
+            from tokenizers import Tokenizer
+            tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.enable_padding()
+        self.tokenizer = tokenizer
+
+        if session is None:
+            import onnxruntime as ort
+            model_path = os.path.join(model_dir, "model.onnx")
+            quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+            if quantized and os.path.exists(quantized_path):
+                model_path = quantized_path
+            elif quantized:
+                logger.warning(f"No quantized model in '{model_dir}'. Using full-precision weights.")
+                self.quantized = False
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            logger.info(f"Loading ONNX embedding model '{model_path}' with {threads} threads.")
+            session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+            self.fingerprint = model_fingerprint(model_path, os.path.join(model_dir, "tokenizer.json"))
+        self.session = session
+        self.input_names = {node.name for node in session.get_inputs()}
+        self.output_names = [node.name for node in session.get_outputs()]
+
+    @property
+    def cache_namespace(self) -> str:
+        namespace = f"{self.name}:{self.model_name}{':int8' if self.quantized else ''}"
+        return f"{namespace}:{self.fingerprint}" if self.fingerprint else namespace
+
+    def _run_batch(self, texts: list) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        if "sentence_embedding" in self.output_names:
+            # Exports that already include pooling
+            (pooled,) = self.session.run(["sentence_embedding"], feeds)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+        hidden_states = self.session.run([self.output_names[0]], feeds)[0]
+        return mean_pool(hidden_states, attention_mask)
+
+    def embed_documents(self, texts: list) -> list:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._run_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+
+class SentenceTransformersBackend(EmbeddingBackend):
+    """Local CPU embeddings with a sentence-transformers model (name or directory)."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, threads: int = EMBEDDING_THREADS,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, quantized: bool = EMBEDDING_QUANTIZED):
+        super().__init__(model_name)
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("The sentence-transformers embedding backend needs the sentence-transformers and "
+                              "torch packages, which are not in requirements.txt: "
+                              "pip install sentence-transformers torch") from e
+
+        torch.set_num_threads(threads)
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.quantized = quantized
+        # Hub models are versioned by name; a local directory can change under the same name
+        self.fingerprint = model_fingerprint(model_name) if os.path.isdir(model_name) else ""
+        if quantized:
+            # Dynamic int8 quantization of the linear layers; weights stay on disk unchanged
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @property
+    def cache_namespace(self) -> str:
+        namespace = f"{self.name}:{self.model_name}{':int8' if self.quantized else ''}"
+        return f"{namespace}:{self.fingerprint}" if self.fingerprint else namespace
+
+    def embed_documents(self, texts: list) -> list:
+        vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32).tolist()
+
+
+EMBEDDING_BACKENDS = {
+    JinaBackend.name: JinaBackend,
+    OnnxBackend.name: OnnxBackend,
+    SentenceTransformersBackend.name: SentenceTransformersBackend,
+}
+
+
+def create_backend(backend: str = EMBEDDING_BACKEND, model_name: str = EMBEDDING_MODEL_NAME, **kwargs) -> EmbeddingBackend:
+    """
+    Instantiates an embedding backend by name.
+
+    Args:
+        backend (str): Key of EMBEDDING_BACKENDS ("jina", "onnx" or "sentence-transformers").
+        model_name (str): Model identifier passed to the backend.
+        **kwargs: Backend-specific options (threads, quantized, ...).
+
+    Returns:
+        EmbeddingBackend: The initialized backend.
+    """
+    backend = (backend or "jina").lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Choose from {sorted(EMBEDDING_BACKENDS)}.")
+    return EMBEDDING_BACKENDS[backend](model_name=model_name, **kwargs)
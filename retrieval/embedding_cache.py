@@ -0,0 +1,249 @@
+"""
+This module provides a two-tier cache for query embeddings.
+
+Entries are keyed by a SHA-256 hash of the model name and the input text, so switching
+EMBEDDING_MODEL_NAME can never serve vectors from another model. The first tier is an
+in-memory LRU. The second tier is an append-only file of packed float32 rows that is read
+through a numpy memory map, which keeps start-up cheap and lets the cache survive restarts
+of the action server.
+
+On-disk layout (one directory per model):
+    meta.json     model name and vector dimension
+    vectors.f32   row-major float32 matrix, one row per cached text
+    keys.txt      one hex key per line, in row order
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from generation.telemetry import record_embedding_cache_lookup
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MEMORY_SIZE
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEY_LINE_BYTES = 65  # 64 hex characters + newline
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """
+    Builds the content-hash key for a text embedded by a given model.
+
+    Args:
+        model_name (str): Embedding model identifier.
+        text (str): Input text.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU backed by a persistent, memory-mapped float32 store.
+
+    Attributes:
+        model_name (str): Embedding model whose vectors are cached.
+        cache_dir (str): Root directory of the on-disk tier; None disables it.
+        max_memory_entries (int): Capacity of the in-memory LRU.
+
+    Methods:
+        get(text: str) -> Optional[list]
+        put(text: str, embedding: list, latency: float = 0.0) -> None
+        stats() -> dict
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR,
+                 max_memory_entries: int = EMBEDDING_CACHE_MEMORY_SIZE):
+        self.model_name = model_name
+        self.max_memory_entries = max_memory_entries
+        self.cache_dir = None
+        if cache_dir:
+            slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+            digest = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:8]
+            self.cache_dir = os.path.join(cache_dir, f"{slug}-{digest}")
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk_index = {}
+        self._dim = None
+        self._mmap = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._miss_latency_total = 0.0
+        self._miss_latency_count = 0
+
+        if self.cache_dir:
+            self._load_disk_index()
+
+    # ----- disk tier -----
+
+    def _paths(self):
+        return (os.path.join(self.cache_dir, "meta.json"),
+                os.path.join(self.cache_dir, "vectors.f32"),
+                os.path.join(self.cache_dir, "keys.txt"))
+
+    def _load_disk_index(self) -> None:
+        meta_path, vectors_path, keys_path = self._paths()
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model_name") != self.model_name:
+                logger.warning("Embedding cache metadata does not match the model. Ignoring disk tier.")
+                return
+            self._dim = int(meta["dim"])
+
+            with open(keys_path, "r", encoding="ascii") as f:
+                keys = [line.strip() for line in f]
+            rows = os.path.getsize(vectors_path) // (self._dim * 4)
+
+            # A crash between the two appends leaves the files out of step; keep the common prefix
+            usable = min(rows, os.path.getsize(keys_path) // KEY_LINE_BYTES)
+            self._disk_index = {key: row for row, key in enumerate(keys[:usable])}
+            self._mmap = None
+            logger.info(f"Loaded {usable} cached embeddings from '{self.cache_dir}'.")
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache from disk: {e}")
+            self._disk_index = {}
+
+    def _read_row(self, row: int):
+        _, vectors_path, _ = self._paths()
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            rows = os.path.getsize(vectors_path) // (self._dim * 4)
+            self._mmap = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+        return self._mmap[row].tolist()
+
+    def _append_disk(self, key: str, vector: np.ndarray) -> None:
+        meta_path, vectors_path, keys_path = self._paths()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._dim is None:
+            self._dim = vector.shape[0]
+            if not os.path.exists(meta_path):
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dim": self._dim}, f)
+        if vector.shape[0] != self._dim:
+            logger.warning("Embedding dimension changed; not persisting vector to disk cache.")
+            return
+
+        row_bytes = self._dim * 4
+        with open(keys_path, "ab") as keys_file, open(vectors_path, "ab") as vectors_file:
+            if fcntl is not None:
+                fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                # Keys are fixed width, so the key file length is the authoritative row count.
+                # Trim anything an interrupted writer left behind before appending.
+                row = keys_file.seek(0, os.SEEK_END) // KEY_LINE_BYTES
+                keys_file.truncate(row * KEY_LINE_BYTES)
+                vectors_file.truncate(row * row_bytes)
+                vectors_file.write(vector.astype(np.float32).tobytes())
+                vectors_file.flush()
+                keys_file.write((key + "\n").encode("ascii"))
+                keys_file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(keys_file, fcntl.LOCK_UN)
+        self._disk_index[key] = row
+
+    # ----- public API -----
+
+    def get(self, text: str):
+        """
+        Returns the cached embedding for a text, promoting disk hits into memory. Every
+        lookup is also exported as a metric (see generation.telemetry).
+
+        Args:
+            text (str): Input text.
+
+        Returns:
+            Optional[list]: A copy of the embedding, or None on a miss.
+        """
+        key = embedding_cache_key(self.model_name, text)
+        with self._lock:
+            result, embedding = self._lookup(key)
+            self._counters["misses" if result == "miss" else f"{result}_hits"] += 1
+            saved = self._avg_miss_latency() if embedding is not None else 0.0
+        record_embedding_cache_lookup(result, saved)
+        return embedding
+
+    def _lookup(self, key: str):
+        """Returns (tier, embedding) where tier is "memory", "disk" or "miss"."""
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            self._memory.move_to_end(key)
+            return "memory", list(embedding)
+
+        row = self._disk_index.get(key)
+        if row is not None:
+            try:
+                embedding = self._read_row(row)
+                self._remember(key, embedding)
+                return "disk", list(embedding)
+            except Exception as e:
+                logger.warning(f"Failed to read embedding from disk cache: {e}")
+        return "miss", None
+
+    def _avg_miss_latency(self) -> float:
+        if not self._miss_latency_count:
+            return 0.0
+        return self._miss_latency_total / self._miss_latency_count
+
+    def _remember(self, key: str, embedding: list) -> None:
+        # Stored as a tuple so that callers can never modify the cached vector
+        self._memory[key] = tuple(embedding)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, text: str, embedding: list, latency: float = 0.0) -> None:
+        """
+        Stores an embedding in memory and, if enabled, on disk.
+
+        Args:
+            text (str): Input text.
+            embedding (list): Vector returned by the model.
+            latency (float): Seconds the remote call took; used for saved-latency metrics.
+        """
+        if not embedding:
+            return
+        key = embedding_cache_key(self.model_name, text)
+        with self._lock:
+            self._remember(key, embedding)
+            if latency > 0:
+                self._miss_latency_total += latency
+                self._miss_latency_count += 1
+            if self.cache_dir and key not in self._disk_index:
+                try:
+                    self._append_disk(key, np.asarray(embedding, dtype=np.float32))
+                except Exception as e:
+                    logger.warning(f"Failed to persist embedding to disk cache: {e}")
+
+    def stats(self) -> dict:
+        """
+        Returns hit counters, hit rate and an estimate of latency saved by cache hits. The
+        same figures are exported as embedding_cache_* Prometheus metrics.
+
+        Returns:
+            dict: Counters, "hit_rate", "avg_miss_latency" and "saved_seconds".
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            hits = stats["memory_hits"] + stats["disk_hits"]
+            total = hits + stats["misses"]
+            avg_miss_latency = self._avg_miss_latency()
+            stats["hit_rate"] = hits / total if total else 0.0
+            stats["avg_miss_latency"] = avg_miss_latency
+            stats["saved_seconds"] = hits * avg_miss_latency
+            stats["memory_size"] = len(self._memory)
+            stats["disk_size"] = len(self._disk_index)
+        return stats
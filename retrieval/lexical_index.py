@@ -0,0 +1,215 @@
+"""
+This module provides a BM25 keyword index that complements dense retrieval.
+
+Admissions questions are often keyword-heavy ("GATE score", "OBC reservation", "hall ticket")
+and embeddings do not always rank the chunk containing the exact term first. The index is
+built at ingest time next to the Chroma collection and stored as compact arrays:
+
+    <CHROMA_DIR>/<collection>.lexical.npz
+        indptr    int64[n_terms + 1]   postings of term t are doc_ids[indptr[t]:indptr[t + 1]]
+        doc_ids   int32[n_postings]    document row of every posting
+        weights   float32[n_postings]  precomputed BM25 weight of the term in that document
+        doc_len   float32[n_docs]      document lengths (BM25 length norms)
+    <CHROMA_DIR>/<collection>.lexical.json
+        terms, chunk ids, chunk texts and the string metadata used for filtering
+
+Because BM25 weights are precomputed per posting, a query is a handful of vectorized
+scatter-adds followed by an argpartition, which stays well under a millisecond for a
+prospectus-sized corpus. Results are merged with the vector results using reciprocal rank
+fusion (reciprocal_rank_fusion()).
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+from config import CHROMA_DIR, RRF_K
+from retrieval.query_understanding import where_mask
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it me my of on or the to what when
+where which who will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercases text and splits it into alphanumeric terms, dropping stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def lexical_index_path(collection_name: str, chroma_dir: str = CHROMA_DIR) -> str:
+    """Path of the .npz array file of a collection's lexical index."""
+    return os.path.join(chroma_dir, f"{collection_name}.lexical.npz")
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """
+    Merges ranked lists of ids with reciprocal rank fusion.
+
+    Every id scores sum(1 / (k + rank)) over the lists it appears in (rank starting at 1),
+    so documents ranked well by both retrievers rise to the top without having to
+    calibrate BM25 scores against vector distances.
+
+    Args:
+        rankings (List[List[str]]): Ranked id lists, best first.
+        k (int): Damping constant; 60 is the usual choice.
+
+    Returns:
+        List[str]: Ids ordered by fused score.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class LexicalIndex:
+    """
+    Immutable BM25 index over the chunks of one collection.
+
+    Methods:
+        build(records, k1, b) -> LexicalIndex
+        load(path) -> LexicalIndex
+        save(path) -> None
+        search(query: str, top_k: int, where: dict = None) -> List[Tuple[int, float]]
+    """
+
+    def __init__(self, terms, indptr, doc_ids, weights, doc_len, ids, texts, metadata=None):
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.doc_len = doc_len
+        self.ids = ids
+        self.texts = texts
+        self.metadata = {field: np.asarray(values) for field, values in (metadata or {}).items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, records: list, k1: float = 1.2, b: float = 0.75) -> "LexicalIndex":
+        """
+        Builds the index from chunk records as produced by chromadb_manager.build_records().
+
+        Args:
+            records (List[Dict]): Records with "id", "text" and "metadata".
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        term_counts = [Counter(tokenize(r["text"])) for r in records]
+        doc_len = np.array([sum(c.values()) for c in term_counts], dtype=np.float32)
+        avg_len = float(doc_len.mean()) if len(records) else 0.0
+
+        postings = {}
+        for row, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids, weights = [], []
+        n_docs = len(records)
+        for t, term in enumerate(terms):
+            plist = postings[term]
+            idf = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for row, tf in plist:
+                norm = k1 * (1.0 - b + b * doc_len[row] / avg_len) if avg_len else k1
+                doc_ids.append(row)
+                weights.append(idf * tf * (k1 + 1.0) / (tf + norm))
+            indptr[t + 1] = len(doc_ids)
+
+        metadata = {}
+        for record in records:
+            for field, value in record.get("metadata", {}).items():
+                if isinstance(value, str):
+                    metadata.setdefault(field, []).append(value)
+        metadata = {field: values for field, values in metadata.items() if len(values) == n_docs}
+
+        return cls(terms, indptr, np.array(doc_ids, dtype=np.int32), np.array(weights, dtype=np.float32),
+                   doc_len, [r["id"] for r in records], [r["text"] for r in records], metadata)
+
+    def save(self, path: str) -> None:
+        """Writes the arrays to `path` (.npz) and the strings to the .json sidecar."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        terms = sorted(self.term_ids, key=self.term_ids.get)
+        with open(path, "wb") as f:
+            np.savez(f, indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights, doc_len=self.doc_len)
+        sidecar = {
+            "terms": terms,
+            "ids": self.ids,
+            "texts": self.texts,
+            "metadata": {field: values.tolist() for field, values in self.metadata.items()},
+        }
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Loads an index written by save()."""
+        with open(os.path.splitext(path)[0] + ".json", "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        with np.load(path) as arrays:
+            return cls(sidecar["terms"], arrays["indptr"], arrays["doc_ids"], arrays["weights"],
+                       arrays["doc_len"], sidecar["ids"], sidecar["texts"], sidecar.get("metadata"))
+
+    def search(self, query: str, top_k: int, where: dict = None) -> list:
+        """
+        Scores documents against the query with BM25.
+
+        Args:
+            query (str): Query text.
+            top_k (int): Number of results.
+            where (dict): Optional metadata filter in Chroma's `where` format.
+
+        Returns:
+            List[Tuple[int, float]]: (row, score) pairs, best first; rows index ids/texts.
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.term_ids.get(term)
+            if t is None:
+                continue
+            start, end = self.indptr[t], self.indptr[t + 1]
+            # A term has at most one posting per document, so plain fancy-index add is safe
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+        if where:
+            scores[~where_mask(self.metadata, where, len(self.ids))] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+
+def fuse_with_lexical(scored: list, lexical_index: LexicalIndex, query_text: str, top_k: int, where: dict = None) -> list:
+    """
+    Fuses vector results with BM25 results for the same query and filter.
+
+    Args:
+        scored (List[Dict]): Vector results as {"id", "text", "distance"}, best first.
+        lexical_index (LexicalIndex): Index of the same collection.
+        query_text (str): Raw question.
+        top_k (int): Number of fused results.
+        where (dict): Filter applied to the vector search, applied to BM25 as well.
+
+    Returns:
+        List[Dict]: Fused results; keyword-only hits have distance None.
+    """
+    by_id = {r["id"]: r for r in scored}
+    lexical_ranking = []
+    for row, _ in lexical_index.search(query_text, top_k, where):
+        chunk_id = lexical_index.ids[row]
+        by_id.setdefault(chunk_id, {"id": chunk_id, "text": lexical_index.texts[row], "distance": None})
+        lexical_ranking.append(chunk_id)
+    fused = reciprocal_rank_fusion([[r["id"] for r in scored], lexical_ranking])
+    return [by_id[chunk_id] for chunk_id in fused[:top_k]]
@@ -0,0 +1,213 @@
+"""
+This module provides an exact, in-process vector retriever for small collections.
+
+For a few hundred to a few thousand chunks, a brute-force dot product over a contiguous
+float32 matrix is faster than going through Chroma's SQLite + HNSW stack and its Python
+result marshalling. MemmapRetriever exposes the same retrieve_documents() / retrieve_scored()
+interface as ChromaRetriever, so it can be selected with VECTORSTORE_BACKEND=memmap.
+
+The matrix is exported from the Chroma collection (export_from_chroma()) and stored next to it:
+
+    <CHROMA_DIR>/<collection>.vectors.f32    row-major float32 matrix of L2-normalized embeddings
+    <CHROMA_DIR>/<collection>.vectors.json   dim, count, distance metric, ids, texts, metadata
+
+It is opened with numpy.memmap, so start-up only maps the file and the OS page cache is
+shared between worker processes. Distances are reported in the collection's own metric
+(squared L2 on unit vectors = 2 - 2 * cosine; cosine / ip = 1 - cosine), so thresholds
+such as CONTEXT_MAX_DISTANCE mean the same thing for both retrievers.
+"""
+
+import json
+import logging
+import os
+import numpy as np
+from config import CHROMA_DIR, COLLECTION_NAME, TOP_K, FILTER_MIN_RESULTS, HYBRID_RETRIEVAL_ENABLED
+from retrieval.lexical_index import LexicalIndex, lexical_index_path, fuse_with_lexical
+from retrieval.query_understanding import relaxation_ladder, where_mask
+
+logger = logging.getLogger(__name__)
+
+
+def vectors_path(collection_name: str, chroma_dir: str = CHROMA_DIR) -> str:
+    """Path of the float32 matrix exported for a collection."""
+    return os.path.join(chroma_dir, f"{collection_name}.vectors.f32")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def collection_metric(collection) -> str:
+    """
+    Distance metric of a Chroma collection. Chroma >= 1.0 keeps it in the collection
+    configuration (the hnsw:space metadata key is not kept when the metadata is modified);
+    older versions only have the metadata key.
+    """
+    hnsw = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+    return hnsw.get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def export_from_chroma(collection, path: str) -> int:
+    """
+    Writes a Chroma collection's embeddings, texts and metadata in the memmap layout.
+
+    Both files are written to temporary names and renamed into place (matrix first), so a
+    running retriever never sees a half-written export.
+
+    Args:
+        collection: Chroma collection.
+        path (str): Target .vectors.f32 path (see vectors_path()).
+
+    Returns:
+        int: Number of exported chunks.
+    """
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(data["ids"])
+    embeddings = data["embeddings"]
+    matrix = _normalize(np.asarray(embeddings if len(ids) else np.zeros((0, 1)), dtype=np.float32))
+
+    metadata = {}
+    for meta in data["metadatas"] or []:
+        for field, value in (meta or {}).items():
+            if isinstance(value, str):
+                metadata.setdefault(field, []).append(value)
+    metadata = {field: values for field, values in metadata.items() if len(values) == len(ids)}
+
+    sidecar = {
+        "dim": int(matrix.shape[1]),
+        "count": len(ids),
+        "metric": collection_metric(collection),
+        "ids": ids,
+        "texts": list(data["documents"]),
+        "metadata": metadata,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    matrix.tofile(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    sidecar_path = os.path.splitext(path)[0] + ".json"
+    with open(sidecar_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(sidecar_path + ".tmp", sidecar_path)
+    logger.info(f"Exported {len(ids)} embeddings to '{path}'.")
+    return len(ids)
+
+
+class MemmapRetriever:
+    """
+    Exact top-k search over a memory-mapped, normalized float32 matrix.
+
+    Methods:
+        retrieve_documents(query_embedding, top_k, filters, query_text) -> List[str]
+        retrieve_scored(query_embedding, top_k, filters, query_text) -> List[Dict]
+        search_batch(query_embeddings, top_k) -> List[List[Dict]]
+        count() -> int
+    """
+
+    def __init__(self, collection_name: str = COLLECTION_NAME, chroma_dir: str = CHROMA_DIR,
+                 lexical_index: LexicalIndex = None):
+        path = vectors_path(collection_name, chroma_dir)
+        sidecar_path = os.path.splitext(path)[0] + ".json"
+        if not os.path.exists(sidecar_path):
+            raise RuntimeError(f"No exported vectors for collection '{collection_name}' at '{path}'.")
+
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.ids = sidecar["ids"]
+        self.texts = sidecar["texts"]
+        self.metric = sidecar.get("metric", "l2")
+        self.metadata = {field: np.asarray(values) for field, values in sidecar.get("metadata", {}).items()}
+        count, dim = sidecar["count"], sidecar["dim"]
+        self.matrix = (np.memmap(path, dtype=np.float32, mode="r", shape=(count, dim))
+                       if count else np.zeros((0, dim), dtype=np.float32))
+
+        if lexical_index is None and HYBRID_RETRIEVAL_ENABLED:
+            lexical_path = lexical_index_path(collection_name, chroma_dir)
+            if os.path.exists(lexical_path):
+                try:
+                    lexical_index = LexicalIndex.load(lexical_path)
+                except Exception as e:
+                    logger.warning(f"Could not load lexical index '{lexical_path}': {e}. Using vector search only.")
+        self.lexical_index = lexical_index
+        logger.info(f"Memory-mapped {count} embeddings of dimension {dim} from '{path}'.")
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def _distances(self, similarities: np.ndarray) -> np.ndarray:
+        if self.metric == "l2":
+            return 2.0 - 2.0 * similarities
+        return 1.0 - similarities
+
+    def _top_k(self, similarities: np.ndarray, top_k: int, mask: np.ndarray = None) -> list:
+        if mask is not None:
+            similarities = np.where(mask, similarities, -np.inf)
+            candidates = np.flatnonzero(mask)
+        else:
+            candidates = np.arange(similarities.shape[0])
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-similarities[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        distances = self._distances(similarities[candidates])
+        return [{"id": self.ids[row], "text": self.texts[row], "distance": float(distance)}
+                for row, distance in zip(candidates, distances)]
+
+    def search_batch(self, query_embeddings: list, top_k: int = TOP_K) -> list:
+        """
+        Exact top-k for many queries with a single matrix product.
+
+        Args:
+            query_embeddings (List[list]): Query vectors.
+            top_k (int): Results per query.
+
+        Returns:
+            List[List[Dict]]: {"id", "text", "distance"} results per query, best first.
+        """
+        if not len(query_embeddings) or not self.ids:
+            return [[] for _ in query_embeddings]
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        similarities = queries @ self.matrix.T
+        return [self._top_k(row, top_k) for row in similarities]
+
+    def retrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                        query_text: str = None) -> list:
+        """
+        Retrieve the top_k most similar chunks with their ids and distances.
+
+        Filtering, filter relaxation and hybrid fusion behave exactly like
+        ChromaRetriever.retrieve_scored().
+
+        Returns:
+            list: {"id", "text", "distance"} dicts, best first, or an empty list.
+        """
+        try:
+            if not query_embedding or not self.ids:
+                return []
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+            similarities = self.matrix @ query
+            for where in relaxation_ladder(filters or {}):
+                mask = where_mask(self.metadata, where, len(self.ids)) if where else None
+                results = self._top_k(similarities, top_k, mask)
+                if self.lexical_index is not None and query_text:
+                    results = fuse_with_lexical(results, self.lexical_index, query_text, top_k, where)
+                if where is None or len(results) >= FILTER_MIN_RESULTS:
+                    break
+                logger.info(f"Filter {where} matched {len(results)} documents. Relaxing.")
+            return results
+        except Exception as e:
+            logger.error(f"Error during document retrieval: {e}")
+            return []
+
+    def retrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                           query_text: str = None) -> list:
+        """Same as retrieve_scored(), returning only the document texts."""
+        return [r["text"] for r in self.retrieve_scored(query_embedding, top_k, filters, query_text)]
+
+    async def aretrieve_scored(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                               query_text: str = None) -> list:
+        # A matmul over a few thousand rows takes well under a millisecond; no thread hop needed
+        return self.retrieve_scored(query_embedding, top_k, filters, query_text)
+
+    async def aretrieve_documents(self, query_embedding: list, top_k: int = TOP_K, filters: dict = None,
+                                  query_text: str = None) -> list:
+        return self.retrieve_documents(query_embedding, top_k, filters, query_text)
@@ -0,0 +1,64 @@
+"""
+This module provides the keyword heuristics that label text with metadata facets
+(department, course, section, topic type).
+
+They are shared by ingestion, which tags every chunk with them
+(data_preprocessing/chromadb_manager.py), and by query understanding, which runs them on
+the user's question (retrieval/query_understanding.py). Keeping them here means the action
+server does not import the ingestion code and its dependencies.
+"""
+
+
+def detect_department(text):
+    """Infer department name from chunk text."""
+    lower = text.lower()
+    if "computer science" in lower or "digital image computing" in lower:
+        return "Computer Science"
+    if "futures studies" in lower or "technology management" in lower:
+        return "Futures Studies"
+    if "optoelectronics" in lower or "electronics and communication" in lower:
+        return "Optoelectronics"
+    return "General"
+
+
+def detect_course(text):
+    """Infer specific course name from chunk text."""
+    lower = text.lower()
+    if "digital image computing" in lower:
+        return "M.Tech Computer Science with Specialization in Digital Image Computing"
+    if "technology management" in lower:
+        return "M.Tech Technology Management"
+    if "optoelectronics" in lower or "electronics and communication" in lower:
+        return "M.Tech Electronics and Communication (Optoelectronics and Optical Communication)"
+    return "General"
+
+
+def detect_section(text):
+    """Identify document section like eligibility, fees, etc."""
+    lower = text.lower()
+    keywords = {
+        "Eligibility": ["eligibility"],
+        "Fees": ["fee", "tuition"],
+        "Reservation": ["reservation"],
+        "Important Dates": ["important dates", "notification"],
+        "Application Process": ["application"],
+        "Admission Procedure": ["admission", "how to apply"],
+        "Entrance Exam": ["entrance"],
+        "Rank List": ["rank list"]
+    }
+    for label, keys in keywords.items():
+        if any(k in lower for k in keys):
+            return label
+    return "General"
+
+
+def detect_topic_type(text):
+    """Classify chunk as instruction vs department-specific."""
+    lower = text.lower()
+    if any(keyword in lower for keyword in [
+        "online application", "entrance", "admit card", "admission memo", "about the university",
+        "important information", "admision activities", "fee payment", "instructions", "apply online",
+        "upload", "hall ticket", "how to apply", "rank list", "reservation"
+    ]):
+        return "Instruction"
+    return "Department-Specific"
@@ -0,0 +1,100 @@
+"""
+This module provides a deterministic stand-in for the Jina embeddings API, for local runs,
+tests and load tests without an API key or network access.
+
+POST /v1/embeddings accepts {"input": [...], "model": ...} and answers in Jina's format.
+Vectors are L2-normalized feature-hashing bags of words (hash_embedding()), so texts that
+share words get similar vectors and retrieval against a collection embedded by the same
+server behaves plausibly. A fixed per-request latency can be simulated.
+
+Point JinaBackend at it with url=".../v1/embeddings" (or JINA_URL), e.g.:
+    python -m retrieval.mock_embedding_server --port 8766 --dim 1024 --latency 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from utils.mock_http import MockServer, serve_in_background
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hash_embedding(text: str, dim: int = 1024) -> list:
+    """Deterministic, normalized bag-of-words vector of a text."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in WORD_PATTERN.findall(text.lower()):
+        digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % dim] += 1.0 if (digest >> 63) == 0 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0  # keep empty texts valid (Chroma rejects zero vectors with cosine)
+        norm = 1.0
+    return (vector / norm).tolist()
+
+
+class MockEmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.mock_config
+        time.sleep(config["latency"])
+        texts = body.get("input") or []
+        data = [{"object": "embedding", "index": i, "embedding": hash_embedding(text, config["dim"])}
+                for i, text in enumerate(texts)]
+        payload = json.dumps({"model": body.get("model"), "object": "list", "data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8766, dim: int = 1024, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Creates (but does not start) a mock embeddings server. port=0 picks a free port."""
+    server = MockServer((host, port), MockEmbeddingHandler)
+    server.mock_config = {"dim": dim, "latency": latency}
+    return server
+
+
+def start_in_background(port: int = 0, **kwargs):
+    """
+    Starts a mock embeddings server in a daemon thread, on a free port unless one is given.
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: The server (call shutdown() and server_close() when
+            done) and its embeddings URL.
+    """
+    server = create_server(port=port, **kwargs)
+    return server, f"{serve_in_background(server)}/v1/embeddings"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic Jina-compatible mock embeddings server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = create_server(args.host, args.port, args.dim, args.latency)
+    logger.info(f"Mock embeddings server listening on http://{args.host}:{args.port}/v1/embeddings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+This module infers metadata facets from a user question so retrieval can be narrowed down.
+
+Chunks are tagged at ingestion time by the detect_* heuristics in
+retrieval/metadata_detectors.py. Running the same heuristics on the question gives
+facets that can be pushed down to Chroma as `where` filters, e.g.
+
+    "Fees for M.Tech Technology Management?"
+        -> {"course": "M.Tech Technology Management",
+            "department": "Futures Studies",
+            "section": "Fees"}
+
+Facets the heuristics cannot decide ("General", "Department-Specific") are left out, since
+filtering on a default label would exclude most relevant chunks.
+"""
+
+import numpy as np
+from retrieval.metadata_detectors import detect_course, detect_department, detect_section, detect_topic_type
+
+# Facet name -> detector, most specific first
+FACET_DETECTORS = {
+    "course": detect_course,
+    "department": detect_department,
+    "section": detect_section,
+    "topic_type": detect_topic_type,
+}
+
+# Labels the detectors return when they found nothing specific
+UNSPECIFIED_VALUES = {"General", "Department-Specific"}
+
+# Facets describing what the question is about, kept when the full filter is relaxed
+SUBJECT_FACETS = ("course", "department")
+
+
+def infer_facets(query: str) -> dict:
+    """
+    Runs the chunk-tagging heuristics on a question.
+
+    Args:
+        query (str): User question.
+
+    Returns:
+        dict: Facet name -> value for every facet that was detected.
+    """
+    if not query or not query.strip():
+        return {}
+    facets = {}
+    for name, detect in FACET_DETECTORS.items():
+        value = detect(query)
+        if value not in UNSPECIFIED_VALUES:
+            facets[name] = value
+    return facets
+
+
+def build_where(facets: dict):
+    """
+    Converts facets into a Chroma `where` clause.
+
+    Args:
+        facets (dict): Facet name -> value.
+
+    Returns:
+        Optional[dict]: The clause, or None when there is nothing to filter on.
+    """
+    clauses = [{name: value} for name, value in facets.items()]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def relaxation_ladder(facets: dict) -> list:
+    """
+    Lists the `where` clauses to try, from most to least specific.
+
+    The ladder is: all facets, then only the subject facets (course / department), then no
+    filter at all, skipping steps that would repeat the previous one.
+
+    Args:
+        facets (dict): Facets returned by infer_facets().
+
+    Returns:
+        List[Optional[dict]]: Clauses to try in order; always ends with None (unfiltered).
+    """
+    steps = [facets, {k: v for k, v in facets.items() if k in SUBJECT_FACETS}]
+    ladder = []
+    for step in steps:
+        where = build_where(step)
+        if where is not None and where not in ladder:
+            ladder.append(where)
+    ladder.append(None)
+    return ladder
+
+
+def where_mask(metadata: dict, where: dict, size: int) -> np.ndarray:
+    """
+    Evaluates a `where` clause from build_where() against column-wise metadata.
+
+    Used by the in-process indexes (lexical, memmap) to apply the same filters as Chroma.
+
+    Args:
+        metadata (Dict[str, np.ndarray]): Facet name -> array of values, one per document.
+        where (dict): {"facet": value} or {"$and": [...]}.
+        size (int): Number of documents.
+
+    Returns:
+        np.ndarray: Boolean mask of matching documents.
+    """
+    if "$and" in where:
+        mask = np.ones(size, dtype=bool)
+        for clause in where["$and"]:
+            mask &= where_mask(metadata, clause, size)
+        return mask
+    (field, value), = where.items()
+    values = metadata.get(field)
+    if values is None:
+        return np.zeros(size, dtype=bool)
+    return np.asarray(values) == value
@@ -0,0 +1,149 @@
+"""
+This module provides an optional cross-encoder reranking stage between retrieval and prompt
+construction.
+
+Vector search ranks chunks by embedding distance, which is cheap but coarse, so answers used
+to rely on a large TOP_K to get the right chunk into the prompt. With reranking enabled, the
+retriever over-fetches RERANK_CANDIDATES chunks, a small local cross-encoder (e.g. an ONNX
+export of ms-marco-MiniLM-L-6-v2 in RERANK_MODEL_DIR) scores every (question, chunk) pair in
+one batched forward pass on the CPU, and only the RERANK_TOP_N best chunks reach the LLM.
+
+Reranking must not make a request slower than RERANK_BUDGET_MS. The reranker keeps a moving
+average of its cost per pair; when all candidates do not fit in the budget it reranks only
+the best-ranked prefix that does, and when not even RERANK_TOP_N pairs fit it skips
+reranking and returns the retrieval order unchanged.
+"""
+
+import logging
+import os
+import time
+import numpy as np
+from config import RERANK_MODEL_DIR, RERANK_CANDIDATES, RERANK_TOP_N, RERANK_BUDGET_MS, RERANK_MAX_LENGTH, \
+    RERANK_THREADS, RERANK_QUANTIZED
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest batch in the moving average of the cost per pair
+COST_SMOOTHING = 0.2
+
+
+class CrossEncoderReranker:
+    """
+    Reorders retrieved chunks by cross-encoder relevance to the question, within a latency budget.
+
+    Attributes:
+        candidates (int): Chunks to retrieve before reranking.
+        top_n (int): Chunks kept after reranking.
+        budget (float): Latency budget of one rerank call, in seconds.
+        pair_seconds (Optional[float]): Moving average of the cost of scoring one pair;
+            None until the first batch has been timed.
+
+    Methods:
+        score(query, texts) -> np.ndarray
+        rerank(query, docs) -> List[Dict]
+        warm_up() -> None
+    """
+
+    def __init__(self, model_dir: str = RERANK_MODEL_DIR, candidates: int = RERANK_CANDIDATES,
+                 top_n: int = RERANK_TOP_N, budget_ms: float = RERANK_BUDGET_MS,
+                 max_length: int = RERANK_MAX_LENGTH, threads: int = RERANK_THREADS,
+                 quantized: bool = RERANK_QUANTIZED, session=None, tokenizer=None):
+        self.top_n = max(1, top_n)
+        self.candidates = max(candidates, self.top_n)
+        self.budget = budget_ms / 1000.0
+        self.max_length = max_length
+        self.pair_seconds = None
+
+        if tokenizer is None:
+            from tokenizers import Tokenizer
+            tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.enable_padding()
+        self.tokenizer = tokenizer
+
+        if session is None:
+            import onnxruntime as ort
+            model_path = os.path.join(model_dir, "model.onnx")
+            quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+            if quantized and os.path.exists(quantized_path):
+                model_path = quantized_path
+            elif quantized:
+                logger.warning(f"No quantized reranker in '{model_dir}'. Using full-precision weights.")
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            logger.info(f"Loading ONNX reranker '{model_path}' with {threads} threads.")
+            session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.session = session
+        self.input_names = {node.name for node in session.get_inputs()}
+        self.output_name = session.get_outputs()[0].name
+
+    def score(self, query: str, texts: list) -> np.ndarray:
+        """
+        Relevance of each text to the query, from one forward pass over all pairs.
+
+        Returns:
+            np.ndarray: One score per text (the logit of the "relevant" class); higher is better.
+        """
+        started = time.perf_counter()
+        encodings = self.tokenizer.encode_batch([(query, text) for text in texts])
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        (logits,) = self.session.run([self.output_name], feeds)
+        scores = np.asarray(logits, dtype=np.float32).reshape(len(texts), -1)[:, -1]
+
+        cost = (time.perf_counter() - started) / len(texts)
+        self.pair_seconds = cost if self.pair_seconds is None else \
+            (1 - COST_SMOOTHING) * self.pair_seconds + COST_SMOOTHING * cost
+        return scores
+
+    def affordable(self, count: int) -> int:
+        """Most of `count` pairs that can be scored within the budget."""
+        if self.pair_seconds is None:
+            return count
+        return min(count, int(self.budget / max(self.pair_seconds, 1e-9)))
+
+    def rerank(self, query: str, docs: list) -> list:
+        """
+        Keeps the top_n most relevant chunks.
+
+        Args:
+            query (str): The user's question.
+            docs (List[Dict]): Retrieved {"text", "distance", ...} dicts, best first.
+
+        Returns:
+            List[Dict]: At most top_n chunks. Reranked chunks are ordered by relevance and
+                carry a "rerank_score"; when the budget does not allow reranking, the first
+                top_n chunks are returned in retrieval order, without "rerank_score".
+        """
+        if len(docs) <= 1:
+            return docs
+        count = self.affordable(len(docs))
+        if count < min(self.top_n, len(docs)):
+            logger.info(f"Skipping rerank: {len(docs)} candidates exceed the {self.budget * 1000:.0f} ms budget.")
+            # Let the estimate decay so that one slow batch (e.g. CPU contention) does not
+            # disable reranking for good; a later request measures the real cost again
+            self.pair_seconds *= 1 - COST_SMOOTHING
+            return docs[:self.top_n]
+        if count < len(docs):
+            logger.info(f"Reranking the first {count} of {len(docs)} candidates to stay within budget.")
+
+        scores = self.score(query, [d["text"] for d in docs[:count]])
+        order = np.argsort(-scores, kind="stable")[:self.top_n]
+        return [dict(docs[i], rerank_score=float(scores[i])) for i in order]
+
+    def warm_up(self) -> None:
+        """
+        Runs a full batch of max-length pairs twice: the first run pays the one-off session
+        start-up cost, the second gives the initial cost estimate.
+        """
+        texts = [" ".join(["warm"] * self.max_length)] * self.candidates
+        self.score("warm up", texts)
+        self.pair_seconds = None
+        self.score("warm up", texts)
@@ -1,9 +1,12 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("WARM_UP_COMPONENTS", "false")
+os.environ.setdefault("METRICS_PORT", "0")
 
-from unittest.mock import patch, MagicMock
-from rasa_layer.actions.actions import ActionQueryRag
+import asyncio
+from unittest.mock import patch
+from rasa_layer.actions.actions import ActionSmartRouter
 from rasa_sdk import Tracker
 from rasa_sdk.executor import CollectingDispatcher
 
@@ -12,15 +15,13 @@ def test_action_rag_query_success():
     tracker = Tracker(sender_id="test_user", slots={}, latest_message={"text": "What is the M.Tech eligibility?"}, events=[], paused=False, followup_action=None, active_loop={}, latest_action_name=None)
     domain = {}
 
-    with patch("rasa_layer.actions.actions.EmbeddingModel") as MockEmbedding, \
-         patch("rasa_layer.actions.actions.ChromaRetriever") as MockRetriever, \
-         patch("rasa_layer.actions.actions.LLM") as MockLLM, \
-         patch("rasa_layer.actions.actions.answer_query") as mock_answer_query:
+    with patch("rasa_layer.smart_router.component_pool") as MockPool, \
+         patch("rasa_layer.smart_router.answer_query_async") as mock_answer_query:
         
         mock_answer_query.return_value = "To be eligible for M.Tech, you must have a valid GATE score."
 
-        action = ActionQueryRag()
-        events = action.run(dispatcher, tracker, domain)
+        action = ActionSmartRouter()
+        events = asyncio.run(action.run(dispatcher, tracker, domain))
 
         # Check that the dispatcher was called with expected message
         assert any("valid GATE score" in m["text"] for m in dispatcher.messages)
@@ -31,8 +32,8 @@ def test_action_rag_query_empty_input():
     tracker = Tracker(sender_id="test_user", slots={}, latest_message={"text": "   "}, events=[], paused=False, followup_action=None, active_loop={}, latest_action_name=None)
     domain = {}
 
-    action = ActionQueryRag()
-    events = action.run(dispatcher, tracker, domain)
+    action = ActionSmartRouter()
+    events = asyncio.run(action.run(dispatcher, tracker, domain))
 
     # Expecting fallback message for empty input
     assert any("didn't receive a valid question" in m["text"] for m in dispatcher.messages)
@@ -43,13 +44,30 @@ def test_action_rag_query_exception_handling():
     tracker = Tracker(sender_id="test_user", slots={}, latest_message={"text": "What is the admission process?"}, events=[], paused=False, followup_action=None, active_loop={}, latest_action_name=None)
     domain = {}
 
-    with patch("rasa_layer.actions.actions.EmbeddingModel") as MockEmbedding, \
-         patch("rasa_layer.actions.actions.ChromaRetriever") as MockRetriever, \
-         patch("rasa_layer.actions.actions.LLM") as MockLLM, \
-         patch("rasa_layer.actions.actions.answer_query", side_effect=Exception("RAG failed")):
+    with patch("rasa_layer.smart_router.component_pool") as MockPool, \
+         patch("rasa_layer.smart_router.answer_query_async", side_effect=Exception("RAG failed")):
 
-        action = ActionQueryRag()
-        events = action.run(dispatcher, tracker, domain)
+        action = ActionSmartRouter()
+        events = asyncio.run(action.run(dispatcher, tracker, domain))
 
         assert any("error while retrieving the information" in m["text"] for m in dispatcher.messages)
-        assert events == []
\ No newline at end of file
+        assert events == []
+
+
+def test_action_reuses_pooled_components():
+    dispatcher = CollectingDispatcher()
+    tracker = Tracker(sender_id="test_user", slots={}, latest_message={"text": "When does the entrance exam start?"}, events=[], paused=False, followup_action=None, active_loop={}, latest_action_name=None)
+    domain = {}
+
+    with patch("rasa_layer.smart_router.component_pool") as MockPool, \
+         patch("rasa_layer.smart_router.answer_query_async", return_value="The exam starts in July.") as mock_answer_query:
+
+        action = ActionSmartRouter()
+        asyncio.run(action.run(dispatcher, tracker, domain))
+        asyncio.run(action.run(dispatcher, tracker, domain))
+
+        args = mock_answer_query.call_args[0]
+        assert args[1] is MockPool.get_embedding_model.return_value
+        assert args[2] is MockPool.get_vectorstore.return_value
+        assert args[3] is MockPool.get_llm.return_value
+        assert mock_answer_query.call_args[1]["reranker"] is MockPool.get_reranker.return_value
@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from unittest.mock import patch
+from generation.answer_cache import AnswerCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What are the FEES?? ") == "what are the fees"
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = AnswerCache()
+    cache.put("What are the fees?", [1.0, 0.0], "Rs. 19845.")
+
+    assert cache.get_exact("what are the fees") == "Rs. 19845."
+    assert cache.get_exact("When is the exam?") is None
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["exact_misses"] == 1
+
+
+def test_semantic_hit_within_threshold():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("What are the fees?", [1.0, 0.0, 0.0], "Rs. 19845.")
+
+    assert cache.get_semantic([0.99, 0.05, 0.0]) == "Rs. 19845."
+    assert cache.get_semantic([0.0, 1.0, 0.0]) is None
+    stats = cache.stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["semantic_misses"] == 1
+
+
+def test_lru_eviction_in_both_tiers():
+    cache = AnswerCache(max_entries=2, semantic_max_entries=2, similarity_threshold=0.99)
+    cache.put("a", [1.0, 0.0, 0.0], "A")
+    cache.put("b", [0.0, 1.0, 0.0], "B")
+    cache.get_exact("a")
+    cache.get_semantic([1.0, 0.0, 0.0])
+    cache.put("c", [0.0, 0.0, 1.0], "C")
+
+    assert cache.get_exact("b") is None
+    assert cache.get_exact("a") == "A"
+    assert cache.get_semantic([0.0, 1.0, 0.0]) is None
+    assert cache.get_semantic([0.0, 0.0, 1.0]) == "C"
+
+
+def test_entries_expire_after_ttl():
+    cache = AnswerCache(ttl_seconds=10)
+    with patch("generation.answer_cache.time.monotonic", return_value=100.0):
+        cache.put("q", [1.0, 0.0], "answer")
+    with patch("generation.answer_cache.time.monotonic", return_value=111.0):
+        assert cache.get_exact("q") is None
+        assert cache.get_semantic([1.0, 0.0]) is None
+
+
+def test_version_change_invalidates():
+    version = {"value": 1}
+    cache = AnswerCache(version_fn=lambda: version["value"])
+    cache.put("q", [1.0, 0.0], "answer")
+
+    version["value"] = 2
+    assert cache.get_exact("q") is None
+    assert cache.stats()["semantic_size"] == 0
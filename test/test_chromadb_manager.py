@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import chromadb
+from data_preprocessing.chromadb_manager import sync_collection, chunk_id, build_records
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+CHUNKS = [
+    "1. Eligibility criteria for M.Tech Computer Science.",
+    "2. Fee structure and tuition details.",
+    "3. Important dates and notification schedule.",
+]
+
+
+def make_collection(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    return client.get_or_create_collection(name="TEST_COLLECTION")
+
+
+def test_ids_are_content_addressed():
+    assert chunk_id("same text") == chunk_id("same text")
+    assert [r["id"] for r in build_records(CHUNKS + CHUNKS[:1])] == [chunk_id(c) for c in CHUNKS]
+
+
+def test_initial_sync_embeds_everything(tmp_path):
+    collection = make_collection(tmp_path)
+    embedder = CountingEmbedder()
+
+    stats = sync_collection(collection, CHUNKS, embedder, manifest_path=str(tmp_path / "manifest.json"))
+
+    assert stats["added"] == 3
+    assert stats["embedded"] == 3
+    assert collection.count() == 3
+
+
+def test_resync_only_touches_changes(tmp_path):
+    collection = make_collection(tmp_path)
+    manifest = str(tmp_path / "manifest.json")
+    sync_collection(collection, CHUNKS, CountingEmbedder(), manifest_path=manifest)
+
+    inserted = "1a. Reservation rules for OBC candidates."
+    updated_chunks = [CHUNKS[0], inserted, CHUNKS[1]]
+    embedder = CountingEmbedder()
+    stats = sync_collection(collection, updated_chunks, embedder, manifest_path=manifest)
+
+    assert embedder.texts == [inserted]
+    assert stats == {"added": 1, "updated": 1, "deleted": 1, "unchanged": 1, "embedded": 1}
+    stored = collection.get(ids=[chunk_id(CHUNKS[1])], include=["metadatas"])
+    assert stored["metadatas"][0]["index"] == 2
+    assert collection.count() == 3
+
+
+def test_manifest_avoids_reembedding_after_collection_loss(tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    sync_collection(make_collection(tmp_path), CHUNKS, CountingEmbedder(), manifest_path=manifest)
+
+    client = chromadb.PersistentClient(path=str(tmp_path / "fresh"))
+    embedder = CountingEmbedder()
+    stats = sync_collection(client.get_or_create_collection(name="FRESH"), CHUNKS, embedder, manifest_path=manifest)
+
+    assert embedder.texts == []
+    assert stats["added"] == 3
+
+
+def test_switching_embedding_model_rewrites_vectors(tmp_path):
+    collection = make_collection(tmp_path)
+    manifest = str(tmp_path / "manifest.json")
+    sync_collection(collection, CHUNKS, CountingEmbedder(), manifest_path=manifest, model_name="jina-embeddings-v3")
+
+    embedder = CountingEmbedder()
+    local_embed = lambda texts: [[0.0, 0.0, 1.0] for _ in embedder(texts)]
+    stats = sync_collection(collection, CHUNKS, local_embed, manifest_path=manifest, model_name="onnx:bge-small:int8")
+
+    assert stats["embedded"] == 3
+    stored = collection.get(ids=[chunk_id(CHUNKS[0])], include=["embeddings"])
+    assert list(stored["embeddings"][0]) == [0.0, 0.0, 1.0]
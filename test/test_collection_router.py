@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import asyncio
+import chromadb
+import pytest
+from unittest.mock import patch
+from retrieval.collection_router import CollectionRegistry, CollectionRouter, compute_centroid, served_collections
+
+
+class FakeRetriever:
+    def __init__(self, name, size=3, error=None):
+        self.name = name
+        self.size = size
+        self.error = error
+        self.calls = 0
+
+    def retrieve_scored(self, query_embedding, top_k=5, filters=None, query_text=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [{"id": f"{self.name}-{i}", "text": f"{self.name} chunk {i}", "distance": 0.1 * i}
+                for i in range(min(top_k, self.size))]
+
+    def count(self):
+        return self.size
+
+
+def make_router(**kwargs):
+    retrievers = {"MTECH_2024": FakeRetriever("2024"), "MTECH_2025": FakeRetriever("2025"),
+                  "MBA_2025": FakeRetriever("mba")}
+    centroids = {"MTECH_2024": [1.0, 0.0, 0.0], "MTECH_2025": [0.0, 1.0, 0.0], "MBA_2025": [0.0, 0.0, 1.0]}
+    keywords = {"MTECH_2025": ["2025"], "MBA_2025": ["mba", "2025"]}
+    return CollectionRouter(retrievers, centroids, keywords, **kwargs)
+
+
+def test_clear_query_goes_to_one_collection():
+    router = make_router(margin=0.05)
+
+    assert router.route([0.9, 0.1, 0.0]) == ["MTECH_2024"]
+    results = router.retrieve_scored([0.9, 0.1, 0.0], top_k=2)
+    assert [r["collection"] for r in results] == ["MTECH_2024"] * 2
+    assert router.retrievers["MTECH_2025"].calls == 0
+
+
+def test_ambiguous_query_fans_out_and_merges():
+    router = make_router(margin=0.05)
+
+    assert router.route([0.7, 0.7, 0.0]) == ["MTECH_2024", "MTECH_2025"]
+    results = router.retrieve_scored([0.7, 0.7, 0.0], top_k=4)
+    assert len(results) == 4
+    assert {r["collection"] for r in results} == {"MTECH_2024", "MTECH_2025"}
+    # Reciprocal rank fusion interleaves the two rankings best-first
+    assert [r["id"][-1] for r in results] == ["0", "0", "1", "1"]
+
+
+def test_routers_share_one_thread_pool():
+    import threading
+    from config import ROUTER_MAX_FANOUT
+
+    routers = [make_router(margin=1.0) for _ in range(20)]
+    for router in routers:
+        router.retrieve_scored([0.6, 0.6, 0.5], top_k=2)
+    workers = [t for t in threading.enumerate() if t.name.startswith("collection-router")]
+    assert 0 < len(workers) <= ROUTER_MAX_FANOUT
+
+
+def test_fanout_is_capped():
+    router = make_router(margin=1.0, max_fanout=2)
+    assert len(router.route([0.6, 0.6, 0.5])) == 2
+
+
+def test_keywords_narrow_the_candidates():
+    router = make_router(margin=0.05)
+
+    assert router.route([1.0, 0.0, 0.0], "What is the MBA fee?") == ["MBA_2025"]
+    assert router.route([0.1, 0.9, 0.6], "Last date to apply in 2025?") == ["MTECH_2025"]
+
+
+def test_failing_collection_does_not_break_fan_out():
+    router = make_router(margin=1.0)
+    router.retrievers["MTECH_2025"].error = RuntimeError("collection missing")
+
+    results = router.retrieve_scored([0.6, 0.6, 0.5], top_k=3)
+    assert results and "MTECH_2025" not in {r["collection"] for r in results}
+
+
+def test_async_retrieval_fans_out():
+    router = make_router(margin=0.05)
+    results = asyncio.run(router.aretrieve_documents([0.7, 0.7, 0.0], top_k=2))
+    assert sorted(results) == ["2024 chunk 0", "2025 chunk 0"]
+
+
+def test_registry_records_centroid_and_is_served(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.get_or_create_collection(name="MTECH_2025")
+    collection.add(ids=["a", "b"], embeddings=[[2.0, 0.0], [0.0, 1.0]], documents=["a", "b"])
+
+    assert compute_centroid(collection, page_size=1) == pytest.approx([2 ** -0.5, 2 ** -0.5])
+
+    registry = CollectionRegistry.load(str(tmp_path / "collections.json"))
+    registry.register("MTECH_2025", collection, source="MTech Prospectus 2025", keywords=["2025"])
+    registry.save()
+    registry.register("MTECH_2025", source=None, description="Admissions 2025")
+
+    loaded = CollectionRegistry.load(str(tmp_path / "collections.json"))
+    entry = loaded.entries["MTECH_2025"]
+    assert entry["count"] == 2 and entry["source"] == "MTech Prospectus 2025" and entry["keywords"] == ["2025"]
+    assert registry.entries["MTECH_2025"]["source"] == "MTech Prospectus 2025"
+
+    with patch("retrieval.collection_router.COLLECTIONS", new=[]):
+        assert served_collections(loaded) == ["MTECH_2025"]
+        assert served_collections(CollectionRegistry(str(tmp_path / "none.json"))) == ["MTECH_PROSPECTUS"]
+    with patch("retrieval.collection_router.COLLECTIONS", new=["A", "B"]):
+        assert served_collections(loaded) == ["A", "B"]
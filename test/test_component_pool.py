@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import threading
+from unittest.mock import MagicMock
+from rasa_layer.component_pool import ComponentPool, CHROMA_DB_FILE
+
+
+def make_pool(tmp_path, vectorstore_factory=None):
+    return ComponentPool(
+        chroma_dir=str(tmp_path),
+        embedding_factory=MagicMock(side_effect=lambda: MagicMock()),
+        vectorstore_factory=vectorstore_factory or MagicMock(side_effect=lambda: MagicMock()),
+        llm_factory=MagicMock(side_effect=lambda: MagicMock()),
+        reranker_factory=MagicMock(return_value=None),
+    )
+
+
+def test_components_are_built_once(tmp_path):
+    pool = make_pool(tmp_path)
+
+    assert pool.get_embedding_model() is pool.get_embedding_model()
+    assert pool.get_vectorstore() is pool.get_vectorstore()
+    assert pool.get_llm() is pool.get_llm()
+    assert pool.get_reranker() is None and pool.get_reranker() is None
+    assert pool.embedding_factory.call_count == 1
+    assert pool.vectorstore_factory.call_count == 1
+    assert pool.llm_factory.call_count == 1
+    assert pool.reranker_factory.call_count == 1
+
+
+def test_concurrent_first_use_builds_once(tmp_path):
+    pool = make_pool(tmp_path)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(pool.get_llm())) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert pool.llm_factory.call_count == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_vectorstore_reloads_when_collection_changes(tmp_path):
+    db_file = tmp_path / CHROMA_DB_FILE
+    db_file.write_bytes(b"v1")
+    pool = make_pool(tmp_path)
+
+    first = pool.get_vectorstore()
+    db_file.write_bytes(b"version two")
+    second = pool.get_vectorstore()
+
+    assert first is not second
+    assert pool.vectorstore_factory.call_count == 2
+
+
+def test_warm_up_reports_failures(tmp_path):
+    pool = make_pool(tmp_path, vectorstore_factory=MagicMock(side_effect=RuntimeError("no collection")))
+
+    assert pool.warm_up() is False
+    health = pool.health()
+    assert health["embedding_model"] == "ready"
+    assert health["llm"] == "ready"
+    assert health["vectorstore"] == "not_initialized"
+    assert health["healthy"] is False
+
+
+def test_health_and_reload(tmp_path):
+    pool = make_pool(tmp_path)
+
+    assert pool.warm_up() is True
+    assert pool.health()["healthy"] is True
+
+    pool.reload()
+    assert pool.health()["llm"] == "not_initialized"
+
+
+def test_default_vectorstore_reads_the_pool_chroma_dir(tmp_path):
+    from unittest.mock import patch
+    from retrieval.collection_router import CollectionRegistry, CollectionRouter, registry_path
+
+    registry = CollectionRegistry(registry_path(str(tmp_path)))
+    registry.register("MTECH_2024", keywords=["2024"])
+    registry.register("MTECH_2025", keywords=["2025"])
+    registry.save()
+
+    with patch("rasa_layer.component_pool.VECTORSTORE_BACKEND", "chroma"), \
+            patch("rasa_layer.component_pool.ChromaRetriever") as retriever:
+        store = ComponentPool(chroma_dir=str(tmp_path)).get_vectorstore()
+
+    assert isinstance(store, CollectionRouter)
+    assert sorted(store.retrievers) == ["MTECH_2024", "MTECH_2025"]
+    assert all(call.kwargs["chroma_dir"] == str(tmp_path) for call in retriever.call_args_list)
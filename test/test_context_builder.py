@@ -0,0 +1,42 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from generation.context_builder import build_context
+
+
+def chunk(text, distance=None):
+    return {"text": text, "distance": distance}
+
+
+def test_unchanged_chunks_are_joined_verbatim():
+    context = build_context([chunk("Doc 1 line 1\nDoc 1 line 2"), chunk("Doc 2 line")])
+    assert context == "Doc 1 line 1\nDoc 1 line 2\nDoc 2 line"
+
+
+def test_low_relevance_chunks_are_dropped_but_best_is_kept():
+    results = [chunk("Fees are 30000.", 1.9), chunk("Hostel is available.", 2.5), chunk("Dates are in May.", 0.4)]
+    assert build_context(results, max_distance=1.5) == "Fees are 30000.\nDates are in May."
+    assert build_context(results, max_distance=None).count("\n") == 2
+
+
+def test_overlap_between_neighbouring_chunks_is_removed():
+    first = "Eligibility is B.Tech. Minimum marks are 55%. GATE is preferred."
+    second = "Minimum marks are 55%. GATE is preferred. Interviews are held in June."
+    context = build_context([chunk(first), chunk(second)])
+    assert context == first + "\nInterviews are held in June."
+    assert build_context([chunk(first), chunk(first)]) == first
+
+
+def test_packing_respects_token_budget():
+    words = lambda text: len(text.split())
+    results = [chunk("one two three four."), chunk("five six seven eight nine ten."), chunk("eleven.")]
+    context = build_context(results, token_budget=6, token_counter=words, separator=" | ")
+    # The second chunk does not fit; the smaller third one still does
+    assert context == "one two three four. | eleven."
+
+
+def test_oversized_best_chunk_is_truncated_by_sentence():
+    words = lambda text: len(text.split())
+    context = build_context([chunk("a b c. d e f. g h i.")], token_budget=7, token_counter=words)
+    assert context == "a b c. d e f."
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import json
+import numpy as np
+import pytest
+from data_preprocessing.embedding_artifact import EmbeddingArtifact, save_embeddings, convert_json, artifact_paths
+from data_preprocessing.chromadb_manager import chunk_id, load_manifest, seed_manifest_from_embeddings
+
+CHUNKS = ["1. Eligibility for M.Tech.", "2. Fee structure.", "3. Important dates."]
+
+
+def random_vectors(count=3, dim=16):
+    return np.random.default_rng(0).standard_normal((count, dim)).astype(np.float32)
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_float32_roundtrip_is_memory_mapped(tmp_path):
+    vectors = random_vectors()
+    ids = [chunk_id(c) for c in CHUNKS]
+    save_embeddings(str(tmp_path / "emb"), ids, vectors, "model-a", CHUNKS)
+
+    artifact = EmbeddingArtifact.load(str(tmp_path / "emb"))
+    assert isinstance(artifact.matrix, np.memmap)
+    assert artifact.vectors() is artifact.matrix
+    assert artifact.ids == ids and artifact.model_name == "model-a" and artifact.dim == 16
+    np.testing.assert_array_equal(artifact.get(ids[1]), vectors[1])
+    assert artifact.get("missing") is None
+    assert artifact.matches(CHUNKS) and not artifact.matches(CHUNKS[::-1])
+
+
+@pytest.mark.parametrize("dtype, size_ratio", [("float16", 0.5), ("int8", 0.25)])
+def test_quantized_artifacts_are_smaller_and_close(tmp_path, dtype, size_ratio):
+    vectors = random_vectors(count=64, dim=256)
+    ids = [f"chunk_{i}" for i in range(64)]
+    save_embeddings(str(tmp_path / "f32"), ids, vectors)
+    save_embeddings(str(tmp_path / dtype), ids, vectors, dtype=dtype)
+
+    artifact = EmbeddingArtifact.load(str(tmp_path / dtype))
+    decoded = artifact.vectors()
+    assert decoded.dtype == np.float32
+    assert min(cosine(a, b) for a, b in zip(decoded, vectors)) > 0.999
+    sizes = [os.path.getsize(artifact_paths(str(tmp_path / name))[0]) for name in ("f32", dtype)]
+    assert sizes[1] <= sizes[0] * size_ratio + 128  # .npy header
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    sidecar = save_embeddings(str(tmp_path / "emb"), ["a"], [[1.0, 0.0]])
+    with open(sidecar) as f:
+        meta = json.load(f)
+    meta["format_version"] = 99
+    with open(sidecar, "w") as f:
+        json.dump(meta, f)
+
+    with pytest.raises(ValueError, match="version"):
+        EmbeddingArtifact.load(str(tmp_path / "emb.npy"))
+
+
+def test_legacy_json_converts_and_seeds_manifest(tmp_path):
+    vectors = random_vectors()
+    legacy = tmp_path / "embeddings.json"
+    legacy.write_text(json.dumps([{"index": i, "embedding": v.tolist()} for i, v in enumerate(vectors)]))
+
+    convert_json(str(legacy), str(tmp_path / "embeddings"), CHUNKS, "model-a", dtype="float16")
+    manifest = str(tmp_path / "manifest")
+    seed_manifest_from_embeddings(manifest, CHUNKS, str(tmp_path / "embeddings"), "model-a")
+
+    loaded = load_manifest(manifest, "model-a")
+    assert set(loaded) == {chunk_id(c) for c in CHUNKS}
+    np.testing.assert_allclose(loaded[chunk_id(CHUNKS[2])], vectors[2], atol=1e-2)
+    assert load_manifest(manifest, "model-b") == {}
@@ -0,0 +1,148 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import asyncio
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from retrieval.embedding import EmbeddingModel
+from retrieval.embedding_backends import OnnxBackend, JinaBackend, EmbeddingBackend, create_backend, mean_pool
+from retrieval.mock_embedding_server import start_in_background, hash_embedding
+from retrieval.embedding_cache import EmbeddingCache
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "fees": 2, "eligibility": 3, "hostel": 4, "mtech": 5}
+
+
+class Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Stands in for onnxruntime.InferenceSession: a token embedding lookup as 'last_hidden_state'."""
+
+    def __init__(self, dim=4):
+        rng = np.random.default_rng(0)
+        self.table = rng.standard_normal((len(VOCAB), dim)).astype(np.float32)
+        self.batches = []
+
+    def get_inputs(self):
+        return [Node("input_ids"), Node("attention_mask"), Node("token_type_ids")]
+
+    def get_outputs(self):
+        return [Node("last_hidden_state")]
+
+    def run(self, output_names, feeds):
+        self.batches.append(feeds["input_ids"].shape[0])
+        assert set(feeds) == {"input_ids", "attention_mask", "token_type_ids"}
+        return [self.table[feeds["input_ids"]]]
+
+
+def make_tokenizer():
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    return tokenizer
+
+
+def make_backend(batch_size=2):
+    return OnnxBackend("bge-small", session=FakeSession(), tokenizer=make_tokenizer(),
+                       quantized=True, batch_size=batch_size)
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    hidden = np.array([[[3.0, 0.0], [1.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+    pooled = mean_pool(hidden, mask)
+    assert np.allclose(pooled, [[1.0, 0.0]])
+
+
+def test_onnx_backend_batches_and_pads():
+    backend = make_backend(batch_size=2)
+    vectors = backend.embed_documents(["fees", "mtech eligibility fees", "hostel"])
+
+    assert backend.session.batches == [2, 1]
+    assert len(vectors) == 3
+    assert all(abs(np.linalg.norm(v) - 1.0) < 1e-5 for v in vectors)
+    # Padding must not change a text's embedding
+    assert np.allclose(vectors[0], backend.embed_query("fees"), atol=1e-6)
+
+
+def test_cache_namespace_separates_backends():
+    assert make_backend().cache_namespace == "onnx:bge-small:int8"
+    assert make_backend().cache_namespace != "bge-small"
+
+
+def test_model_fingerprint_changes_with_the_model_files(tmp_path):
+    from retrieval.embedding_backends import model_fingerprint
+
+    (tmp_path / "model.onnx").write_bytes(b"weights v1")
+    first = model_fingerprint(str(tmp_path / "model.onnx"))
+    assert first and model_fingerprint(str(tmp_path)) == first
+    (tmp_path / "model.onnx").write_bytes(b"weights version 2")
+    assert model_fingerprint(str(tmp_path / "model.onnx")) != first
+    assert model_fingerprint(str(tmp_path / "missing.onnx")) == ""
+
+    backend = make_backend()
+    backend.fingerprint = first
+    assert backend.cache_namespace == f"onnx:bge-small:int8:{first}"
+
+
+def test_backend_must_implement_embed_documents():
+    class Incomplete(EmbeddingBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete("x")
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        create_backend("word2vec", "model")
+
+
+def test_missing_sentence_transformers_is_named(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+    with pytest.raises(ImportError, match="pip install sentence-transformers torch"):
+        create_backend("sentence-transformers", "bge-small")
+
+
+def test_embedding_model_uses_backend_and_cache():
+    backend = make_backend()
+    model = EmbeddingModel("bge-small", cache=EmbeddingCache(backend.cache_namespace, cache_dir=None), backend=backend)
+
+    first = model.embed_query("hostel fees")
+    second = asyncio.run(model.aembed_query("hostel fees"))
+
+    assert first == second
+    assert backend.session.batches == [1]
+    assert model.embed_query("") == []
+
+
+class FailingBackend(EmbeddingBackend):
+    name = "failing"
+
+    def embed_documents(self, texts):
+        raise RuntimeError("model crashed")
+
+
+def test_embedding_model_returns_empty_list_on_backend_error():
+    model = EmbeddingModel("x", cache=None, backend=FailingBackend("x"))
+    assert model.embed_query("fees") == []
+
+
+def test_jina_backend_against_mock_server():
+    server, url = start_in_background(dim=16)
+    try:
+        backend = JinaBackend(url=url, api_key="test-key")
+        texts = ["M.Tech fees", "hostel eligibility"]
+
+        assert backend.embed_documents(texts) == [pytest.approx(hash_embedding(t, 16)) for t in texts]
+        assert backend.embed_query(texts[0]) == pytest.approx(hash_embedding(texts[0], 16))
+        assert asyncio.run(backend.aembed_query(texts[1])) == pytest.approx(hash_embedding(texts[1], 16))
+    finally:
+        server.shutdown()
+        server.server_close()
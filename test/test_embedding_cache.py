@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from retrieval.embedding_cache import EmbeddingCache, embedding_cache_key
+
+VECTOR = [0.25, -0.5, 1.0, 0.125]
+
+
+def test_key_includes_model_name():
+    assert embedding_cache_key("model-a", "fees") != embedding_cache_key("model-b", "fees")
+
+
+def test_memory_hit_and_stats(tmp_path):
+    cache = EmbeddingCache("jina-embeddings-v3", cache_dir=None)
+    assert cache.get("fees") is None
+
+    cache.put("fees", VECTOR, latency=0.2)
+    assert cache.get("fees") == VECTOR
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert abs(stats["saved_seconds"] - 0.2) < 1e-9
+
+
+def test_hits_return_copies_and_are_exported(monkeypatch):
+    from retrieval import embedding_cache
+
+    lookups = []
+    monkeypatch.setattr(embedding_cache, "record_embedding_cache_lookup",
+                        lambda result, saved_seconds=0.0: lookups.append((result, saved_seconds)))
+    cache = EmbeddingCache("jina-embeddings-v3", cache_dir=None)
+    cache.get("fees")
+    cache.put("fees", VECTOR, latency=0.2)
+
+    cache.get("fees").append(99.0)
+    assert cache.get("fees") == VECTOR
+    assert lookups == [("miss", 0.0), ("memory", 0.2), ("memory", 0.2)]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = EmbeddingCache("jina-embeddings-v3", cache_dir=str(tmp_path))
+    cache.put("fees", VECTOR)
+    cache.put("eligibility", [1.0, 2.0, 3.0, 4.0])
+
+    restarted = EmbeddingCache("jina-embeddings-v3", cache_dir=str(tmp_path))
+    assert restarted.get("fees") == VECTOR
+    assert restarted.get("eligibility") == [1.0, 2.0, 3.0, 4.0]
+    assert restarted.stats()["disk_hits"] == 2
+
+    vectors_file = os.path.join(restarted.cache_dir, "vectors.f32")
+    assert os.path.getsize(vectors_file) == 2 * 4 * 4
+
+
+def test_other_model_does_not_see_vectors(tmp_path):
+    EmbeddingCache("model-a", cache_dir=str(tmp_path)).put("fees", VECTOR)
+
+    assert EmbeddingCache("model-b", cache_dir=str(tmp_path)).get("fees") is None
+
+
+def test_torn_write_is_repaired(tmp_path):
+    cache = EmbeddingCache("jina-embeddings-v3", cache_dir=str(tmp_path))
+    cache.put("fees", VECTOR)
+    with open(os.path.join(cache.cache_dir, "vectors.f32"), "ab") as f:
+        f.write(b"\x00" * 6)
+
+    cache.put("dates", [4.0, 3.0, 2.0, 1.0])
+    restarted = EmbeddingCache("jina-embeddings-v3", cache_dir=str(tmp_path))
+    assert restarted.get("dates") == [4.0, 3.0, 2.0, 1.0]
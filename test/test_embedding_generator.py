@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from data_preprocessing.embedding_generator import generate_embeddings, create_session
+
+
+class MockJinaServer:
+    """Local stand-in for the Jina embeddings API: embedding = [len(text), position in batch]."""
+
+    def __init__(self, fail_first=0, status=503):
+        self.requests = []
+        self.fail_first = fail_first
+        self.status = status
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(body["input"])
+                if len(server.requests) <= server.fail_first:
+                    self.send_response(server.status)
+                    self.end_headers()
+                    self.wfile.write(b"unavailable")
+                    return
+                data = [{"object": "embedding", "index": i, "embedding": [float(len(t)), float(i)]}
+                        for i, t in enumerate(body["input"])]
+                payload = json.dumps({"data": data}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/embeddings"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+
+
+CHUNKS = [f"chunk {'x' * i}" for i in range(10)]
+
+
+def test_batches_are_reassembled_in_order():
+    with MockJinaServer() as server:
+        embeddings = generate_embeddings(CHUNKS, batch_size=3, max_workers=3, url=server.url, session=create_session(3))
+
+    assert len(server.requests) == 4
+    assert [e["index"] for e in embeddings] == list(range(10))
+    assert [e["embedding"][0] for e in embeddings] == [float(len(c)) for c in CHUNKS]
+
+
+def test_transient_errors_are_retried():
+    with MockJinaServer(fail_first=2) as server:
+        embeddings = generate_embeddings(CHUNKS, batch_size=10, max_workers=1, url=server.url, backoff=0)
+
+    assert len(server.requests) == 3
+    assert len(embeddings) == 10
+
+
+def test_client_errors_are_not_retried():
+    with MockJinaServer(fail_first=5, status=400) as server:
+        with pytest.raises(ValueError):
+            generate_embeddings(CHUNKS, batch_size=10, max_workers=1, url=server.url, backoff=0)
+
+    assert len(server.requests) == 1
+
+
+def test_resume_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "embeddings.checkpoint.jsonl")
+
+    with MockJinaServer(fail_first=100) as server:
+        with pytest.raises(ValueError):
+            generate_embeddings(CHUNKS, batch_size=5, max_workers=1, url=server.url, backoff=0,
+                                retries=1, checkpoint_path=checkpoint)
+
+    with MockJinaServer() as server:
+        generate_embeddings(CHUNKS[:5], batch_size=5, max_workers=1, url=server.url, checkpoint_path=checkpoint)
+
+    with MockJinaServer() as server:
+        embeddings = generate_embeddings(CHUNKS, batch_size=5, max_workers=1, url=server.url, checkpoint_path=checkpoint)
+
+    # The first batch came from the checkpoint; only the second one was requested
+    assert server.requests == [CHUNKS[5:]]
+    assert len(embeddings) == 10
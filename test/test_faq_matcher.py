@@ -0,0 +1,137 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import random
+import string
+import time
+import warnings
+from fuzzywuzzy import process
+from rasa_layer import faq_matcher
+from rasa_layer.faq_data import faq_list
+from rasa_layer.faq_index import FAQIndex, word_ngrams
+
+QUERIES = [
+    "Application Process", "application process?", "what is the application process",
+    "What is the entrance exam?", "entrance exam", "Fees of Computer Science department",
+    "fees of computer science", "computer science fees", "Eligibility of Futures Studies department",
+    "eligibility futures studies", "courses of optoelectronics", "Courses of Optoelectronics department!",
+    "What is the hostel fee for girls?", "How many seats are there in technology management?",
+    "Is GATE mandatory?", "tell me about the rank list", "hello", "optoelectronics fees",
+]
+
+
+def linear_match(user_query, threshold=90):
+    """The original implementation: WRatio against every FAQ question."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        questions = [faq["question"] for faq in faq_list]
+        best_match, score = process.extractOne(user_query, questions)
+    if score >= threshold:
+        return next(item for item in faq_list if item["question"] == best_match)["answer"]
+    return None
+
+
+def test_matches_linear_implementation():
+    for query in QUERIES:
+        assert faq_matcher.match_faq(query) == linear_match(query), query
+
+
+def test_word_ngrams_ignore_order_and_case():
+    assert word_ngrams("Fees of CS") == word_ngrams("cs OF fees")
+
+
+def test_answer_lookup_by_id():
+    index = FAQIndex([{"id": "fees", "question": "Fees?", "answer": "Rs. 8160"}])
+    assert index.match("fees", 90) == ("fees", 100)
+    assert index.answer("fees") == "Rs. 8160"
+
+
+def test_thousands_of_faqs_score_only_a_few_candidates(monkeypatch):
+    from rasa_layer import faq_index
+
+    rng = random.Random(0)
+    names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(5000)]
+    faqs = [{"question": f"What is the fee for the {name} programme?", "answer": f"Answer {i}"}
+            for i, name in enumerate(names)]
+    index = FAQIndex(faqs, candidates=5)
+    calls = []
+    wratio = faq_index.fuzz.WRatio
+    monkeypatch.setattr(faq_index.fuzz, "WRatio", lambda a, b: calls.append(b) or wratio(a, b))
+
+    faq_id, score = index.match(f"what is the fees for {names[1234]} programme", 90)
+    assert index.answer(faq_id) == "Answer 1234" and score >= 90
+    assert len(calls) <= 5
+
+    # A miss that shares most words with every FAQ is bounded the same way
+    calls.clear()
+    assert index.match("what is the fee for the hostel", 90) is None
+    assert len(calls) <= 5
+
+
+def test_thousands_of_faqs_stay_fast():
+    faqs = [{"question": f"What is the fee for programme number {i} in department {i % 37}?",
+             "answer": f"Answer {i}"} for i in range(5000)]
+    index = FAQIndex(faqs)
+    start = time.perf_counter()
+    for _ in range(50):
+        assert index.match("How do I apply for the hostel and what documents are required?", 90) is None
+    assert (time.perf_counter() - start) / 50 < 1e-3
+
+
+def test_pruned_matches_equal_the_linear_scan():
+    # Paraphrases, typos, truncations and fragments of every FAQ question
+    variants = []
+    for faq in faq_list:
+        question = faq["question"]
+        words = question.split()
+        variants += [question.lower(), question[:-3], question[2:], " ".join(words[::-1]), words[-1],
+                     " ".join(words[:2]), question.replace("e", "a"), "please tell me " + question]
+    questions = [faq["question"] for faq in faq_list]
+    index = faq_matcher.get_faq_index()
+    for query in variants:
+        assert faq_matcher.match_faq(query) == linear_match(query), query
+        # At a relaxed threshold the linear scan breaks ties between equally scored FAQs by
+        # list order (e.g. "optoelectronics fees" -> the Computer Science fees); the index
+        # breaks them among the FAQs sharing the most trigrams, but finds the same best score
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            _, linear_score = process.extractOne(query, questions)
+        match = index.match(query, 70)
+        assert (match[1] if match else None) == (linear_score if linear_score >= 70 else None), query
+
+
+class FakeEmbeddingModel:
+    VECTORS = {"Hostel fees": [1.0, 0.0], "Entrance exam": [0.0, 1.0], "how much is the hostel": [0.9, 0.1]}
+
+    def embed_documents(self, texts):
+        return [self.VECTORS[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.VECTORS[text]
+
+
+def test_semantic_tier():
+    index = FAQIndex([{"question": "Hostel fees", "answer": "a"}, {"question": "Entrance exam", "answer": "b"}],
+                     embedding_model=FakeEmbeddingModel())
+    assert index.match("how much is the hostel", 90) is None
+    faq_id, similarity = index.match_semantic("how much is the hostel", 0.9)
+    assert index.answer(faq_id) == "a"
+    assert similarity > 0.99
+
+
+def test_index_reloads_when_faq_data_changes(monkeypatch):
+    mtime = [1]
+    monkeypatch.setattr(faq_matcher, "_faq_data_mtime", lambda: mtime[0])
+    monkeypatch.setattr(faq_matcher.importlib, "reload", lambda module: module)
+    monkeypatch.setattr(faq_matcher.faq_data, "faq_list", [{"question": "Hostel fees", "answer": "old"}])
+    monkeypatch.setattr(faq_matcher, "_index", None)
+
+    assert faq_matcher.match_faq("Hostel fees") == "old"
+    first = faq_matcher.get_faq_index()
+    assert faq_matcher.get_faq_index() is first
+
+    # faq_data.py edited on disk
+    monkeypatch.setattr(faq_matcher.faq_data, "faq_list", [{"question": "Hostel fees", "answer": "new"}])
+    mtime[0] = 2
+    assert faq_matcher.match_faq("Hostel fees") == "new"
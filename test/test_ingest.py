@@ -0,0 +1,160 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import threading
+import time
+import chromadb
+import pytest
+from data_preprocessing.ingest import Pipeline, Stage, SectionSplitter, ingest, MODEL_METADATA_KEY
+from data_preprocessing.chromadb_manager import chunk_id, load_manifest
+from retrieval.collection_router import CollectionRegistry
+from retrieval.memmap_vectorstore import MemmapRetriever, collection_metric
+
+
+class WhitespaceEncoder:
+    is_fast = True
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [t.split() for t in texts]}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.texts.extend(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+SECTIONS = [
+    "1. Eligibility\nCandidates need a B.Tech degree. A valid GATE score is preferred.",
+    "2. Fees\nThe tuition fee is paid every semester. Hostel fees are separate.",
+    "3. Reservation\nSeats are reserved as per Government norms. Certificates are verified at admission.",
+]
+
+
+def write_document(tmp_path, sections, name="prospectus.txt"):
+    path = tmp_path / name
+    path.write_text("\n\n".join(sections) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def make_collection(tmp_path, metadata=None):
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma")).get_or_create_collection(name="TEST_INGEST",
+                                                                                             metadata=metadata)
+
+
+def run_ingest(tmp_path, sections, embedder, collection, model_name="test-model", **kwargs):
+    return ingest([write_document(tmp_path, sections)], collection, embedder, model_name,
+                  encoder=WhitespaceEncoder(), strategy="section", batch_size=2, embed_workers=2, max_tokens=12,
+                  overlap=0, chroma_dir=str(tmp_path / "chroma"), **kwargs)
+
+
+def test_section_splitter_keeps_sections_whole():
+    splitter = SectionSplitter()
+    pages = [{"text": "Intro text\n1. Eligibility\nPart one"}, {"text": "continues here\n2. Fees\nFee"},
+             {"text": "details"}]
+    blocks = [block for page in pages for block in splitter.feed(page)] + splitter.flush()
+
+    assert "".join(blocks).split() == " ".join(p["text"] for p in pages).split()
+    assert any("Part one" in b and "continues here" in b for b in blocks)
+    assert blocks[-1].strip().startswith("2. Fees")
+
+
+def test_ingest_then_reingest_is_incremental(tmp_path):
+    collection = make_collection(tmp_path)
+    embedder = CountingEmbedder()
+
+    stats = run_ingest(tmp_path, SECTIONS, embedder, collection)
+    assert stats["added"] == stats["embedded"] == stats["chunks"] == collection.count() > len(SECTIONS)
+    assert collection.metadata[MODEL_METADATA_KEY] == "test-model"
+    assert [s["stage"] for s in stats["stages"]] == ["extract", "chunk", "tag", "batch", "embed", "index"]
+    assert os.path.exists(tmp_path / "chroma" / "TEST_INGEST.lexical.npz")
+    entry = CollectionRegistry.load(str(tmp_path / "chroma" / "collections.json")).entries["TEST_INGEST"]
+    assert entry["count"] == stats["chunks"] and entry["model_name"] == "test-model" and entry["centroid"]
+
+    embedder.texts.clear()
+    stats = run_ingest(tmp_path, SECTIONS, embedder, collection)
+    assert embedder.texts == []
+    assert stats["unchanged"] == stats["chunks"] and stats["added"] == stats["deleted"] == 0
+
+
+def test_ingest_embeds_new_and_deletes_removed_chunks(tmp_path):
+    collection = make_collection(tmp_path)
+    run_ingest(tmp_path, SECTIONS, CountingEmbedder(), collection)
+    before = set(collection.get(include=[])["ids"])
+
+    embedder = CountingEmbedder()
+    changed = SECTIONS[:2] + ["3. Scholarships\nMeritorious students receive a monthly stipend."]
+    stats = run_ingest(tmp_path, changed, embedder, collection)
+
+    after = set(collection.get(include=[])["ids"])
+    assert set(embedder.texts) == {chunk for chunk in collection.get(ids=list(after - before))["documents"]}
+    assert stats["deleted"] == len(before - after) > 0
+    assert all(chunk_id(text) in after for text in embedder.texts)
+
+
+def test_model_change_reembeds_everything(tmp_path):
+    collection = make_collection(tmp_path)
+    run_ingest(tmp_path, SECTIONS, CountingEmbedder(), collection)
+
+    embedder = CountingEmbedder()
+    stats = run_ingest(tmp_path, SECTIONS, embedder, collection, model_name="other-model")
+    assert len(embedder.texts) == stats["chunks"] == collection.count()
+    assert collection.metadata[MODEL_METADATA_KEY] == "other-model"
+
+
+def test_ingest_keeps_the_distance_metric_and_writes_the_manifest(tmp_path):
+    collection = make_collection(tmp_path, metadata={"hnsw:space": "cosine", "hnsw:search_ef": 50})
+    manifest = str(tmp_path / "chunk_manifest")
+    run_ingest(tmp_path, SECTIONS, CountingEmbedder(), collection, manifest_path=manifest)
+    run_ingest(tmp_path, SECTIONS[:2], CountingEmbedder(), collection, manifest_path=manifest)
+
+    assert collection_metric(collection) == "cosine"
+    assert collection.metadata[MODEL_METADATA_KEY] == "test-model"
+    assert collection.metadata["hnsw:search_ef"] == 50
+    retriever = MemmapRetriever(collection_name="TEST_INGEST", chroma_dir=str(tmp_path / "chroma"))
+    assert retriever.metric == "cosine"
+
+    stored = collection.get(include=["embeddings"])
+    embeddings = load_manifest(manifest, "test-model")
+    assert set(embeddings) == set(stored["ids"])
+    assert list(embeddings[stored["ids"][0]]) == pytest.approx(list(stored["embeddings"][0]))
+
+
+def test_pipeline_overlaps_stages_and_applies_back_pressure():
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    def slow(item):
+        time.sleep(0.01)
+        return [item]
+
+    pipeline = Pipeline(source(), [Stage("double", lambda x: [x, x]), Stage("slow", slow, workers=2)], queue_size=2)
+    consumed = []
+    for item in pipeline:
+        consumed.append(item)
+        # The source never runs far ahead of the consumer
+        assert len(produced) - len(consumed) // 2 <= 12
+
+    assert sorted(consumed) == sorted(list(range(20)) * 2)
+    assert [s.items_out for s in pipeline.stats] == [20, 40, 40]
+    assert pipeline.stats[2].busy > 0.3
+
+
+def test_pipeline_reraises_stage_errors():
+    def fail(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return [item]
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(Pipeline(iter(range(100)), [Stage("fail", fail)], queue_size=2))
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import time
+import chromadb
+from unittest.mock import patch
+from data_preprocessing.chromadb_manager import build_records, sync_collection
+from retrieval.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize, lexical_index_path
+from retrieval.chroma_vectorstore import ChromaRetriever
+
+CHUNKS = [
+    "Admission to computer science is based on the GATE score and an interview.",
+    "Candidates of the OBC category get 30% reservation as per government rules.",
+    "Download the hall ticket from the admission portal before the entrance exam.",
+    "The fee for technology management is 30000 per semester.",
+]
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("What is the GATE score?") == ["gate", "score"]
+
+
+def test_bm25_ranks_keyword_match_first():
+    index = LexicalIndex.build(build_records(CHUNKS))
+    results = index.search("OBC reservation", top_k=3)
+    assert results[0][0] == 1
+    assert len(results) == 1
+    assert index.search("unknown words", top_k=3) == []
+
+
+def test_where_filter_masks_documents():
+    index = LexicalIndex.build(build_records(CHUNKS))
+    assert index.search("admission", top_k=4)
+    assert index.search("admission", top_k=4, where={"department": "Futures Studies"}) == []
+    filtered = index.search("fee semester", top_k=4, where={"$and": [{"department": "Futures Studies"},
+                                                                       {"section": "Fees"}]})
+    assert [row for row, _ in filtered] == [3]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = LexicalIndex.build(build_records(CHUNKS))
+    path = lexical_index_path("TEST", chroma_dir=str(tmp_path))
+    index.save(path)
+    loaded = LexicalIndex.load(path)
+    assert loaded.ids == index.ids
+    assert loaded.search("hall ticket", 2) == index.search("hall ticket", 2)
+
+
+def test_search_is_sub_millisecond():
+    records = build_records([f"{chunk} Paragraph {i}." for i in range(250) for chunk in CHUNKS])
+    index = LexicalIndex.build(records)
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search("GATE score for OBC reservation", top_k=5)
+    assert (time.perf_counter() - start) / 100 < 1e-3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_hybrid_retrieval_surfaces_keyword_chunk(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.get_or_create_collection(name="HYBRID_TEST")
+    # The query vector is closest to the fee chunk; only BM25 knows about "hall ticket"
+    vectors = {CHUNKS[0]: [0.0, 1.0], CHUNKS[1]: [0.1, 1.0], CHUNKS[2]: [-1.0, 0.0], CHUNKS[3]: [1.0, 0.0]}
+    sync_collection(collection, CHUNKS, lambda texts: [vectors[t] for t in texts])
+    LexicalIndex.build(build_records(CHUNKS)).save(lexical_index_path("HYBRID_TEST", chroma_dir=str(tmp_path)))
+
+    with patch("retrieval.chroma_vectorstore.CHROMA_DIR", new=str(tmp_path)):
+        retriever = ChromaRetriever(collection_name="HYBRID_TEST")
+
+    dense_only = retriever.retrieve_documents([1.0, 0.0], top_k=2)
+    hybrid = retriever.retrieve_documents([1.0, 0.0], top_k=2, query_text="hall ticket")
+    assert CHUNKS[2] not in dense_only
+    assert CHUNKS[2] in hybrid
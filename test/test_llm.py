@@ -2,13 +2,28 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from generation.llm import LLM
+from unittest.mock import patch, MagicMock, AsyncMock
+from generation.llm import (
+    LLM, GENERATION_FAILED_MESSAGE, LLMScheduler, CircuitBreaker, TokenBucket,
+    CircuitOpenError, SchedulerBusyError, GenerationInterruptedError,
+)
+from generation.llm_backends import LLMBackend, MockBackend
+from generation.session_memory import estimate_tokens
 
 TEST_PROMPT = "What is the admission process for M.Tech?"
 
-@patch("generation.llm.Groq")
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler():
+    # The scheduler is process-wide; give every test its own so breaker state does not leak
+    with patch("generation.llm.llm_scheduler", LLMScheduler()) as scheduler, \
+            patch("generation.llm.local_llm_scheduler", LLMScheduler(requests_per_minute=0, tokens_per_minute=0)):
+        yield scheduler
+
+
+@patch("generation.llm_backends.Groq")
 def test_generate_success(mock_groq):
     # Mock response chunks with streamed tokens
     mock_chunk1 = MagicMock()
@@ -27,7 +42,7 @@ def test_generate_success(mock_groq):
     assert "The admission process involves an entrance exam." == response
 
 
-@patch("generation.llm.Groq")
+@patch("generation.llm_backends.Groq")
 def test_generate_empty_response(mock_groq):
     # Simulate empty chunks
     mock_chunk = MagicMock()
@@ -42,7 +57,7 @@ def test_generate_empty_response(mock_groq):
     assert response == ""
 
 
-@patch("generation.llm.Groq")
+@patch("generation.llm_backends.Groq")
 def test_generate_exception_handling(mock_groq):
     # Simulate API exception on all retries
     mock_client_instance = mock_groq.return_value
@@ -54,10 +69,269 @@ def test_generate_exception_handling(mock_groq):
     assert "Failed to generate a response after multiple attempts." in response
 
 
-@patch("generation.llm.Groq")
+@patch("generation.llm_backends.Groq")
 def test_invalid_api_key(mock_groq):
     # Simulate invalid API key behavior
     with pytest.raises(ValueError):
         LLM(api_key=None)
 
 
+@patch("generation.llm_backends.Groq")
+def test_chat_memory_is_per_session(mock_groq):
+    mock_chunk = MagicMock()
+    mock_chunk.choices[0].delta.content = "Answer"
+
+    mock_client_instance = mock_groq.return_value
+    mock_client_instance.chat.completions.create.side_effect = lambda **kwargs: [mock_chunk]
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    llm.generate("alice question", session_id="alice")
+    llm.generate("bob question", session_id="bob")
+
+    messages = mock_client_instance.chat.completions.create.call_args.kwargs["messages"]
+    contents = [m["content"] for m in messages]
+    assert "alice question" not in contents
+    assert contents[-1] == "bob question"
+
+
+class _AsyncChunks:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+@patch("generation.llm_backends.AsyncGroq")
+@patch("generation.llm_backends.Groq")
+def test_agenerate_success(mock_groq, mock_async_groq):
+    mock_chunk1 = MagicMock()
+    mock_chunk1.choices[0].delta.content = "Async "
+    mock_chunk2 = MagicMock()
+    mock_chunk2.choices[0].delta.content = "answer."
+    mock_async_groq.return_value.chat.completions.create = AsyncMock(return_value=_AsyncChunks([mock_chunk1, mock_chunk2]))
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    response = asyncio.run(llm.agenerate(TEST_PROMPT, session_id="alice"))
+
+    assert response == "Async answer."
+    assert llm.memory.get_history("alice")[-1]["content"] == "Async answer."
+
+
+@patch("generation.llm_backends.AsyncGroq")
+@patch("generation.llm_backends.Groq")
+def test_agenerate_timeout_cancels_and_falls_back(mock_groq, mock_async_groq):
+    slow_chunk = MagicMock()
+    slow_chunk.choices[0].delta.content = "too late"
+    mock_async_groq.return_value.chat.completions.create = AsyncMock(
+        side_effect=lambda **kwargs: _AsyncChunks([slow_chunk], delay=1.0)
+    )
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    response = asyncio.run(llm.agenerate(TEST_PROMPT, retries=2, delay=0, timeout=0.05))
+
+    assert response == GENERATION_FAILED_MESSAGE
+
+
+@patch("generation.llm_backends.Groq")
+def test_generate_stream_yields_tokens(mock_groq):
+    mock_chunk1 = MagicMock()
+    mock_chunk1.choices[0].delta.content = "The "
+    mock_chunk2 = MagicMock()
+    mock_chunk2.choices[0].delta.content = "exam."
+    mock_groq.return_value.chat.completions.create.return_value = [mock_chunk1, mock_chunk2]
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    tokens = list(llm.generate_stream(TEST_PROMPT, session_id="alice"))
+
+    assert tokens == ["The ", "exam."]
+    assert llm.memory.get_history("alice")[-1]["content"] == "The exam."
+
+
+@patch("generation.llm_backends.Groq")
+def test_generate_stream_does_not_retry_after_first_token(mock_groq):
+    mock_chunk = MagicMock()
+    mock_chunk.choices[0].delta.content = "Partial"
+
+    def broken_stream(**kwargs):
+        yield mock_chunk
+        raise Exception("connection reset")
+
+    mock_groq.return_value.chat.completions.create.side_effect = broken_stream
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    tokens = []
+    with pytest.raises(GenerationInterruptedError):
+        for token in llm.generate_stream(TEST_PROMPT, delay=0, session_id="alice"):
+            tokens.append(token)
+
+    assert tokens == ["Partial"]
+    assert mock_groq.return_value.chat.completions.create.call_count == 1
+    assert llm.memory.get_history("alice") == []
+
+
+def test_agenerate_stream_raises_after_partial_answer():
+    class BreakingBackend(LLMBackend):
+        rate_limited = False
+
+        def stream(self, messages, timeout=None, **params):
+            raise NotImplementedError
+
+        async def astream(self, messages, timeout=None, **params):
+            for token in ("The ", "fee ", "is "):
+                yield token
+            raise ConnectionError("connection reset")
+
+    llm = LLM(backend=BreakingBackend("fake", timeout=5))
+
+    async def collect():
+        tokens = []
+        with pytest.raises(GenerationInterruptedError):
+            async for token in llm.agenerate_stream(TEST_PROMPT, session_id="bob", delay=0):
+                tokens.append(token)
+        return tokens
+
+    assert asyncio.run(collect()) == ["The ", "fee ", "is "]
+    assert llm.memory.get_history("bob") == []
+    with pytest.raises(GenerationInterruptedError):
+        asyncio.run(llm.agenerate(TEST_PROMPT, delay=0))
+
+
+def test_cancelled_stream_returns_its_reservation():
+    class HangingBackend(LLMBackend):
+        def stream(self, messages, timeout=None, **params):
+            raise NotImplementedError
+
+        async def astream(self, messages, timeout=None, **params):
+            yield "The "
+            await asyncio.sleep(60)
+
+    clock = _FakeClock()
+    scheduler = LLMScheduler(tokens_per_minute=10000, clock=clock)
+    llm = LLM(backend=HangingBackend("fake", timeout=60), scheduler=scheduler)
+
+    async def cancel_after_first_token():
+        first = asyncio.Event()
+
+        async def consume():
+            async for _ in llm.agenerate_stream(TEST_PROMPT, delay=0):
+                first.set()
+
+        task = asyncio.create_task(consume())
+        await first.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_after_first_token())
+    used = estimate_tokens(TEST_PROMPT) + estimate_tokens("The ")
+    assert scheduler.tokens.level == pytest.approx(10000 - used)
+    assert scheduler.breaker.failures == 0
+
+
+def test_local_backends_are_not_rate_limited():
+    llm = LLM(backend=MockBackend())
+    assert llm.scheduler.requests.rate == 0
+    for _ in range(100):
+        assert llm.scheduler.acquire(10**6, max_wait=0) == 10**6
+    assert LLM(model_name="llama3-8b-8192", api_key="dummy_api_key").scheduler.requests.rate > 0
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = _FakeClock()
+    bucket = TokenBucket(60, clock=clock)  # one per second, burst of 60
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    bucket.refund(10)
+    assert bucket.wait_time(10) == 0
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    clock = _FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()       # the single half-open probe
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_scheduler_admits_by_priority():
+    scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=10**6)
+    low = scheduler._enqueue(10)
+    high = scheduler._enqueue(0)
+    assert scheduler._try_admit(low, 1) > 0
+    assert scheduler._try_admit(high, 1) == 0
+    assert scheduler._try_admit(low, 1) == 0
+
+
+def test_abandoning_an_admitted_ticket_is_a_no_op():
+    scheduler = LLMScheduler(requests_per_minute=600, tokens_per_minute=10**6)
+    ticket = scheduler._enqueue(0)
+    assert scheduler._try_admit(ticket, 1) == 0
+    queued = scheduler._enqueue(0)
+
+    scheduler._abandon(ticket)
+    assert scheduler._queue == [queued]
+    assert scheduler.stats()["rejected_busy"] == 0
+
+
+def test_scheduler_rejects_when_queue_full_or_wait_exceeded():
+    scheduler = LLMScheduler(requests_per_minute=60, max_queue=1)
+    scheduler.requests.consume(60)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.acquire(1, max_wait=0.01)
+    assert scheduler.stats()["queued"] == 0
+
+    scheduler._enqueue(0)
+    with pytest.raises(SchedulerBusyError):
+        scheduler.acquire(1)
+
+
+def test_rate_limit_honours_retry_after_without_tripping_breaker():
+    clock = _FakeClock()
+    scheduler = LLMScheduler(breaker=CircuitBreaker(failure_threshold=1, clock=clock), clock=clock)
+    error = Exception("rate limited")
+    error.status_code = 429
+    error.response = MagicMock(headers={"retry-after": "3"})
+
+    scheduler.record_failure(error)
+    assert scheduler.breaker.allow()
+    assert scheduler.backoff_delay(0, 1.0, error) == 3.0
+    ticket = scheduler._enqueue(0)
+    assert scheduler._try_admit(ticket, 1) == pytest.approx(3.0)
+    clock.now = 3
+    assert scheduler._try_admit(ticket, 1) == 0
+
+
+@patch("generation.llm_backends.Groq")
+def test_open_breaker_fails_fast(mock_groq, fresh_scheduler):
+    mock_groq.return_value.chat.completions.create.side_effect = Exception("API failure")
+    fresh_scheduler.breaker.failure_threshold = 2
+
+    llm = LLM(model_name="llama3-8b-8192", api_key="dummy_api_key")
+    assert llm.generate(TEST_PROMPT, retries=2, delay=0) == GENERATION_FAILED_MESSAGE
+    with pytest.raises(CircuitOpenError):
+        llm.generate(TEST_PROMPT, retries=2, delay=0)
+    assert mock_groq.return_value.chat.completions.create.call_count == 2
@@ -0,0 +1,209 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import asyncio
+import time
+import httpx
+import pytest
+from generation.llm import LLM, LLMScheduler
+from generation.llm_backends import (
+    LLMBackend, OpenAICompatibleBackend, HedgedBackend, create_llm_backend, parse_sse_line, _END,
+)
+from generation.mock_llm_server import start_in_background, mock_answer
+
+MESSAGES = [{"role": "user", "content": "What is the GATE cutoff?"}]
+
+
+@pytest.fixture
+def mock_server():
+    server, base_url = start_in_background(tokens=8)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+class FakeBackend(LLMBackend):
+    def __init__(self, tokens, first_token_delay=0.0, error=None, timeout=5.0):
+        super().__init__("fake", timeout)
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.error = error
+        self.calls = 0
+
+    def stream(self, messages, timeout=None, **params):
+        self.calls += 1
+        time.sleep(self.first_token_delay)
+        if self.error:
+            raise self.error
+        yield from self.tokens
+
+    async def astream(self, messages, timeout=None, **params):
+        self.calls += 1
+        await asyncio.sleep(self.first_token_delay)
+        if self.error:
+            raise self.error
+        for token in self.tokens:
+            yield token
+
+
+def test_parse_sse_line():
+    assert parse_sse_line('data: {"choices": [{"delta": {"content": "Hi"}}]}') == "Hi"
+    assert parse_sse_line("data: [DONE]") is _END
+    assert parse_sse_line(": keep-alive") is None
+    assert parse_sse_line("data: not json") is None
+
+
+def test_openai_compatible_backend_streams_from_mock_server(mock_server):
+    _, base_url = mock_server
+    backend = OpenAICompatibleBackend(model_name="mock", base_url=base_url, timeout=5)
+
+    tokens = list(backend.stream(MESSAGES))
+    assert tokens == mock_answer(MESSAGES[-1]["content"], 8)
+
+    async def collect():
+        return [t async for t in backend.astream(MESSAGES)]
+
+    assert asyncio.run(collect()) == tokens
+
+
+def test_rate_limited_response_carries_retry_after():
+    server, base_url = start_in_background(fail_every=1)
+    try:
+        backend = OpenAICompatibleBackend(model_name="mock", base_url=base_url, timeout=5)
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            list(backend.stream(MESSAGES))
+        assert excinfo.value.response.status_code == 429
+        assert LLMScheduler().backoff_delay(0, 0.0, excinfo.value) == 1.0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_llm_with_mock_backend(mock_server):
+    _, base_url = mock_server
+    backend = create_llm_backend("mock", base_url=base_url, timeout=5)
+    llm = LLM(backend=backend, scheduler=LLMScheduler())
+
+    assert llm.generate(MESSAGES[-1]["content"]) == "".join(mock_answer(MESSAGES[-1]["content"], 8))
+
+
+def test_hedge_wins_when_primary_is_slow():
+    primary = FakeBackend(["slow"], first_token_delay=1.0)
+    secondary = FakeBackend(["fast ", "answer"])
+    backend = HedgedBackend(primary, secondary, initial_delay=0.05)
+
+    started = time.monotonic()
+    assert list(backend.stream(MESSAGES)) == ["fast ", "answer"]
+    assert time.monotonic() - started < 0.5
+    assert backend.hedges == 1 and backend.secondary_wins == 1
+
+
+def test_async_hedge_wins_when_primary_is_slow():
+    primary = FakeBackend(["slow"], first_token_delay=1.0)
+    secondary = FakeBackend(["fast"])
+    backend = HedgedBackend(primary, secondary, initial_delay=0.05)
+
+    async def collect():
+        return [t async for t in backend.astream(MESSAGES)]
+
+    assert asyncio.run(collect()) == ["fast"]
+    assert backend.hedges == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeBackend(["primary"])
+    secondary = FakeBackend(["secondary"])
+    backend = HedgedBackend(primary, secondary, initial_delay=0.5)
+
+    assert list(backend.stream(MESSAGES)) == ["primary"]
+    assert secondary.calls == 0
+
+
+def test_failing_primary_fails_over_immediately():
+    primary = FakeBackend([], error=RuntimeError("provider down"))
+    secondary = FakeBackend(["backup"])
+    backend = HedgedBackend(primary, secondary, initial_delay=10)
+
+    async def collect():
+        return [t async for t in backend.astream(MESSAGES)]
+
+    assert list(backend.stream(MESSAGES)) == ["backup"]
+    assert asyncio.run(collect()) == ["backup"]
+    assert backend.hedges == 0
+
+
+def test_both_backends_failing_raises_primary_error():
+    backend = HedgedBackend(FakeBackend([], error=RuntimeError("primary")),
+                            FakeBackend([], error=RuntimeError("secondary")), initial_delay=10)
+
+    with pytest.raises(RuntimeError, match="primary"):
+        list(backend.stream(MESSAGES))
+
+
+def test_hedge_request_is_admitted_by_the_scheduler():
+    secondary = FakeBackend(["fast"])
+    backend = HedgedBackend(FakeBackend(["slow"], first_token_delay=0.3), secondary, initial_delay=0.05)
+    scheduler = LLMScheduler(requests_per_minute=60, tokens_per_minute=10**6)
+    backend.bind_scheduler(lambda _: scheduler)
+
+    assert list(backend.stream(MESSAGES)) == ["fast"]
+    assert scheduler.stats()["admitted"] == 1
+    # Only the tokens the secondary actually used stay consumed
+    assert scheduler.tokens.level > 10**6 - 100
+
+    # With the request budget spent there is no hedge: the primary is awaited instead
+    scheduler.requests.consume(60)
+    assert list(backend.stream(MESSAGES)) == ["slow"]
+    assert secondary.calls == 1 and backend.hedges == 1
+
+
+def test_hedge_secondary_uses_its_own_scheduler():
+    from generation import llm
+
+    local, hosted = FakeBackend(["local"]), FakeBackend(["hosted"])
+    local.rate_limited = False
+    client = LLM(backend=HedgedBackend(local, hosted))
+
+    assert client.scheduler is llm.local_llm_scheduler
+    assert client.backend.scheduler is llm.llm_scheduler
+    assert not client.backend.rate_limited
+
+
+def test_groq_astream_passes_the_timeout():
+    from unittest.mock import AsyncMock, patch
+    from generation.llm_backends import GroqBackend
+
+    async def chunks():
+        return
+        yield
+
+    with patch("generation.llm_backends.AsyncGroq") as async_groq:
+        create = async_groq.return_value.chat.completions.create = AsyncMock(return_value=chunks())
+        backend = GroqBackend(api_key="dummy_api_key", timeout=7.0)
+
+        async def drain(timeout):
+            return [token async for token in backend.astream(MESSAGES, timeout)]
+
+        asyncio.run(drain(None))
+        assert create.call_args.kwargs["timeout"] == 7.0
+        create.return_value = chunks()
+        asyncio.run(drain(2.0))
+        assert create.call_args.kwargs["timeout"] == 2.0
+
+
+def test_backend_must_implement_both_stream_methods():
+    class SyncOnlyBackend(LLMBackend):
+        def stream(self, messages, timeout=None, **params):
+            yield "sync"
+
+    with pytest.raises(TypeError):
+        SyncOnlyBackend("fake")
+
+
+def test_hedge_delay_follows_primary_percentile():
+    backend = HedgedBackend(FakeBackend([]), FakeBackend([]), percentile=50, min_samples=3, initial_delay=1.0)
+    assert backend.hedge_delay() == 1.0
+    for seconds in (0.1, 0.2, 0.3):
+        backend._record(seconds)
+    assert backend.hedge_delay() == pytest.approx(0.2)
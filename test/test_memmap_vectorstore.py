@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import chromadb
+import numpy as np
+from unittest.mock import patch
+from data_preprocessing.chromadb_manager import sync_collection
+from retrieval.chroma_vectorstore import ChromaRetriever
+from retrieval.memmap_vectorstore import MemmapRetriever, export_from_chroma, vectors_path
+
+RNG = np.random.default_rng(7)
+CHUNKS = [f"Chunk {i} about {'fees' if i % 3 == 0 else 'eligibility'} for computer science." for i in range(60)]
+VECTORS = {c: (v / np.linalg.norm(v)).tolist() for c, v in zip(CHUNKS, RNG.standard_normal((len(CHUNKS), 16)))}
+
+
+def build(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.get_or_create_collection(name="MEMMAP_TEST")
+    sync_collection(collection, CHUNKS, lambda texts: [VECTORS[t] for t in texts])
+    assert export_from_chroma(collection, vectors_path("MEMMAP_TEST", str(tmp_path))) == len(CHUNKS)
+    with patch("retrieval.chroma_vectorstore.CHROMA_DIR", new=str(tmp_path)):
+        chroma = ChromaRetriever(collection_name="MEMMAP_TEST")
+    return chroma, MemmapRetriever(collection_name="MEMMAP_TEST", chroma_dir=str(tmp_path))
+
+
+def test_matches_chroma_results_and_distances(tmp_path):
+    chroma, memmap = build(tmp_path)
+    assert memmap.count() == len(CHUNKS)
+    assert isinstance(memmap.matrix, np.memmap)
+
+    for query in RNG.standard_normal((5, 16)):
+        query = (query / np.linalg.norm(query)).tolist()
+        expected = chroma.retrieve_scored(query, top_k=5)
+        actual = memmap.retrieve_scored(query, top_k=5)
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+        assert np.allclose([r["distance"] for r in actual], [r["distance"] for r in expected], atol=1e-4)
+
+
+def test_batch_search_equals_single_queries(tmp_path):
+    _, memmap = build(tmp_path)
+    queries = RNG.standard_normal((4, 16)).tolist()
+    batch = memmap.search_batch(queries, top_k=3)
+    assert [[r["id"] for r in results] for results in batch] == \
+        [[r["id"] for r in memmap.retrieve_scored(q, top_k=3)] for q in queries]
+
+
+def test_filters_restrict_candidates(tmp_path):
+    _, memmap = build(tmp_path)
+    docs = memmap.retrieve_documents(VECTORS[CHUNKS[1]], top_k=5, filters={"section": "Fees"})
+    assert len(docs) == 5
+    assert all("fees" in doc for doc in docs)
@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import json
+from data_preprocessing.pdf_extractor import clean_page_text, table_records, iter_pages, extract_to_files
+
+
+def write_pdf(path, pages):
+    """Writes a minimal PDF where each page holds the given lines of Helvetica text."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = "".join(f"BT /F1 12 Tf 72 {720 - 20 * i} Td ({line}) Tj ET\n" for i, line in enumerate(lines))
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}endstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(out)
+
+
+def test_clean_page_text_removes_page_numbers():
+    assert clean_page_text("Eligibility\n12\nB.Tech with 55%") == "Eligibility\n\nB.Tech with 55%"
+
+
+def test_table_records_use_first_row_as_header():
+    tables = [[["Programme", "Fee"], ["CS", " 19845 "], [None, None]], []]
+    assert table_records(tables, "prospectus.pdf", 3) == [
+        {"source": "prospectus.pdf", "page": 3, "table": 0, "header": ["Programme", "Fee"], "rows": [["CS", "19845"]]}
+    ]
+
+
+def test_pages_stream_in_order_across_pdfs(tmp_path):
+    first, second = str(tmp_path / "prospectus.pdf"), str(tmp_path / "annexure.pdf")
+    write_pdf(first, [[f"Prospectus page {i}"] for i in range(1, 6)])
+    write_pdf(second, [["Annexure page 1"]])
+
+    pages = list(iter_pages([first, second], workers=2, chunksize=1))
+
+    assert [(p["source"], p["page"]) for p in pages] == [("prospectus.pdf", i) for i in range(1, 6)] + [("annexure.pdf", 1)]
+    assert pages[3]["text"].strip() == "Prospectus page 4"
+
+
+def test_extract_to_files(tmp_path):
+    pdf = str(tmp_path / "prospectus.pdf")
+    write_pdf(pdf, [["Important dates"], ["Fee payment"]])
+    text_path, tables_path = str(tmp_path / "text.txt"), str(tmp_path / "tables.jsonl")
+
+    stats = extract_to_files([pdf], text_path, tables_path, workers=1)
+
+    assert stats == {"pages": 2, "tables": 0}
+    with open(text_path, encoding="utf-8") as f:
+        assert f.read() == "\n\nImportant dates\n\nFee payment"
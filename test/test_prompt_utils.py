@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import time
+from jinja2 import Template
+from generation.prompt_utils import PromptRegistry, build_prompt, prompt_registry, TEMPLATE_DIR
+
+
+def test_default_prompt_matches_uncached_rendering():
+    with open(os.path.join(TEMPLATE_DIR, "prompt_template.txt"), "r") as f:
+        expected = Template(f.read()).render(context="Fees are 8160.", question="What are the fees?")
+    assert build_prompt("Fees are 8160.", "What are the fees?") == expected
+
+
+def test_template_is_compiled_once():
+    assert prompt_registry.get("default") is prompt_registry.get("default")
+
+
+def test_named_templates_and_fallback():
+    assert {"default", "fees", "eligibility"} <= set(prompt_registry.names())
+    assert "sponsored" in build_prompt("ctx", "q", "fees")
+    assert build_prompt("ctx", "q", "no_such_section") == build_prompt("ctx", "q")
+
+
+def test_missing_template_is_resolved_without_lookup(tmp_path):
+    (tmp_path / "prompt_template.txt").write_text("Default {{ question }}")
+    registry = PromptRegistry(template_dirs=[str(tmp_path)])
+    assert registry.resolve("hostel") == "default"
+
+    # A template added later is picked up once its directory changes
+    (tmp_path / "hostel.txt").write_text("Hostel {{ question }}")
+    later = time.time() + 5
+    os.utime(tmp_path, (later, later))
+    assert registry.resolve("hostel") == "hostel"
+
+
+def test_hot_reload_on_mtime_change(tmp_path):
+    template_file = tmp_path / "greeting.txt"
+    template_file.write_text("Hello {{ question }}")
+    registry = PromptRegistry(template_dirs=[str(tmp_path)])
+    assert registry.render("greeting", question="world") == "Hello world"
+
+    template_file.write_text("Bye {{ question }}")
+    later = time.time() + 5
+    os.utime(template_file, (later, later))
+    assert registry.render("greeting", question="world") == "Bye world"
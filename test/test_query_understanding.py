@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import chromadb
+from unittest.mock import patch
+from retrieval.query_understanding import infer_facets, build_where, relaxation_ladder
+from retrieval.chroma_vectorstore import ChromaRetriever
+from data_preprocessing.chromadb_manager import sync_collection
+
+
+def test_infer_facets_skips_unspecified_labels():
+    facets = infer_facets("What is the fee for M.Tech Technology Management?")
+    assert facets == {"course": "M.Tech Technology Management", "department": "Futures Studies", "section": "Fees"}
+    assert infer_facets("Hello there") == {}
+
+
+def test_build_where_shapes():
+    assert build_where({}) is None
+    assert build_where({"section": "Fees"}) == {"section": "Fees"}
+    assert build_where({"section": "Fees", "department": "General"}) == {
+        "$and": [{"section": "Fees"}, {"department": "General"}]
+    }
+
+
+def test_relaxation_ladder_ends_unfiltered():
+    facets = {"department": "Computer Science", "section": "Fees"}
+    assert relaxation_ladder(facets) == [
+        {"$and": [{"department": "Computer Science"}, {"section": "Fees"}]},
+        {"department": "Computer Science"},
+        None,
+    ]
+    assert relaxation_ladder({"section": "Fees"}) == [{"section": "Fees"}, None]
+    assert relaxation_ladder({}) == [None]
+
+
+CHUNKS = [
+    "Fee structure for computer science students: tuition is 30000 per semester.",
+    "Eligibility for computer science: B.Tech with 55% marks.",
+    "Eligibility for optoelectronics: B.Tech in electronics and communication.",
+    "Important dates: the notification is published in May.",
+]
+
+
+def make_retriever(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    collection = client.get_or_create_collection(name="FILTER_TEST")
+    sync_collection(collection, CHUNKS, lambda texts: [[1.0, float(i), 0.5] for i, _ in enumerate(texts)])
+    with patch("retrieval.chroma_vectorstore.CHROMA_DIR", new=str(tmp_path)):
+        return ChromaRetriever(collection_name="FILTER_TEST")
+
+
+def test_filtered_retrieval_narrows_candidates(tmp_path):
+    retriever = make_retriever(tmp_path)
+    with patch("retrieval.chroma_vectorstore.FILTER_MIN_RESULTS", new=1):
+        docs = retriever.retrieve_documents([1.0, 0.0, 0.5], top_k=4, filters={"department": "Optoelectronics"})
+    assert docs == [CHUNKS[2]]
+
+
+def test_low_recall_relaxes_to_unfiltered(tmp_path):
+    retriever = make_retriever(tmp_path)
+    with patch("retrieval.chroma_vectorstore.FILTER_MIN_RESULTS", new=2):
+        docs = retriever.retrieve_documents([1.0, 0.0, 0.5], top_k=4,
+                                            filters={"department": "Optoelectronics", "section": "Eligibility"})
+    assert len(docs) == 4
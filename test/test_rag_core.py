@@ -64,3 +64,277 @@ def test_successful_response():
     response = answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM())
     assert response == "This is the generated answer."
 
+
+def test_cache_skips_pipeline_on_repeat_query():
+    from generation.answer_cache import AnswerCache
+
+    class CountingLLM(MockLLM):
+        calls = 0
+
+        def generate(self, prompt):
+            CountingLLM.calls += 1
+            return super().generate(prompt)
+
+    cache = AnswerCache()
+    first = answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), CountingLLM(), cache=cache)
+    second = answer_query("what is AI", MockEmbeddingModel(), MockVectorStore(), CountingLLM(), cache=cache)
+
+    assert first == second == "This is the generated answer."
+    assert CountingLLM.calls == 1
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_async_successful_response():
+    import asyncio
+    from generation.rag_core import answer_query_async
+
+    class AsyncEmbeddingModel:
+        async def aembed_query(self, text):
+            return [0.1, 0.2, 0.3]
+
+    class AsyncLLM:
+        async def agenerate(self, prompt):
+            return "  Async answer.  "
+
+    # MockVectorStore has no async method and is run in a worker thread
+    response = asyncio.run(answer_query_async("What is AI?", AsyncEmbeddingModel(), MockVectorStore(), AsyncLLM()))
+    assert response == "Async answer."
+
+
+def test_async_embedding_failure():
+    import asyncio
+    from generation.rag_core import answer_query_async
+
+    response = asyncio.run(answer_query_async("error", MockEmbeddingModel(), MockVectorStore(), MockLLM()))
+    assert "embedding" in response.lower()
+
+
+def test_sync_and_async_paths_answer_alike():
+    import asyncio
+    from generation.rag_core import answer_query_async
+
+    class OtherEmbeddingModel:
+        def embed_query(self, text):
+            return [0.5]
+
+    class FailingLLM:
+        def generate(self, prompt):
+            raise Exception("LLM error")
+
+    cases = [
+        ("   ", MockEmbeddingModel(), MockLLM()),
+        ("What is AI?", None, MockLLM()),
+        ("error", MockEmbeddingModel(), MockLLM()),
+        ("What is AI?", OtherEmbeddingModel(), MockLLM()),
+        ("What is AI?", MockEmbeddingModel(), FailingLLM()),
+        ("What is AI?", MockEmbeddingModel(), MockLLM()),
+    ]
+    for user_query, embedding_model, llm in cases:
+        expected = answer_query(user_query, embedding_model, MockVectorStore(), llm)
+        assert asyncio.run(answer_query_async(user_query, embedding_model, MockVectorStore(), llm)) == expected
+
+
+def test_stream_yields_tokens_and_fills_cache():
+    import asyncio
+    from generation.rag_core import answer_query_stream
+    from generation.answer_cache import AnswerCache
+
+    class StreamingLLM:
+        async def agenerate_stream(self, prompt):
+            for token in ["Streamed ", "answer."]:
+                yield token
+
+    async def collect():
+        return [t async for t in answer_query_stream("What is AI?", MockEmbeddingModel(), MockVectorStore(), StreamingLLM(), cache=cache)]
+
+    cache = AnswerCache()
+    assert asyncio.run(collect()) == ["Streamed ", "answer."]
+    assert asyncio.run(collect()) == ["Streamed answer."]
+
+
+def test_stream_empty_query_yields_message():
+    import asyncio
+    from generation.rag_core import answer_query_stream
+
+    async def collect():
+        return [t async for t in answer_query_stream("  ", MockEmbeddingModel(), MockVectorStore(), MockLLM())]
+
+    assert "cannot be empty" in asyncio.run(collect())[0]
+
+
+def test_inferred_filters_are_passed_to_retriever():
+    class FilteringVectorStore:
+        def retrieve_documents(self, embedding, filters=None):
+            self.filters = filters
+            return ["Fees are 30000 per semester."]
+
+    store = FilteringVectorStore()
+    answer_query("What is the tuition fee?", MockEmbeddingModel(), store, MockLLM())
+    assert store.filters == {"section": "Fees"}
+
+
+def test_query_text_passed_to_hybrid_retriever():
+    class HybridVectorStore:
+        def retrieve_documents(self, embedding, filters=None, query_text=None):
+            self.query_text = query_text
+            return ["Download the hall ticket from the portal."]
+
+    store = HybridVectorStore()
+    answer_query("Where is my hall ticket?", MockEmbeddingModel(), store, MockLLM())
+    assert store.query_text == "Where is my hall ticket?"
+
+
+def test_retriever_signature_is_resolved_once():
+    import inspect
+    from unittest.mock import patch
+    from generation.rag_core import _accepted_kwargs
+
+    class HybridVectorStore:
+        def retrieve_documents(self, embedding, filters=None, query_text=None):
+            return ["Download the hall ticket from the portal."]
+
+    _accepted_kwargs.cache_clear()
+    with patch("generation.rag_core.inspect.signature", wraps=inspect.signature) as signature:
+        for store in (HybridVectorStore(), HybridVectorStore()):
+            answer_query("Where is my hall ticket?", MockEmbeddingModel(), store, MockLLM())
+    assert signature.call_count == 1
+
+
+def test_scored_retrieval_drops_distant_chunks():
+    class ScoredVectorStore:
+        def retrieve_scored(self, embedding, filters=None, query_text=None):
+            return [{"text": "Fees are 30000 per semester.", "distance": 0.3},
+                    {"text": "The campus has a library.", "distance": 3.0}]
+
+    class PromptCapturingLLM(MockLLM):
+        def generate(self, prompt):
+            self.prompt = prompt
+            return "ok"
+
+    llm = PromptCapturingLLM()
+    answer_query("How much are the fees?", MockEmbeddingModel(), ScoredVectorStore(), llm)
+    assert "30000" in llm.prompt
+    assert "library" not in llm.prompt
+
+
+def test_reranker_over_fetches_and_narrows_the_prompt():
+    class ScoredVectorStore:
+        def retrieve_scored(self, embedding, top_k=5, filters=None, query_text=None):
+            self.top_k = top_k
+            return [{"text": "The campus has a library.", "distance": 0.2},
+                    {"text": "Fees are 30000 per semester.", "distance": 0.3}]
+
+    class FeesReranker:
+        candidates, top_n = 20, 1
+
+        def rerank(self, query, docs):
+            return [dict(docs[1], rerank_score=5.0)]
+
+    class FailingReranker(FeesReranker):
+        def rerank(self, query, docs):
+            raise RuntimeError("model missing")
+
+    class PromptCapturingLLM(MockLLM):
+        def generate(self, prompt):
+            self.prompt = prompt
+            return "ok"
+
+    store, llm = ScoredVectorStore(), PromptCapturingLLM()
+    answer_query("How much are the fees?", MockEmbeddingModel(), store, llm, reranker=FeesReranker())
+    assert store.top_k == 20
+    assert "30000" in llm.prompt and "library" not in llm.prompt
+
+    answer_query("How much are the fees?", MockEmbeddingModel(), store, llm, reranker=FailingReranker())
+    assert "library" in llm.prompt and "30000" not in llm.prompt
+
+
+def test_cache_is_not_shared_across_conversation_histories():
+    from generation.answer_cache import AnswerCache
+    from generation.session_memory import SessionMemoryStore
+
+    class MemoryLLM:
+        def __init__(self):
+            self.memory = SessionMemoryStore()
+            self.calls = 0
+
+        def generate(self, prompt, session_id=None, memory_text=None):
+            self.calls += 1
+            history = self.memory.get_history(session_id)
+            answer = f"Answer after {len(history)} messages."
+            self.memory.add_turn(session_id, memory_text, answer)
+            return answer
+
+    llm, cache = MemoryLLM(), AnswerCache()
+    llm.memory.add_turn("mba-user", "Tell me about the MBA.", "The MBA is two years.")
+
+    first = answer_query("What are the fees?", MockEmbeddingModel(), MockVectorStore(), llm, "new-user", cache)
+    follow_up = answer_query("What are the fees?", MockEmbeddingModel(), MockVectorStore(), llm, "mba-user", cache)
+    assert first == "Answer after 0 messages."
+    assert follow_up == "Answer after 2 messages."
+    assert llm.calls == 2
+
+    # A fresh conversation gets the history-free answer, and the exchange is remembered
+    assert answer_query("What are the fees?", MockEmbeddingModel(), MockVectorStore(), llm, "other", cache) == first
+    assert llm.calls == 2
+    assert llm.memory.get_history("other")[-1]["content"] == first
+    # Follow-up answers were never cached
+    assert cache.stats()["exact_size"] == 1
+
+
+def test_interrupted_stream_is_flagged_and_not_cached():
+    import asyncio
+    from generation.llm import GenerationInterruptedError
+    from generation.rag_core import answer_query_stream, INTERRUPTED_MESSAGE
+    from generation.answer_cache import AnswerCache
+
+    class BreakingLLM:
+        async def agenerate_stream(self, prompt):
+            yield "The fee "
+            yield "is "
+            raise GenerationInterruptedError("connection reset")
+
+    cache = AnswerCache()
+
+    async def collect():
+        return [t async for t in answer_query_stream("What is the fee?", MockEmbeddingModel(), MockVectorStore(),
+                                                     BreakingLLM(), cache=cache)]
+
+    assert asyncio.run(collect()) == ["The fee ", "is ", INTERRUPTED_MESSAGE]
+    assert cache.get_exact("What is the fee?") is None
+
+
+def test_unavailable_llm_falls_back_to_faq_then_message():
+    from generation.llm import CircuitOpenError
+    from generation.rag_core import LLM_UNAVAILABLE_MESSAGE
+
+    class OpenCircuitLLM:
+        def generate(self, prompt):
+            raise CircuitOpenError("open")
+
+    response = answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), OpenCircuitLLM(),
+                            fallback=lambda q: "FAQ answer.")
+    assert response == "FAQ answer."
+
+    response = answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), OpenCircuitLLM(),
+                            fallback=lambda q: None)
+    assert response == LLM_UNAVAILABLE_MESSAGE
+
+
+def test_unavailable_llm_serves_loosely_similar_cached_answer():
+    import asyncio
+    from generation.llm import SchedulerBusyError
+    from generation.rag_core import answer_query_stream
+    from generation.answer_cache import AnswerCache
+
+    class BusyLLM:
+        async def agenerate_stream(self, prompt):
+            raise SchedulerBusyError("busy")
+            yield
+
+    cache = AnswerCache(similarity_threshold=0.99)
+    cache.put("What is ML?", [0.2, 0.2, 0.3], "Cached answer.")  # cosine 0.97
+
+    async def collect():
+        return [t async for t in answer_query_stream("What is AI?", MockEmbeddingModel(), MockVectorStore(), BusyLLM(), cache=cache)]
+
+    assert asyncio.run(collect()) == ["Cached answer."]
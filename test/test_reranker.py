@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import numpy as np
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+from retrieval.reranker import CrossEncoderReranker
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "fees": 2, "hostel": 3, "mtech": 4, "semester": 5, "library": 6}
+
+
+class Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeCrossEncoder:
+    """Stands in for an onnxruntime cross-encoder: scores a pair by the question words found in the chunk."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [Node("input_ids"), Node("attention_mask"), Node("token_type_ids")]
+
+    def get_outputs(self):
+        return [Node("logits")]
+
+    def run(self, output_names, feeds):
+        ids, mask, types = feeds["input_ids"], feeds["attention_mask"], feeds["token_type_ids"]
+        self.batches.append(len(ids))
+        scores = []
+        for row, row_mask, row_types in zip(ids, mask, types):
+            query = set(row[(row_types == 0) & (row_mask == 1)]) - {VOCAB["[UNK]"]}
+            chunk = row[(row_types == 1) & (row_mask == 1)]
+            scores.append([float(sum(token in query for token in chunk))])
+        return [np.array(scores, dtype=np.float32)]
+
+
+def make_reranker(**kwargs):
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    return CrossEncoderReranker(session=FakeCrossEncoder(), tokenizer=tokenizer, **kwargs)
+
+
+DOCS = [{"text": "the library opens at 9", "distance": 0.2},
+        {"text": "hostel rules", "distance": 0.3},
+        {"text": "mtech fees per semester : fees 30000", "distance": 0.4},
+        {"text": "mtech hostel fees", "distance": 0.5}]
+
+
+def test_rerank_scores_all_candidates_in_one_batch():
+    reranker = make_reranker(top_n=2, budget_ms=1000)
+    reranked = reranker.rerank("mtech fees", DOCS)
+
+    assert reranker.session.batches == [4]
+    assert [d["text"] for d in reranked] == [DOCS[2]["text"], DOCS[3]["text"]]
+    assert reranked[0]["rerank_score"] == 3.0 and reranked[0]["distance"] == 0.4
+    assert reranker.pair_seconds is not None
+
+
+def test_budget_limits_candidates_or_skips():
+    reranker = make_reranker(top_n=2, budget_ms=10)
+
+    # Two pairs fit: only the two best-ranked candidates are reranked
+    reranker.pair_seconds = 0.004
+    reranked = reranker.rerank("hostel", DOCS)
+    assert reranker.session.batches == [2]
+    assert [d["text"] for d in reranked] == [DOCS[1]["text"], DOCS[0]["text"]]
+
+    # Not even top_n pairs fit: retrieval order, no forward pass, and the estimate decays
+    reranker.pair_seconds = 0.02
+    assert reranker.rerank("hostel", DOCS) == DOCS[:2]
+    assert reranker.session.batches == [2]
+    assert reranker.pair_seconds < 0.02
+
+
+def test_warm_up_measures_a_full_batch():
+    reranker = make_reranker(candidates=8, top_n=3, max_length=16)
+    reranker.warm_up()
+
+    assert reranker.session.batches == [8, 8]
+    assert reranker.pair_seconds > 0
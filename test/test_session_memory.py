@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from unittest.mock import patch
+from generation.session_memory import SessionMemoryStore
+
+
+def test_sessions_are_isolated():
+    store = SessionMemoryStore()
+    store.add_turn("alice", "What are the fees?", "Rs. 19845.")
+    store.add_turn("bob", "When is the exam?", "In July.")
+
+    alice = store.get_history("alice")
+    assert [m["content"] for m in alice] == ["What are the fees?", "Rs. 19845."]
+    assert "When is the exam?" not in [m["content"] for m in alice]
+
+
+def test_ring_buffer_keeps_recent_messages():
+    store = SessionMemoryStore(max_messages=4)
+    for i in range(5):
+        store.add_turn("user", f"q{i}", f"a{i}")
+
+    history = store.get_history("user")
+    assert [m["content"] for m in history] == ["q3", "a3", "q4", "a4"]
+
+
+def test_token_budget_trims_oldest_first():
+    store = SessionMemoryStore(max_messages=10, token_budget=3, token_counter=lambda text: 1)
+    for i in range(3):
+        store.add_turn("user", f"q{i}", f"a{i}")
+
+    history = store.get_history("user")
+    # Three messages fit; the leading assistant reply is dropped so history starts with a user turn
+    assert [m["content"] for m in history] == ["q2", "a2"]
+
+
+def test_idle_sessions_expire():
+    store = SessionMemoryStore(ttl_seconds=60)
+    with patch("generation.session_memory.time.monotonic", return_value=1000.0):
+        store.add_turn("user", "q", "a")
+    with patch("generation.session_memory.time.monotonic", return_value=1061.0):
+        assert store.get_history("user") == []
+        assert len(store) == 0
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = SessionMemoryStore(max_sessions=2)
+    store.add_turn("a", "q", "a")
+    store.add_turn("b", "q", "a")
+    store.get_history("a")
+    store.add_turn("c", "q", "a")
+
+    assert len(store) == 2
+    assert store.get_history("b") == []
+    assert store.get_history("a") != []
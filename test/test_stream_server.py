@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+os.environ.setdefault("WARM_UP_COMPONENTS", "false")
+
+import asyncio
+import json
+from unittest.mock import patch, MagicMock
+from rasa_layer.stream_server import stream_webhook
+from rasa_layer.smart_router import match_small_talk
+from generation.answer_cache import AnswerCache
+from generation.llm import LLM
+from generation.llm_backends import LLMBackend
+
+
+class FakeResponse:
+    def __init__(self):
+        self.events = []
+
+    async def send(self, data):
+        self.events.append(data)
+
+    async def eof(self):
+        pass
+
+
+class FakeRequest:
+    def __init__(self, payload):
+        self.json = payload
+        self.response = FakeResponse()
+
+    async def respond(self, **kwargs):
+        return self.response
+
+
+def post(message, sender="web-1"):
+    """Sends one message to the stream endpoint and returns the streamed text."""
+    request = FakeRequest({"sender": sender, "message": message})
+    asyncio.run(stream_webhook(request))
+    assert request.response.events[-1].startswith("event: end")
+    return "".join(json.loads(event[len("data: "):])["text"] for event in request.response.events[:-1])
+
+
+def test_small_talk_matches_rasa_training_examples():
+    assert match_small_talk("Hello!").startswith("Hello! I'm University Bot")
+    assert match_small_talk("Good mornng").startswith("Hello!")
+    assert match_small_talk("thank you").startswith("Goodbye!")
+    assert match_small_talk("What are the fees?") is None
+    assert match_small_talk("  ") is None
+
+
+def test_greeting_is_answered_without_rag():
+    with patch("rasa_layer.smart_router.component_pool") as pool:
+        assert post("hi").startswith("Hello! I'm University Bot")
+        assert post("bye").startswith("Goodbye!")
+    pool.get_llm.assert_not_called()
+
+
+def test_questions_are_streamed_from_rag():
+    async def fake_stream(user_query, *components, **options):
+        for token in ("Fees ", "are ", "30000."):
+            yield token
+
+    with patch("rasa_layer.smart_router.component_pool", MagicMock()), \
+            patch("rasa_layer.smart_router.match_faq", return_value=None), \
+            patch("rasa_layer.smart_router.answer_query_stream", side_effect=fake_stream):
+        assert post("What is the hostel fee for M.Tech?") == "Fees are 30000."
+
+
+class RecordingBackend(LLMBackend):
+    """Answers "Answer <n>." and keeps the messages of every request it receives."""
+    rate_limited = False
+
+    def __init__(self):
+        super().__init__("fake")
+        self.requests = []
+
+    def stream(self, messages, timeout=None, **params):
+        raise NotImplementedError
+
+    async def astream(self, messages, timeout=None, **params):
+        self.requests.append(messages)
+        yield f"Answer {len(self.requests)}."
+
+
+class FakeEmbeddingModel:
+    def embed_query(self, text):
+        return [0.1, 0.2, 0.3]
+
+
+class FakeVectorStore:
+    def retrieve_documents(self, embedding):
+        return ["Fees are 30000 per semester.", "The hostel has 200 rooms."]
+
+
+def rag_pool(llm, cache=None):
+    """A component pool serving the real RAG pipeline with fake models."""
+    pool = MagicMock()
+    pool.get_embedding_model.return_value = FakeEmbeddingModel()
+    pool.get_vectorstore.return_value = FakeVectorStore()
+    pool.get_llm.return_value = llm
+    pool.get_answer_cache.return_value = cache
+    pool.get_reranker.return_value = None
+    return pool
+
+
+def test_senders_keep_separate_histories():
+    backend = RecordingBackend()
+    llm = LLM(backend=backend)
+
+    with patch("rasa_layer.smart_router.component_pool", rag_pool(llm)), \
+            patch("rasa_layer.smart_router.ANSWER_CACHE_ENABLED", False), \
+            patch("rasa_layer.smart_router.match_faq", return_value=None):
+        post("What is the tuition fee for the MBA?", sender="alice")
+        post("And for the hostel?", sender="alice")
+        post("What is the tuition fee for M.Tech?", sender="bob")
+
+    alice_follow_up, bob_first = backend.requests[1], backend.requests[2]
+    assert "What is the tuition fee for the MBA?" in [m["content"] for m in alice_follow_up]
+    assert [m["role"] for m in bob_first] == ["system", "user"]
+    assert [m["content"] for m in llm.memory.get_history("bob")] == ["What is the tuition fee for M.Tech?", "Answer 3."]
+    assert len(llm.memory.get_history("alice")) == 4
+
+
+def test_cache_serves_a_new_sender_while_another_has_history():
+    backend = RecordingBackend()
+    llm, cache = LLM(backend=backend), AnswerCache()
+
+    with patch("rasa_layer.smart_router.component_pool", rag_pool(llm, cache)), \
+            patch("rasa_layer.smart_router.ANSWER_CACHE_ENABLED", True), \
+            patch("rasa_layer.smart_router.match_faq", return_value=None):
+        assert post("What is the tuition fee?", sender="alice") == "Answer 1."
+        assert post("And for the hostel?", sender="alice") == "Answer 2."
+        # Bob's conversation is fresh, so alice's history does not keep him from the cache
+        assert post("What is the tuition fee?", sender="bob") == "Answer 1."
+
+    assert len(backend.requests) == 2
+    assert [m["content"] for m in llm.memory.get_history("bob")] == ["What is the tuition fee?", "Answer 1."]
@@ -0,0 +1,114 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import asyncio
+import pytest
+from generation import telemetry
+from generation.telemetry import trace_request, span, record, annotate, current_trace
+from generation.rag_core import answer_query, answer_query_async
+
+
+class MockEmbeddingModel:
+    def embed_query(self, text):
+        return [0.1, 0.2, 0.3]
+
+
+class MockVectorStore:
+    def retrieve_documents(self, embedding):
+        return ["Doc 1 line", "Doc 2 line"]
+
+
+class MockLLM:
+    def generate(self, prompt):
+        return "Answer."
+
+
+def test_trace_collects_spans_and_request_id():
+    with trace_request("alice") as trace:
+        with span("embed"):
+            pass
+        record("retrieve", 0.25)
+        record("retrieve", 0.25)
+        annotate(route="faq")
+
+    assert trace.request_id.startswith("alice-")
+    assert trace.spans["retrieve"] == pytest.approx(0.5)
+    assert "embed" in trace.spans
+    assert trace.attributes == {"route": "faq", "outcome": "ok"}
+    assert current_trace() is None
+
+
+def test_trace_marks_errors_and_spans_without_trace_are_ignored():
+    record("embed", 0.1)  # no active trace: only exported as a metric
+
+    with pytest.raises(RuntimeError):
+        with trace_request("bob") as trace:
+            raise RuntimeError("boom")
+    assert trace.attributes["outcome"] == "error"
+
+
+def test_rag_pipeline_records_stages():
+    with trace_request("carol") as trace:
+        assert answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM()) == "Answer."
+
+    assert {"embed", "retrieve", "prompt_build", "generation"} <= set(trace.spans)
+
+
+def test_prompt_build_is_timed_once_per_request(monkeypatch):
+    stages = []
+    monkeypatch.setattr(telemetry, "record", lambda stage, seconds: stages.append(stage))
+
+    answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM())
+    asyncio.run(answer_query_async("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM()))
+
+    assert stages.count("prompt_build") == 2
+
+
+def test_trace_follows_async_pipeline_into_worker_threads():
+    async def run():
+        with trace_request("dave") as trace:
+            await answer_query_async("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM())
+        return trace
+
+    trace = asyncio.run(run())
+    # embed_query and retrieve_documents ran via asyncio.to_thread
+    assert {"embed", "retrieve", "generation"} <= set(trace.spans)
+
+
+def test_cache_hits_are_annotated():
+    from generation.answer_cache import AnswerCache
+
+    cache = AnswerCache()
+    answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM(), cache=cache)
+    with trace_request("erin") as trace:
+        answer_query("What is AI?", MockEmbeddingModel(), MockVectorStore(), MockLLM(), cache=cache)
+
+    assert trace.attributes["cache"] == "exact"
+    assert "embed" not in trace.spans
+
+
+def test_metrics_payload_exports_histograms():
+    pytest.importorskip("prometheus_client")
+    if telemetry.STAGE_SECONDS is None:
+        pytest.skip("metrics disabled")
+    record("embed", 0.01)
+    body, content_type = telemetry.metrics_payload()
+    assert b'rag_stage_seconds_bucket{le="0.025",stage="embed"}' in body
+    assert content_type.startswith("text/plain")
+
+
+def test_metrics_server_port_in_use_is_tried_once(monkeypatch):
+    calls = []
+
+    def port_in_use(port):
+        calls.append(port)
+        raise OSError("Address already in use")
+
+    monkeypatch.setattr(telemetry, "METRICS_ENABLED", True)
+    monkeypatch.setattr(telemetry, "start_http_server", port_in_use)
+    monkeypatch.setattr(telemetry, "_metrics_server_started", None)
+
+    assert telemetry.start_metrics_server(9102) is False
+    assert telemetry.start_metrics_server(9102) is False
+    assert calls == [9102]
@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import random
+import pytest
+from data_preprocessing.text_chunker import split_chunk_by_tokens, count_tokens, chunk_text
+
+
+class WhitespaceEncoder:
+    """Tokenizer stand-in: one token per word, counting every call."""
+    is_fast = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, add_special_tokens=False):
+        self.calls += 1
+        return text.split()
+
+
+class BatchEncoder(WhitespaceEncoder):
+    is_fast = True
+
+    def __call__(self, texts, add_special_tokens=False):
+        self.calls += 1
+        return {"input_ids": [t.split() for t in texts]}
+
+
+def reference_split(sentences, encoder, max_tokens=512, overlap=50):
+    """The original re-encoding implementation, used as the behavioural reference."""
+    all_chunks, current_chunk, current_len = [], [], 0
+    for sentence in sentences:
+        sent_len = len(encoder.encode(sentence))
+        if current_len + sent_len > max_tokens:
+            all_chunks.append(" ".join(current_chunk))
+            if overlap > 0:
+                overlap_tokens, total_tokens = [], 0
+                for sent in reversed(current_chunk):
+                    total_tokens += len(encoder.encode(sent))
+                    if total_tokens >= overlap:
+                        break
+                    overlap_tokens.insert(0, sent)
+                current_chunk = overlap_tokens
+                current_len = sum(len(encoder.encode(s)) for s in current_chunk)
+            else:
+                current_chunk, current_len = [], 0
+        current_chunk.append(sentence)
+        current_len += sent_len
+    if current_chunk:
+        all_chunks.append(" ".join(current_chunk))
+    return all_chunks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_chunking(seed):
+    rng = random.Random(seed)
+    sentences = [" ".join(["word"] * rng.randint(1, 40)) + f" s{i}." for i in range(200)]
+
+    assert split_chunk_by_tokens(sentences, WhitespaceEncoder(), 100, 25) == reference_split(sentences, WhitespaceEncoder(), 100, 25)
+    assert split_chunk_by_tokens(sentences, WhitespaceEncoder(), 100, 0) == reference_split(sentences, WhitespaceEncoder(), 100, 0)
+
+
+def test_each_sentence_is_encoded_once():
+    sentences = [f"sentence number {i} here." for i in range(100)]
+    encoder = WhitespaceEncoder()
+    split_chunk_by_tokens(sentences, encoder, max_tokens=20, overlap=8)
+    assert encoder.calls == len(sentences)
+
+
+def test_fast_tokenizer_is_called_once_per_batch():
+    encoder = BatchEncoder()
+    assert count_tokens(["a b", "c d e"], encoder) == [2, 3]
+    assert encoder.calls == 1
+
+
+DOCUMENT = (
+    "Intro line about the university.\n"
+    "1. Eligibility Candidates need a B.Tech degree. Candidates need 55% marks.\n"
+    "2. Fees The tuition fee is Rs. 19845. Hostel charges are separate. Reservation applies to OBC."
+)
+
+
+def test_section_strategy_respects_headings():
+    chunks = chunk_text(DOCUMENT, BatchEncoder(), strategy="section")
+    assert chunks == [
+        "Intro line about the university.",
+        "1. Eligibility Candidates need a B.Tech degree. Candidates need 55% marks.",
+        "2. Fees The tuition fee is Rs. 19845. Hostel charges are separate. Reservation applies to OBC.",
+    ]
+
+
+def test_token_strategy_ignores_headings():
+    chunks = chunk_text(DOCUMENT, BatchEncoder(), strategy="token", max_tokens=1000)
+    assert len(chunks) == 1
+
+
+def test_semantic_strategy_splits_unrelated_sentences():
+    chunks = chunk_text(DOCUMENT, BatchEncoder(), strategy="semantic",
+                        similarity=lambda a, b: 0.0 if "Reservation" in b else 1.0)
+    assert chunks[-1] == "Reservation applies to OBC."
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        chunk_text(DOCUMENT, BatchEncoder(), strategy="paragraph")
@@ -0,0 +1,31 @@
+"""
+This module provides the HTTP server shared by the local mock servers
+(generation/mock_llm_server.py and retrieval/mock_embedding_server.py).
+"""
+
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server that handles every connection in a daemon thread."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve_in_background(server: ThreadingHTTPServer) -> str:
+    """
+    Runs server.serve_forever() in a daemon thread.
+
+    Returns:
+        str: The server's base address, e.g. "http://127.0.0.1:8765".
+    """
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"